@@ -6,6 +6,12 @@ from app.schemas.user_schema import User
 from app.schemas.token_schema import RefreshToken
 from app.schemas.journals_schema import Journal
 from app.schemas.affirmations_schema import Affirmation
+from app.schemas.llm_usage_schema import LLMUsage
+from app.schemas.import_job_schema import ImportJob
+from app.schemas.search_token_schema import JournalSearchToken
+from app.schemas.data_key_schema import UserDataKey
+from app.schemas.password_reset_otp_schema import PasswordResetOtp, PasswordResetFailure
+from app.schemas.aggregate_stats_schema import AggregationWatermark, DailyJournalStats, DailyActiveJournaler
 
 config = context.config
 config.set_main_option("sqlalchemy.url",DATABASE_URL)
@@ -0,0 +1,162 @@
+"""journals partitioned shadow tables
+
+Revision ID: e3b9c7a1d460
+Revises:
+Create Date: 2026-10-19 18:42:51.630915
+
+Optional, PostgreSQL 12+ only. Step 1 of moving journals and affirmations
+to tables hash-partitioned by user_id:
+
+1. This revision creates empty partitioned copies (journals_p,
+   affirmations_p, same modulus so a user's journals and affirmations
+   land in matching partitions) and triggers that mirror every write on
+   the live tables into them.
+2. `python -m scripts.backfill_journal_partitions` copies existing rows
+   in small batches while the app keeps running.
+3. The next revision swaps the tables, holding locks only briefly.
+
+Every route query filters by user_id, so hash partitioning on it prunes
+each one to a single partition; created_at ranges would not prune any.
+The partition count is fixed here, default 16:
+
+    alembic -n journals_partitioned -x journal_partitions=32 upgrade journals_partitioning@e3b9c7a1d460
+
+The branch depends only on the revisions that add the columns it copies
+beyond the initial schema: sentiment_pending (b42d7e19c5a3),
+affirmations.user_id (c4f1a9d2e6b3), content_fingerprint (b7e4f0a2c915)
+and ingested_at (b8f4d1c7e293).
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9c7a1d460'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = ('journals_partitioning',)
+depends_on: Union[str, Sequence[str], None] = (
+    'b42d7e19c5a3',
+    'c4f1a9d2e6b3',
+    'b7e4f0a2c915',
+    'b8f4d1c7e293',
+)
+
+JOURNAL_COLUMNS = (
+    'id', 'title', 'content', 'user_id', 'sentiment_label', 'sentiment_score',
+    'created_at', 'sentiment_pending', 'content_fingerprint', 'ingested_at',
+)
+AFFIRMATION_COLUMNS = (
+    'id', 'input_summary', 'affirmations', 'journal_id', 'user_id', 'ingested_at',
+)
+
+
+def _upsert(table, columns, row):
+    names = ', '.join(columns)
+    values = ', '.join(f'{row}.{column}' for column in columns)
+    updates = ', '.join(
+        f'{column} = EXCLUDED.{column}' for column in columns if column not in ('id', 'user_id')
+    )
+    return (
+        f'INSERT INTO {table} ({names}) VALUES ({values}) '
+        f'ON CONFLICT (id, user_id) DO UPDATE SET {updates};'
+    )
+
+
+def _mirror_function(name, table, columns, before_upsert=''):
+    return f"""
+    CREATE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM {table} WHERE id = OLD.id AND user_id = OLD.user_id;
+            RETURN OLD;
+        END IF;
+        IF TG_OP = 'UPDATE' THEN
+            IF NEW.user_id IS DISTINCT FROM OLD.user_id THEN
+                DELETE FROM {table} WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+        END IF;
+        {before_upsert}
+        {_upsert(table, columns, 'NEW')}
+        RETURN NEW;
+    END
+    $$;
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        raise RuntimeError('Journal partitioning needs PostgreSQL 12 or newer')
+    partitions = int(context.get_x_argument(as_dictionary=True).get('journal_partitions', 16))
+
+    op.execute('CREATE TABLE journals_p (LIKE journals INCLUDING DEFAULTS) PARTITION BY HASH (user_id)')
+    op.execute('ALTER TABLE journals_p ADD CONSTRAINT journals_p_pkey PRIMARY KEY (id, user_id)')
+    op.execute(
+        'ALTER TABLE journals_p ADD CONSTRAINT journals_p_user_id_fkey '
+        'FOREIGN KEY (user_id) REFERENCES users (id)'
+    )
+    # Serves the list, overview and export queries (user_id = ? ORDER BY created_at)
+    op.execute('CREATE INDEX ix_journals_p_user_id_created_at ON journals_p (user_id, created_at)')
+    op.execute(
+        'CREATE INDEX ix_journals_p_sentiment_pending ON journals_p (user_id) WHERE sentiment_pending'
+    )
+    # Read by the stats aggregation; it cannot prune partitions
+    op.execute('CREATE INDEX ix_journals_p_ingested_at ON journals_p (ingested_at, id)')
+
+    op.execute(
+        'CREATE TABLE affirmations_p (LIKE affirmations INCLUDING DEFAULTS) PARTITION BY HASH (user_id)'
+    )
+    op.execute('ALTER TABLE affirmations_p ADD CONSTRAINT affirmations_p_pkey PRIMARY KEY (id, user_id)')
+    op.execute(
+        'ALTER TABLE affirmations_p ADD CONSTRAINT affirmations_p_journal_id_fkey '
+        'FOREIGN KEY (journal_id, user_id) REFERENCES journals_p (id, user_id) ON DELETE CASCADE'
+    )
+    op.execute(
+        'ALTER TABLE affirmations_p ADD CONSTRAINT affirmations_p_user_id_fkey '
+        'FOREIGN KEY (user_id) REFERENCES users (id)'
+    )
+    op.execute('CREATE INDEX ix_affirmations_p_user_id_journal_id ON affirmations_p (user_id, journal_id)')
+    op.execute('CREATE INDEX ix_affirmations_p_ingested_at ON affirmations_p (ingested_at, id)')
+
+    for remainder in range(partitions):
+        for table in ('journals_p', 'affirmations_p'):
+            op.execute(
+                f'CREATE TABLE {table}{remainder:02d} PARTITION OF {table} '
+                f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+            )
+
+    op.execute(_mirror_function('journals_p_mirror', 'journals_p', JOURNAL_COLUMNS))
+    # An affirmation can be added to a journal the backfill has not reached
+    # yet, so copy the parent first to satisfy the foreign key
+    op.execute(
+        _mirror_function(
+            'affirmations_p_mirror',
+            'affirmations_p',
+            AFFIRMATION_COLUMNS,
+            before_upsert=(
+                f'INSERT INTO journals_p ({", ".join(JOURNAL_COLUMNS)}) '
+                f'SELECT {", ".join(JOURNAL_COLUMNS)} FROM journals WHERE id = NEW.journal_id '
+                'ON CONFLICT DO NOTHING;'
+            ),
+        )
+    )
+    op.execute(
+        'CREATE TRIGGER journals_p_mirror AFTER INSERT OR UPDATE OR DELETE ON journals '
+        'FOR EACH ROW EXECUTE FUNCTION journals_p_mirror()'
+    )
+    op.execute(
+        'CREATE TRIGGER affirmations_p_mirror AFTER INSERT OR UPDATE OR DELETE ON affirmations '
+        'FOR EACH ROW EXECUTE FUNCTION affirmations_p_mirror()'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER IF EXISTS affirmations_p_mirror ON affirmations')
+    op.execute('DROP TRIGGER IF EXISTS journals_p_mirror ON journals')
+    op.execute('DROP FUNCTION affirmations_p_mirror()')
+    op.execute('DROP FUNCTION journals_p_mirror()')
+    op.execute('DROP TABLE affirmations_p')
+    op.execute('DROP TABLE journals_p')
@@ -0,0 +1,152 @@
+"""journals partitioned swap
+
+Revision ID: f5d2a8c6b731
+Revises: e3b9c7a1d460
+Create Date: 2026-10-19 19:10:26.581047
+
+Step 3: swap the backfilled partitioned tables in for journals and
+affirmations. Row counts are compared before any lock is taken, and the
+swap refuses to run if the backfill has not caught up. The ACCESS
+EXCLUSIVE locks are then held only for an index-backed check of recent
+writes, a few renames and adding the search token foreign key NOT VALID;
+the key is validated after the locks are released.
+
+The old tables are kept as journals_heap / affirmations_heap (no longer
+written) until you drop them by hand.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5d2a8c6b731'
+down_revision: Union[str, None] = 'e3b9c7a1d460'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOURNAL_COLUMNS = (
+    'id, title, content, user_id, sentiment_label, sentiment_score, '
+    'created_at, sentiment_pending, content_fingerprint, ingested_at'
+)
+AFFIRMATION_COLUMNS = 'id, input_summary, affirmations, journal_id, user_id, ingested_at'
+# (old name, new name) for tables and indexes, applied in order
+HEAP_RENAMES = (
+    ('TABLE', 'journals', 'journals_heap'),
+    ('TABLE', 'affirmations', 'affirmations_heap'),
+    ('INDEX', 'journals_pkey', 'journals_heap_pkey'),
+    ('INDEX', 'ix_journals_id', 'ix_journals_heap_id'),
+    ('INDEX', 'ix_journals_sentiment_pending', 'ix_journals_heap_sentiment_pending'),
+    ('INDEX', 'ix_journals_ingested_at', 'ix_journals_heap_ingested_at'),
+    ('INDEX', 'affirmations_pkey', 'affirmations_heap_pkey'),
+    ('INDEX', 'ix_affirmations_ingested_at', 'ix_affirmations_heap_ingested_at'),
+)
+PARTITIONED_RENAMES = (
+    ('TABLE', 'journals_p', 'journals'),
+    ('TABLE', 'affirmations_p', 'affirmations'),
+    ('INDEX', 'journals_p_pkey', 'journals_pkey'),
+    ('INDEX', 'ix_journals_p_sentiment_pending', 'ix_journals_sentiment_pending'),
+    ('INDEX', 'ix_journals_p_ingested_at', 'ix_journals_ingested_at'),
+    ('INDEX', 'affirmations_p_pkey', 'affirmations_pkey'),
+    ('INDEX', 'ix_affirmations_p_ingested_at', 'ix_affirmations_ingested_at'),
+)
+
+
+def _rename(renames, reverse=False):
+    for kind, old, new in reversed(renames) if reverse else renames:
+        if reverse:
+            old, new = new, old
+        op.execute(f'ALTER {kind} {old} RENAME TO {new}')
+
+
+SEARCH_TOKENS_FK = 'journal_search_tokens_journal_id_fkey'
+# Writes this recent are checked again under the lock
+RECENT_WRITES = "interval '15 minutes'"
+
+
+def _check_counts(bind, live, shadow):
+    # One statement, so both counts see the same snapshot; the mirror
+    # triggers write both tables in the same transaction
+    live_count, shadow_count = bind.execute(
+        sa.text(f'SELECT (SELECT count(*) FROM {live}), (SELECT count(*) FROM {shadow})')
+    ).one()
+    if live_count != shadow_count:
+        raise RuntimeError(
+            f'{shadow} has {shadow_count} rows but {live} has {live_count}; '
+            'run `python -m scripts.backfill_journal_partitions` first'
+        )
+
+
+def _check_recent(bind, live, shadow):
+    # Served by the (ingested_at, id) index and the shadow primary key
+    missing = bind.execute(
+        sa.text(
+            f'SELECT count(*) FROM {live} l WHERE l.ingested_at > now() - {RECENT_WRITES} '
+            f'AND NOT EXISTS (SELECT 1 FROM {shadow} s WHERE s.id = l.id AND s.user_id = l.user_id)'
+        )
+    ).scalar_one()
+    if missing:
+        raise RuntimeError(f'{missing} recent {live} rows are missing from {shadow}')
+
+
+def _validate_search_tokens_fk():
+    # Scans journal_search_tokens without blocking writes; outside the
+    # swap transaction so its locks are already released
+    with op.get_context().autocommit_block():
+        op.execute(f'ALTER TABLE journal_search_tokens VALIDATE CONSTRAINT {SEARCH_TOKENS_FK}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    _check_counts(bind, 'journals', 'journals_p')
+    _check_counts(bind, 'affirmations', 'affirmations_p')
+    op.execute('LOCK TABLE journals, affirmations, journal_search_tokens IN ACCESS EXCLUSIVE MODE')
+    _check_recent(bind, 'journals', 'journals_p')
+    _check_recent(bind, 'affirmations', 'affirmations_p')
+
+    # The mirror functions stay until the shadow revision is downgraded, so
+    # this revision can be downgraded on its own
+    op.execute('DROP TRIGGER affirmations_p_mirror ON affirmations')
+    op.execute('DROP TRIGGER journals_p_mirror ON journals')
+    op.execute(f'ALTER TABLE journal_search_tokens DROP CONSTRAINT {SEARCH_TOKENS_FK}')
+    _rename(HEAP_RENAMES)
+    _rename(PARTITIONED_RENAMES)
+    op.execute(
+        f'ALTER TABLE journal_search_tokens ADD CONSTRAINT {SEARCH_TOKENS_FK} '
+        'FOREIGN KEY (journal_id, user_id) REFERENCES journals (id, user_id) ON DELETE CASCADE '
+        'NOT VALID'
+    )
+    _validate_search_tokens_fk()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Copies every row back into the heap tables under lock; plan downtime
+    op.execute('LOCK TABLE journals, affirmations, journal_search_tokens IN ACCESS EXCLUSIVE MODE')
+    op.execute('TRUNCATE journals_heap, affirmations_heap')
+    op.execute(
+        f'INSERT INTO journals_heap ({JOURNAL_COLUMNS}) SELECT {JOURNAL_COLUMNS} FROM journals'
+    )
+    op.execute(
+        f'INSERT INTO affirmations_heap ({AFFIRMATION_COLUMNS}) '
+        f'SELECT {AFFIRMATION_COLUMNS} FROM affirmations'
+    )
+    op.execute(f'ALTER TABLE journal_search_tokens DROP CONSTRAINT {SEARCH_TOKENS_FK}')
+    _rename(PARTITIONED_RENAMES, reverse=True)
+    _rename(HEAP_RENAMES, reverse=True)
+    op.execute(
+        f'ALTER TABLE journal_search_tokens ADD CONSTRAINT {SEARCH_TOKENS_FK} '
+        'FOREIGN KEY (journal_id) REFERENCES journals (id) ON DELETE CASCADE NOT VALID'
+    )
+    op.execute(
+        'CREATE TRIGGER journals_p_mirror AFTER INSERT OR UPDATE OR DELETE ON journals '
+        'FOR EACH ROW EXECUTE FUNCTION journals_p_mirror()'
+    )
+    op.execute(
+        'CREATE TRIGGER affirmations_p_mirror AFTER INSERT OR UPDATE OR DELETE ON affirmations '
+        'FOR EACH ROW EXECUTE FUNCTION affirmations_p_mirror()'
+    )
+    _validate_search_tokens_fk()
@@ -0,0 +1,41 @@
+"""refresh token rotation
+
+Revision ID: a6c2e8f4b019
+Revises: d8b3f6e1a427
+Create Date: 2026-10-19 22:14:05.318240
+
+Existing sessions start at generation 0; their tokens carry no generation
+and are matched on refresh_token until their first rotation.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c2e8f4b019'
+down_revision: Union[str, None] = 'd8b3f6e1a427'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('generation', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rotated_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rotated sessions have no stored token to fall back on
+    op.execute("DELETE FROM refresh_tokens WHERE refresh_token IS NULL OR revoked_at IS NOT NULL")
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_revoked_at'))
+        batch_op.drop_column('revoked_at')
+        batch_op.drop_column('rotated_at')
+        batch_op.drop_column('generation')
@@ -0,0 +1,55 @@
+"""import jobs table and sentiment pending col
+
+Revision ID: b42d7e19c5a3
+Revises: 8c1f4e2a9b7d
+Create Date: 2026-10-19 11:02:47.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b42d7e19c5a3'
+down_revision: Union[str, None] = '8c1f4e2a9b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('import_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('format', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('rows_received', sa.Integer(), nullable=False),
+    sa.Column('rows_imported', sa.Integer(), nullable=False),
+    sa.Column('rows_failed', sa.Integer(), nullable=False),
+    sa.Column('rows_enriched', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_jobs_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('journals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sentiment_pending', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_journals_sentiment_pending', ['user_id'], unique=False, postgresql_where=sa.text('sentiment_pending'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('journals', schema=None) as batch_op:
+        batch_op.drop_index('ix_journals_sentiment_pending', postgresql_where=sa.text('sentiment_pending'))
+        batch_op.drop_column('sentiment_pending')
+
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_jobs_user_id'))
+
+    op.drop_table('import_jobs')
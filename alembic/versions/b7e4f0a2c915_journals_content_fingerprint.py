@@ -0,0 +1,33 @@
+"""journals content fingerprint col
+
+Revision ID: b7e4f0a2c915
+Revises: a5c2d8e9f134
+Create Date: 2026-10-19 16:40:12.773105
+
+Existing rows keep a NULL fingerprint; it is filled in the first time the
+entry is updated.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4f0a2c915'
+down_revision: Union[str, None] = 'a5c2d8e9f134'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('journals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_fingerprint', sa.LargeBinary(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('journals', schema=None) as batch_op:
+        batch_op.drop_column('content_fingerprint')
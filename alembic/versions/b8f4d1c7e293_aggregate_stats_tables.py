@@ -0,0 +1,89 @@
+"""aggregate stats tables
+
+Revision ID: b8f4d1c7e293
+Revises: a6c2e8f4b019
+Create Date: 2026-10-19 23:05:42.917305
+
+Adds ingested_at to journals and affirmations and the tables the stats
+aggregation writes. The new columns' default is evaluated once on
+PostgreSQL 11+, so existing rows all get the migration time without a
+table rewrite; their (ingested_at, id) indexes are built CONCURRENTLY.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8f4d1c7e293'
+down_revision: Union[str, None] = 'a6c2e8f4b019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INGESTED_INDEXES = (
+    ('ix_journals_ingested_at', 'journals'),
+    ('ix_affirmations_ingested_at', 'affirmations'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for _, table in INGESTED_INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'ingested_at',
+                    sa.DateTime(timezone=True),
+                    server_default=sa.text('now()'),
+                    nullable=False,
+                )
+            )
+    with op.get_context().autocommit_block():
+        for name, table in INGESTED_INDEXES:
+            op.create_index(
+                name, table, ['ingested_at', 'id'], unique=False, postgresql_concurrently=True
+            )
+
+    op.create_table(
+        'aggregation_watermarks',
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('ingested_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('source'),
+    )
+    op.create_table(
+        'journal_stats_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=False),
+        sa.Column('active_users', sa.Integer(), nullable=False),
+        sa.Column('positive', sa.Integer(), nullable=False),
+        sa.Column('negative', sa.Integer(), nullable=False),
+        sa.Column('neutral', sa.Integer(), nullable=False),
+        sa.Column('pending', sa.Integer(), nullable=False),
+        sa.Column('mood_sum', sa.Float(), nullable=False),
+        sa.Column('affirmations', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    op.create_table(
+        'journal_active_users_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('day', 'user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('journal_active_users_daily')
+    op.drop_table('journal_stats_daily')
+    op.drop_table('aggregation_watermarks')
+    for name, table in INGESTED_INDEXES:
+        op.drop_index(name, table_name=table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('ingested_at')
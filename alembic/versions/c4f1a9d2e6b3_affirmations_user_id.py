@@ -0,0 +1,41 @@
+"""affirmations user_id col
+
+Revision ID: c4f1a9d2e6b3
+Revises: b7e4f0a2c915
+Create Date: 2026-10-19 18:05:37.204518
+
+Denormalizes the owner onto affirmations so they can be filtered and
+partitioned by user like journals (see alembic/partitioning/).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a9d2e6b3'
+down_revision: Union[str, None] = 'b7e4f0a2c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.UUID(), nullable=True))
+    op.execute(
+        'UPDATE affirmations SET user_id = '
+        '(SELECT journals.user_id FROM journals WHERE journals.id = affirmations.journal_id)'
+    )
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.UUID(), nullable=False)
+        batch_op.create_foreign_key('affirmations_user_id_fkey', 'users', ['user_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.drop_constraint('affirmations_user_id_fkey', type_='foreignkey')
+        batch_op.drop_column('user_id')
@@ -0,0 +1,30 @@
+"""import jobs rows pending
+
+Revision ID: c7e1a3f5d902
+Revises: b8f4d1c7e293
+Create Date: 2026-10-20 09:12:37.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1a3f5d902'
+down_revision: Union[str, None] = 'b8f4d1c7e293'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rows_pending', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('rows_pending')
@@ -0,0 +1,47 @@
+"""user data keys one active
+
+Revision ID: d4a7b2e9f613
+Revises: c7e1a3f5d902
+Create Date: 2026-10-20 10:03:51.226470
+
+Users who already got two active keys from concurrent first loads keep
+only the newest active; the others are retired, so they still decrypt.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7b2e9f613'
+down_revision: Union[str, None] = 'c7e1a3f5d902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE user_data_keys SET retired_at = now() "
+        "WHERE retired_at IS NULL AND EXISTS ("
+        "SELECT 1 FROM user_data_keys newer "
+        "WHERE newer.user_id = user_data_keys.user_id AND newer.retired_at IS NULL "
+        "AND (newer.created_at > user_data_keys.created_at "
+        "OR (newer.created_at = user_data_keys.created_at AND newer.id > user_data_keys.id)))"
+    )
+    with op.batch_alter_table('user_data_keys', schema=None) as batch_op:
+        batch_op.create_index(
+            'ux_user_data_keys_active',
+            ['user_id'],
+            unique=True,
+            postgresql_where=sa.text('retired_at IS NULL'),
+            sqlite_where=sa.text('retired_at IS NULL'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user_data_keys', schema=None) as batch_op:
+        batch_op.drop_index('ux_user_data_keys_active')
@@ -0,0 +1,55 @@
+"""password reset otps table
+
+Revision ID: d8b3f6e1a427
+Revises: c4f1a9d2e6b3
+Create Date: 2026-10-19 20:31:48.902663
+
+Moves reset codes off the users row. Codes outstanding at upgrade time are
+dropped; users request a new one.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b3f6e1a427'
+down_revision: Union[str, None] = 'c4f1a9d2e6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('password_reset_otps',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('code_hash', sa.LargeBinary(length=32), nullable=False),
+    sa.Column('attempts', sa.SmallInteger(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('password_reset_otps', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_password_reset_otps_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_password_reset_otps_expires_at'), ['expires_at'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('otp_codes')
+        batch_op.drop_column('opt_expires')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('opt_expires', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('otp_codes', sa.String(), nullable=True))
+
+    with op.batch_alter_table('password_reset_otps', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_password_reset_otps_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_password_reset_otps_user_id'))
+
+    op.drop_table('password_reset_otps')
@@ -0,0 +1,40 @@
+"""journal search tokens table
+
+Revision ID: d9e3a5f1c087
+Revises: b42d7e19c5a3
+Create Date: 2026-10-19 12:20:31.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e3a5f1c087'
+down_revision: Union[str, None] = 'b42d7e19c5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('journal_search_tokens',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('token', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('journal_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['journal_id'], ['journals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'token', 'journal_id')
+    )
+    with op.batch_alter_table('journal_search_tokens', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_search_tokens_journal_id', ['journal_id'], unique=False)
+    # Existing journals are indexed with `python -m scripts.rebuild_search_index`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('journal_search_tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_search_tokens_journal_id')
+
+    op.drop_table('journal_search_tokens')
@@ -0,0 +1,39 @@
+"""password reset failures table
+
+Revision ID: e2b5c8f1a374
+Revises: d4a7b2e9f613
+Create Date: 2026-10-20 11:27:09.841552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b5c8f1a374'
+down_revision: Union[str, None] = 'd4a7b2e9f613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('password_reset_failures',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('failures', sa.Integer(), nullable=False),
+    sa.Column('window_started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('password_reset_failures', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_password_reset_failures_window_started_at'), ['window_started_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('password_reset_failures', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_password_reset_failures_window_started_at'))
+
+    op.drop_table('password_reset_failures')
@@ -0,0 +1,44 @@
+"""user data keys table
+
+Revision ID: e61b0c8d4f52
+Revises: d9e3a5f1c087
+Create Date: 2026-10-19 13:05:12.447091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e61b0c8d4f52'
+down_revision: Union[str, None] = 'd9e3a5f1c087'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_data_keys',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('wrapped_key', sa.String(), nullable=False),
+    sa.Column('master_key_id', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('retired_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('user_data_keys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_data_keys_user_id'), ['user_id'], unique=False)
+    # Existing rows stay readable under FERNET_KEY; move them to per-user
+    # keys with `python -m scripts.rotate_data_keys`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user_data_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_data_keys_user_id'))
+
+    op.drop_table('user_data_keys')
@@ -0,0 +1,181 @@
+"""encrypted cols to bytea
+
+Revision ID: f27a9c3e6d14
+Revises: e61b0c8d4f52
+Create Date: 2026-10-19 13:48:55.201736
+
+Stores Fernet tokens as raw bytes instead of base64 text, and moves
+affirmations.affirmations off the JSON type (it only ever held a
+ciphertext string). Rows are converted in batches, each committed on its
+own, so the tables are never locked for the whole conversion. Until the
+columns are swapped, a trigger converts every row the app inserts or
+edits, so writes made during the backfill are carried over.
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f27a9c3e6d14'
+down_revision: Union[str, None] = 'e61b0c8d4f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 5000
+
+# Fernet tokens are padded URL-safe base64
+TO_BYTES = "decode(translate({col}, '-_', '+/'), 'base64')"
+TO_TEXT = "translate(replace(encode({col}, 'base64'), E'\\n', ''), '+/', '-_')"
+# affirmations.affirmations held the token as a JSON string
+JSON_TO_BYTES = TO_BYTES.format(col="({col} #>> '{{}}')")
+TO_JSON = f"to_json({TO_TEXT})"
+
+
+def _size(table, columns):
+    expr = " + ".join(f"coalesce(sum(pg_column_size({col})), 0)" for col in columns)
+    return op.get_bind().execute(sa.text(f"SELECT {expr} FROM {table}")).scalar()
+
+
+def _sync_trigger(table, assignments):
+    """
+    Keep the new columns in step with app writes until `_swap` drops the
+    trigger. It is created in the migration's transaction, before the
+    backfill commits anything, so no write can fall between the two.
+    """
+    sources = ", ".join(source for _, source in assignments.values())
+    sets = " ".join(
+        f"NEW.{new} := {template.format(col='NEW.' + source)};"
+        for new, (template, source) in assignments.items()
+    )
+    op.execute(
+        f"CREATE FUNCTION {table}_bytea_sync() RETURNS trigger AS $$ "
+        f"BEGIN {sets} RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        f"CREATE TRIGGER {table}_bytea_sync BEFORE INSERT OR UPDATE OF {sources} "
+        f"ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_bytea_sync()"
+    )
+
+
+def _backfill(table, assignments):
+    sets = ", ".join(
+        f"{new} = {template.format(col=source)}"
+        for new, (template, source) in assignments.items()
+    )
+    # Keyset batches over the primary key: each batch starts where the last
+    # one ended instead of rescanning converted rows for NULLs. Rows written
+    # behind the keyset are converted by the sync trigger.
+    batch = sa.text(
+        f"WITH batch AS (SELECT id FROM {table} "
+        "WHERE (CAST(:last_id AS uuid) IS NULL OR id > :last_id) "
+        f"ORDER BY id LIMIT {BATCH_SIZE}) "
+        f"UPDATE {table} SET {sets} FROM batch WHERE {table}.id = batch.id "
+        f"RETURNING {table}.id"
+    )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = None
+        while True:
+            ids = bind.execute(batch, {"last_id": last_id}).scalars().all()
+            if not ids:
+                break
+            last_id = max(ids)
+
+
+def _swap(table, columns, new_type, nullable):
+    # Dropping the trigger locks the table until the migration commits, so
+    # nothing is written between here and the old columns going away
+    op.execute(f"DROP TRIGGER {table}_bytea_sync ON {table}")
+    op.execute(f"DROP FUNCTION {table}_bytea_sync()")
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        for col in columns:
+            batch_op.drop_column(col)
+            batch_op.alter_column(f"{col}_new", new_column_name=col, existing_type=new_type)
+    with op.batch_alter_table(table, schema=None) as batch_op:
+        for col in columns:
+            batch_op.alter_column(col, existing_type=new_type, nullable=nullable[col])
+
+
+def _convert(table, template, columns, json_column=None, json_template=None):
+    assignments = {f"{col}_new": (template, col) for col in columns}
+    if json_column:
+        assignments[f"{json_column}_new"] = (json_template, json_column)
+    _sync_trigger(table, assignments)
+    return assignments
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    before = _size("journals", ["title", "content"]) + _size(
+        "affirmations", ["input_summary", "affirmations"]
+    )
+
+    with op.batch_alter_table('journals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('title_new', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('content_new', sa.LargeBinary(), nullable=True))
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('input_summary_new', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('affirmations_new', sa.LargeBinary(), nullable=True))
+    journals = _convert("journals", TO_BYTES, ["title", "content"])
+    affirmations = _convert(
+        "affirmations", TO_BYTES, ["input_summary"], "affirmations", JSON_TO_BYTES
+    )
+
+    _backfill("journals", journals)
+    _backfill("affirmations", affirmations)
+
+    _swap("journals", ["title", "content"], sa.LargeBinary(), {"title": False, "content": False})
+    _swap(
+        "affirmations",
+        ["input_summary", "affirmations"],
+        sa.LargeBinary(),
+        {"input_summary": True, "affirmations": False},
+    )
+
+    after = _size("journals", ["title", "content"]) + _size(
+        "affirmations", ["input_summary", "affirmations"]
+    )
+    saved = before - after
+    logger.info(
+        "Encrypted columns: %d -> %d bytes (%d saved, %.1f%%)",
+        before,
+        after,
+        saved,
+        100 * saved / before if before else 0,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('journals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('title_new', sa.VARCHAR(), nullable=True))
+        batch_op.add_column(sa.Column('content_new', sa.VARCHAR(), nullable=True))
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('input_summary_new', sa.VARCHAR(), nullable=True))
+        batch_op.add_column(sa.Column('affirmations_new', sa.JSON(), nullable=True))
+    journals = _convert("journals", TO_TEXT, ["title", "content"])
+    affirmations = _convert(
+        "affirmations", TO_TEXT, ["input_summary"], "affirmations", TO_JSON
+    )
+
+    _backfill("journals", journals)
+    _backfill("affirmations", affirmations)
+
+    _swap("journals", ["title", "content"], sa.VARCHAR(), {"title": False, "content": False})
+    _swap(
+        "affirmations",
+        ["input_summary"],
+        sa.VARCHAR(),
+        {"input_summary": True},
+    )
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.drop_column('affirmations')
+        batch_op.alter_column('affirmations_new', new_column_name='affirmations', existing_type=sa.JSON())
+    with op.batch_alter_table('affirmations', schema=None) as batch_op:
+        batch_op.alter_column('affirmations', existing_type=sa.JSON(), nullable=False)
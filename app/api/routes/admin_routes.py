@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from app.dependencies.auth import get_admin_user
+from app.models.analytics import ServiceStatsResponse
+from app.models.auth import UserId
+from app.services.aggregate_stats import load_stats_report
+from app.services.db import ReadSession, get_read_session
+from app.utils.json_utils import serialize
+
+
+
+def custom_key_func(request: Request):
+    # Skip rate limiting for OPTIONS requests
+    if request.method == "OPTIONS":
+        return None
+    return get_remote_address(request)
+
+
+limiter = Limiter(key_func=custom_key_func)
+
+router = APIRouter()
+
+service_stats_adapter = TypeAdapter(ServiceStatsResponse)
+MAX_STATS_DAYS = 366
+
+
+@router.get("/admin/stats", response_model=ServiceStatsResponse)
+@limiter.limit("30/minute")
+def get_service_stats(
+    start: Optional[date] = Query(
+        None, description="First UTC date, inclusive; default 29 days before end"
+    ),
+    end: Optional[date] = Query(None, description="Last UTC date, inclusive; default today"),
+    admin: UserId = Depends(get_admin_user),
+    db: ReadSession = Depends(get_read_session),
+    request: Request = None,
+):
+    """
+    Cross-user daily stats from the aggregate tables, which
+    `python -m scripts.aggregate_stats run` keeps up to date. Journals and
+    affirmations themselves are not queried.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= MAX_STATS_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"start must not be after end, and at most {MAX_STATS_DAYS} days before it",
+        )
+    try:
+        body = serialize(load_stats_report(db, start, end), service_stats_adapter)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return Response(
+        content=body, media_type="application/json", headers={"Cache-Control": "no-store"}
+    )
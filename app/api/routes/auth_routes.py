@@ -1,11 +1,8 @@
-from fastapi import APIRouter, Response, Request, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Response, Request, Depends, HTTPException, status
 from app.schemas import user_schema as user_model
 from app.utils.password_utils import verify_password, hash_password
-from app.utils.tokens_utils import (
-    create_refresh_token,
-    create_access_token,
-    decode_refresh_token,
-)
+from app.utils.tokens_utils import decode_refresh_token, token_service
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models.auth import (
     UserCreate,
@@ -17,16 +14,20 @@ from app.models.auth import (
     ResetPassword,
 )
 from app.services.db import get_session
+from app.services.password_reset import issue_otp, consume_otp, purge_expired_otps
+from app.services.refresh_sessions import (
+    SessionTokens,
+    end_session,
+    rotate_session,
+    start_session,
+)
 from app.dependencies.auth import get_user_profile
 from fastapi.responses import JSONResponse
-from datetime import timezone, timedelta, datetime
-from app.schemas.token_schema import RefreshToken
 import random
-from app.core.config import REFRESH_TOKEN_EXPIRE_MINUTES
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from app.utils.email_utils import send_otp_email,send_onboard_email
-from uuid import uuid4
+from app.middleware.compression import no_compression
 
 
 # Use the custom key function from main.py
@@ -49,9 +50,21 @@ profileImg = [
 ]
 
 
+def _set_refresh_cookie(response: Response, tokens: SessionTokens) -> None:
+    response.set_cookie(
+        key=f"refresh_token_{tokens.session_id}",
+        value=tokens.refresh_token,
+        httponly=True,
+        secure=True,
+        samesite="None",
+        path="/",
+    )
+
+
 # Register a new user
 @router.post("/auth/register", response_model=Token)
 @limiter.limit("5/minute")
+@no_compression
 async def register(
     user_data: UserCreate,
     db: Session = Depends(get_session),
@@ -88,44 +101,13 @@ async def register(
         db.commit()
         db.refresh(new_user)
 
-        access_token = create_access_token(data={"sub": str(new_user.id)})
-        refresh_token = create_refresh_token(data={"sub": str(new_user.id)})
-        refresh_token_expire = datetime.now(timezone.utc) + timedelta(
-            minutes=REFRESH_TOKEN_EXPIRE_MINUTES
-        )
-        MAX_SESSIONS = 5
-        refresh_tokens = (
-            db.query(RefreshToken)
-            .filter(RefreshToken.user_id == new_user.id)
-            .order_by(RefreshToken.expires_at.asc())
-            .all()
-        )
-        if len(refresh_tokens) >= MAX_SESSIONS:
-            oldest_token = refresh_tokens[0]
-            db.delete(oldest_token)
-            db.commit()
-
-        # Store refresh token in RefreshToken table
-        session_id=str(uuid4())
-        new_refresh_token = RefreshToken(
-            user_id=new_user.id,
-            session_id=session_id,
-            refresh_token=refresh_token,
-            expires_at=refresh_token_expire,
-        )
-        db.add(new_refresh_token)
-        db.commit()
+        tokens = start_session(db, new_user.id)
         await send_onboard_email(new_user.email)
 
-        response.set_cookie(
-            key=f"refresh_token_{session_id}",
-            value=refresh_token,
-            httponly=True,
-            secure=True,
-            samesite="None",
-            path="/",
+        _set_refresh_cookie(response, tokens)
+        return Token(
+            access_token=tokens.access_token, token_type="bearer", session_id=tokens.session_id
         )
-        return Token(access_token=access_token, token_type="bearer",session_id=session_id)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -133,6 +115,7 @@ async def register(
 # Login user
 @router.post("/auth/login", response_model=Token)
 @limiter.limit("5/minute")
+@no_compression
 def login(
     user_login: UserLogin,
     db: Session = Depends(get_session),
@@ -155,51 +138,29 @@ def login(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
     try:
-        session_id = str(uuid4())
-        access_token = create_access_token(data={"sub": str(user.id)})
-        refresh_token = create_refresh_token(data={"sub": str(user.id)})
-        refresh_token_expire = datetime.now(timezone.utc) + timedelta(
-            minutes=REFRESH_TOKEN_EXPIRE_MINUTES
-        )
-        MAX_SESSIONS = 5
-        refresh_tokens = (
-            db.query(RefreshToken)
-            .filter(RefreshToken.user_id == user.id)
-            .order_by(RefreshToken.expires_at.asc())
-            .all()
-        )
-        if len(refresh_tokens) >= MAX_SESSIONS:
-            oldest_token = refresh_tokens[0]
-            db.delete(oldest_token)
-            db.commit()
-
-        # Store refresh token in RefreshToken table
-        new_refresh_token = RefreshToken(
-            user_id=user.id,
-            session_id=session_id,
-            refresh_token=refresh_token,
-            expires_at=refresh_token_expire,
-        )
-        db.add(new_refresh_token)
-        db.commit()
+        tokens = start_session(db, user.id)
 
-        response.set_cookie(
-            key=f"refresh_token_{session_id}",
-            value=refresh_token,
-            httponly=True,
-            secure=True,
-            samesite="None",
-            path="/",
+        _set_refresh_cookie(response, tokens)
+        return Token(
+            access_token=tokens.access_token, token_type="bearer", session_id=tokens.session_id
         )
-        return Token(access_token=access_token, token_type="bearer",session_id=session_id)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+# Public key other services use to verify access tokens (EdDSA/ES256 only)
+@router.get("/auth/jwks.json")
+def jwks():
+    return token_service.jwks()
+
+
 # Refresh token
 @router.post("/auth/refresh", response_model=Token)
 @limiter.limit("10/minute")
-def refresh_token(request: Request, db: Session = Depends(get_session)):
+@no_compression
+def refresh_token(
+    request: Request, response: Response, db: Session = Depends(get_session)
+):
     try:
         session_id=request.headers.get("X-Session-ID")
         if not session_id:
@@ -217,44 +178,17 @@ def refresh_token(request: Request, db: Session = Depends(get_session)):
 
         try:
             payload = decode_refresh_token(refresh_token)
-            user_id = payload.user_id
-            refresh_token_entry = (
-                db.query(RefreshToken)
-                .filter(
-                    RefreshToken.session_id==session_id,
-                    RefreshToken.refresh_token == refresh_token,
-                    RefreshToken.user_id == user_id,
-                )
-                .first()
-            )
-            if not refresh_token_entry:
+            tokens = rotate_session(db, session_id, refresh_token, payload)
+            if tokens is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid refresh token",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
-            if refresh_token_entry.expires_at.replace(tzinfo=timezone.utc) < datetime.now(
-                timezone.utc
-            ):
-                db.delete(refresh_token_entry)
-                db.commit()
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Refresh token expired",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            user = (
-                db.query(user_model.User)
-                .filter(user_model.User.id == user_id, user_model.User.is_active == True)
-                .first()
+            _set_refresh_cookie(response, tokens)
+            return Token(
+                access_token=tokens.access_token, token_type="bearer", session_id=session_id
             )
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-                )
-
-            access_token = create_access_token(data={"sub": str(user.id)})
-            return Token(access_token=access_token, token_type="bearer",session_id=session_id)
         except HTTPException as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -285,42 +219,11 @@ def logout(
             )
         refresh_token = request.cookies.get(f"refresh_token_{session_id}")
         payload = decode_refresh_token(refresh_token)
-        user_id = payload.user_id
-        isUser=(db.query(user_model.User).filter(user_model.User.id == user_id).first())
-
-        if not isUser:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid refresh token")
-
-        refresh_token_entry = (
-            db.query(RefreshToken)
-            .filter(
-                RefreshToken.session_id==session_id,
-                RefreshToken.refresh_token == refresh_token,
-                RefreshToken.user_id == user_id,
-            )
-            .first()
-        )
-        if not refresh_token_entry:
+        if not end_session(db, session_id, payload):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Session not found"
             )
 
-        if refresh_token_entry.expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
-            refresh_token_entry.refresh_token = None
-            refresh_token_entry.expires_at = None
-            db.commit()
-            response.delete_cookie(
-                key=f"refresh_token_{session_id}",
-                path="/",
-                httponly=True,
-                samesite="None",
-                secure=True,
-            )
-            return response
-
-        db.delete(refresh_token_entry)
-        db.commit()
-
         response = JSONResponse(content={"message": "Successfully logged out"})
         response.delete_cookie(
             key=f"refresh_token_{session_id}",
@@ -342,29 +245,35 @@ def logout(
 @limiter.limit("10/hour")
 async def forget_password(
     body: EmailRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_session),
     request: Request = None,
     response: Response = None,
 ):
 
     try:
-        user = (
-            db.query(user_model.User)
+        user_id = (
+            db.query(user_model.User.id)
             .filter(user_model.User.email == body.email)
-            .first()
+            .scalar()
         )
-        if not user:
+        if not user_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
-        otp = f"{random.randint(100000,999999)}"
-        user.otp_codes = otp
-        user.opt_expires = datetime.now(timezone.utc) + timedelta(minutes=15)
-        db.commit()
+        otp = issue_otp(db, user_id)
+        if otp is None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many OTP requests or failed attempts, please wait before requesting another",
+            )
         await send_otp_email(body.email, otp)
+        background_tasks.add_task(purge_expired_otps, max_batches=1)
         return {"msg": "OTP send to your email"}
     except HTTPException as e:
+        if e.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            raise e
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Unable to send OTP email"
         )
@@ -378,26 +287,22 @@ def reset_password(
     response: Response = None,
 ):
     try:
-        user = (
-            db.query(user_model.User)
+        user_id = (
+            db.query(user_model.User.id)
             .filter(user_model.User.email == request.email)
-            .first()
+            .scalar()
         )
-        if (
-            not user
-            or user.otp_codes != request.otp
-            or user.opt_expires.replace(tzinfo=timezone.utc)
-            < datetime.now(timezone.utc)
-        ):
+        if not user_id or not consume_otp(db, user_id, request.otp):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid OTP Code",
             )
 
-
-        user.hashed_password = hash_password(request.password)
-        user.otp_codes = None
-        user.opt_expires = None
+        db.execute(
+            update(user_model.User)
+            .where(user_model.User.id == user_id)
+            .values(hashed_password=hash_password(request.password))
+        )
         db.commit()
         return {"msg": "Password Reset Successful"}
     except HTTPException as e:
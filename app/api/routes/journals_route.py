@@ -1,24 +1,57 @@
-from fastapi import HTTPException, Depends, status, APIRouter, Request
-from sqlalchemy.orm import Session, joinedload
-from app.services.db import get_session
-from app.dependencies.auth import get_current_userId
-from app.schemas import journals_schema, affirmations_schema
+from fastapi import HTTPException, Depends, status, APIRouter, Request, BackgroundTasks, Query
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.services.db import get_session, SessionLocal, ReadSession, release_connection
+from app.dependencies.auth import get_current_userId, get_user_read_session
+from app.schemas import journals_schema, affirmations_schema, import_job_schema
 from app.models.journals import (
     JournalBase,
     JournalReponse,
     AllJournalsAndAffirmations,
     JournalDeleteRequest,
     JournalUpdateRequest,
+    JournalBatchDeleteRequest,
+    JournalBatchUpdateRequest,
+    JournalBatchResponse,
     SentimentDataResponse,
-    SentimentDataRequest,
+    ImportJobStatus,
 )
-from typing import List
+from typing import Callable, List, Literal, Optional
+from uuid import UUID
 from app.models.auth import UserId
-from datetime import datetime
-from sqlalchemy import desc
+from app.models.analytics import MoodTrendsResponse
+from datetime import date, datetime
+from pydantic import TypeAdapter
 import json
-from app.utils.affirmations_utils import analyze_sentiments, generate_affirmations
-from app.utils.encryption_utils import encrypt_data, decrypt_data
+import logging
+from difflib import SequenceMatcher
+from app.utils.affirmations_utils import (
+    analyze_sentiments,
+    generate_affirmations,
+    stream_affirmations,
+)
+from app.utils.local_sentiment_utils import analyze_sentiments_locally
+from app.services.llm_quota import usage as llm_usage
+from app.services.journal_import import import_batch
+from app.services.journal_enrichment import enrich_pending_journals, has_pending_journals
+from app.utils.import_utils import iter_import_records
+from app.services.journal_export import stream_ndjson, stream_csv, stream_zip
+from app.services.search_index import reindex_journal, search_journal_ids
+from app.services.response_cache import response_cache, make_etag, etag_matches
+from app.services.journal_version import bump_journal_version, ensure_read_version
+from app.services.journal_reads import (
+    decrypt_affirmation_list,
+    load_journal_views,
+    load_sentiment_points,
+)
+from app.services.journal_batch import delete_journals, update_journals
+from app.services.journal_writes import insert_journal
+from app.services.mood_analytics import compute_mood_trends, load_mood_series
+from app.utils.metrics_utils import increment
+from app.utils.json_utils import FastJSONResponse, serialize
+from app.core.config import IMPORT_BATCH_SIZE, SENTIMENT_REUSE_SIMILARITY
+from app.utils.encryption_utils import encrypt_data, decrypt_data, content_fingerprint
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
@@ -32,15 +65,31 @@ def custom_key_func(request: Request):
 
 
 limiter = Limiter(key_func=custom_key_func)
+logger = logging.getLogger(__name__)
 
 # Define FastAPI router
 router = APIRouter()
 
 
+def _analyze_for_user(content: str, user_id: UUID):
+    """
+    Run sentiment analysis for a user, falling back to the local analyzer when
+    they are over their daily LLM quota.
+
+    Returns:
+        (SentimentResult, bool): The sentiment and whether the LLM may be
+        used for the rest of the request (affirmations).
+    """
+    if not llm_usage.within_budget(user_id):
+        return analyze_sentiments_locally(content), False
+    return analyze_sentiments(content, user_id=user_id), True
+
+
 @router.post("/add_journal", response_model=JournalReponse)
 @limiter.limit("8/minute")
 def add_journal(
     journal_input: JournalBase,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_session),
     user: UserId = Depends(get_current_userId),
     request: Request = None,
@@ -56,109 +105,360 @@ def add_journal(
             detail="Journal content cannot be empty",
         )
 
+    # The auth lookup is done; return its connection to the pool so none is
+    # held while waiting on Gemini
+    release_connection(db)
+
     try:
-        sentiment_json = analyze_sentiments(journal_content)
-        if (
-            not isinstance(sentiment_json, dict)
-            or "label" not in sentiment_json
-            or "probability" not in sentiment_json
-        ):
-            raise ValueError("Invalid sentiment analysis response")
-        label = sentiment_json["label"]
-        probability = float(sentiment_json["probability"])
-    except (json.JSONDecodeError, ValueError):
+        sentiment, use_llm = _analyze_for_user(journal_content, user.id)
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Invalid sentiment analysis format from Gemini.",
         )
-    encrypted_title = encrypt_data(journal_title)
-    encrypted_content = encrypt_data(journal_content)
-    new_journal = journals_schema.Journal(
-        title=encrypted_title,
-        content=encrypted_content,
-        user_id=user.id,
-        sentiment_label=label,
-        sentiment_score=round(probability, 2),
-        created_at=journal_time,
 
-    )
+    affirmations = None
+    if use_llm and sentiment.label.lower() in ["negative", "neg"]:
+        try:
+            affirmations = generate_affirmations(journal_content, user_id=user.id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Invalid affirmation response format from Gemini.",
+            )
 
+    # One transaction, one commit, no refresh
     try:
-        db.add(new_journal)
+        _, created_at = insert_journal(
+            db,
+            user.id,
+            journal_title,
+            journal_content,
+            sentiment,
+            affirmations,
+            journal_time,
+        )
         db.commit()
-        db.refresh(new_journal)
-        if label.lower() in ["negative", "neg"]:
-            affirmations = generate_affirmations(journal_content)
-            try:
-                affirmations_json = json.dumps(affirmations["affirmations"], indent=2)
-                input_summary = affirmations["input_summary"]
-                encrypted_input_summary = encrypt_data(input_summary)
-                encrypted_affirmations = encrypt_data(affirmations_json)
-                add_affirmation = affirmations_schema.Affirmation(
-                    input_summary=encrypted_input_summary,
-                    affirmations=encrypted_affirmations,
-                    journal_id=new_journal.id,
-                )
-                db.add(add_affirmation)
-                db.commit()
-                db.refresh(add_affirmation)
-            except (json.JSONDecodeError, KeyError):
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Invalid affirmation response format from Gemini.",
-                )
     except Exception as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error in writing data to db: {str(e)}",
         )
 
+    # Retry imported entries an earlier enrichment left pending (over quota
+    # or a bad LLM answer) now that the user is within budget again
+    if use_llm and has_pending_journals(db, user.id):
+        background_tasks.add_task(enrich_pending_journals, user.id)
+
     return JournalReponse(
         title=journal_title,
         content=journal_content,
-        created_at=journal_time,
-        affirmations=json.loads(affirmations_json) if affirmations_json else [],
+        created_at=created_at,
+        affirmations=affirmations.affirmations if affirmations else [],
+    )
+
+
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _journal_event_stream(journal_input: JournalBase, user_id: UUID):
+    """
+    Server-Sent Events for /add_journal/stream: the sentiment as soon as it is
+    known, each affirmation as it completes, then the saved journal.
+    Nothing is written until the model is done, and the DB session is only
+    opened for the final insert.
+    """
+    journal_title = journal_input.title
+    journal_content = journal_input.content
+    journal_time = journal_input.created_at
+
+    try:
+        sentiment, use_llm = _analyze_for_user(journal_content, user_id)
+    except ValueError:
+        yield _sse_event(
+            "error", {"detail": "Invalid sentiment analysis format from Gemini."}
+        )
+        return
+    except Exception:
+        # Provider errors, timeouts and quota errors would otherwise end the
+        # stream without telling the client why. The provider's message is
+        # only logged, never sent
+        logger.exception("Sentiment analysis failed mid-stream")
+        yield _sse_event("error", {"detail": "Sentiment analysis failed."})
+        return
+    label = sentiment.label
+    probability = round(sentiment.probability, 2)
+    yield _sse_event("sentiment", {"label": label, "probability": probability})
+
+    affirmations = None
+    if use_llm and label.lower() in ["negative", "neg"]:
+        try:
+            for kind, payload in stream_affirmations(journal_content, user_id=user_id):
+                if kind == "affirmation":
+                    yield _sse_event("affirmation", {"text": payload})
+                else:
+                    affirmations = payload
+        except ValueError:
+            yield _sse_event(
+                "error", {"detail": "Invalid affirmation response format from Gemini."}
+            )
+            return
+        except Exception:
+            logger.exception("Affirmation generation failed mid-stream")
+            yield _sse_event("error", {"detail": "Affirmation generation failed."})
+            return
+
+    db = SessionLocal()
+    try:
+        journal_id, created_at = insert_journal(
+            db,
+            user_id,
+            journal_title,
+            journal_content,
+            sentiment,
+            affirmations,
+            journal_time,
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Writing a streamed journal failed")
+        yield _sse_event("error", {"detail": "Error in writing data to db."})
+        return
+    finally:
+        db.close()
+
+    yield _sse_event(
+        "done",
+        {
+            "id": str(journal_id),
+            **JournalReponse(
+                title=journal_title,
+                content=journal_content,
+                created_at=created_at,
+                affirmations=affirmations.affirmations if affirmations else [],
+            ).model_dump(mode="json"),
+        },
+    )
+
+
+@router.post("/add_journal/stream")
+@limiter.limit("8/minute")
+def add_journal_stream(
+    journal_input: JournalBase,
+    db: Session = Depends(get_session),
+    user: UserId = Depends(get_current_userId),
+    request: Request = None,
+):
+    if not journal_input.content.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Journal content cannot be empty",
+        )
+    # The request's session lives until the stream ends; don't let the auth
+    # lookup's connection sit idle for the whole stream
+    release_connection(db)
+    return StreamingResponse(
+        _journal_event_stream(journal_input, user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+def _save_import_job(db: Session, job, **values) -> ImportJobStatus:
+    # Runs in the threadpool: the commit expires the job, and reading it back
+    # on the event loop would block it on a lazy SELECT
+    for name, value in values.items():
+        setattr(job, name, value)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return ImportJobStatus.model_validate(job)
+
+
+def _fail_import_job(db: Session, job, error: Exception) -> str:
+    saved = _save_import_job(db, job, status="failed", error=str(error))
+    return f"Import failed after {saved.rows_imported} rows: {str(error)}"
+
+
+@router.post(
+    "/import_journals",
+    response_model=ImportJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+@limiter.limit("5/hour")
+async def import_journals(
+    background_tasks: BackgroundTasks,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    currentUser: UserId = Depends(get_current_userId),
+    db: Session = Depends(get_session),
+    request: Request = None,
+):
+    """
+    Import journal entries from a streamed NDJSON or CSV body (fields: title,
+    content, created_at). Rows are validated and inserted as they arrive, in
+    chunked transactions; sentiment enrichment runs afterwards in batches.
+    """
+    job = import_job_schema.ImportJob(
+        user_id=currentUser.id,
+        format=format,
+        status="receiving",
+        rows_received=0,
+        rows_imported=0,
+        rows_failed=0,
+        rows_enriched=0,
+    )
+    await run_in_threadpool(_save_import_job, db, job)
+
+    batch = []
+    try:
+        async for record in iter_import_records(request.stream(), format):
+            batch.append(record)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await run_in_threadpool(import_batch, db, job, currentUser.id, batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(import_batch, db, job, currentUser.id, batch)
+    except Exception as e:
+        detail = await run_in_threadpool(_fail_import_job, db, job, e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    saved = await run_in_threadpool(_save_import_job, db, job, status="enriching")
+    background_tasks.add_task(enrich_pending_journals, currentUser.id, saved.id)
+    return saved
+
+
+@router.get("/import_journals/{job_id}", response_model=ImportJobStatus)
+@limiter.limit("30/minute")
+def get_import_status(
+    job_id: UUID,
+    currentUser: UserId = Depends(get_current_userId),
+    db: Session = Depends(get_session),
+    request: Request = None,
+):
+    ImportJob = import_job_schema.ImportJob
+    job = (
+        db.query(
+            ImportJob.id,
+            ImportJob.format,
+            ImportJob.status,
+            ImportJob.rows_received,
+            ImportJob.rows_imported,
+            ImportJob.rows_failed,
+            ImportJob.rows_enriched,
+            ImportJob.rows_pending,
+            ImportJob.error,
+            ImportJob.created_at,
+            ImportJob.finished_at,
+        )
+        .filter(ImportJob.id == job_id, ImportJob.user_id == currentUser.id)
+        .first()
+    )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found"
+        )
+    return ImportJobStatus.model_validate(job)
+
+
+journal_list_adapter = TypeAdapter(List[AllJournalsAndAffirmations])
+sentiment_overview_adapter = TypeAdapter(SentimentDataResponse)
+mood_trends_adapter = TypeAdapter(MoodTrendsResponse)
+
+
+def _cached_json_response(
+    request: Request, user: UserId, query: str, build: Callable[[], bytes]
+) -> Response:
+    """
+    Serve a per-user JSON body tagged with the user's journals_version, which
+    was loaded with the user row during authentication. A matching
+    If-None-Match is answered with a 304 before any journal is queried or
+    decrypted; otherwise the body comes from the response cache, or is built
+    and cached on a miss.
+    """
+    etag = make_etag(user.id, query, user.journals_version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        increment("conditional.not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = response_cache.get(user.id, query, user.journals_version)
+    if body is None:
+        body = build()
+        response_cache.put(user.id, query, user.journals_version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/get_all_journals", response_model=List[AllJournalsAndAffirmations])
 @limiter.limit("20/minute")
 def fetch_all_journals(
     currentUser: UserId = Depends(get_current_userId),
-    db: Session = Depends(get_session),
+    db: ReadSession = Depends(get_user_read_session),
     request: Request = None,
 ):
     try:
-        all_journals = (
-            db.query(journals_schema.Journal)
-            .filter(currentUser.id == journals_schema.Journal.user_id)
-            .options(joinedload(journals_schema.Journal.affirmations))
-            .order_by(desc(journals_schema.Journal.created_at))
-            .all()
+        return _cached_json_response(
+            request,
+            currentUser,
+            "get_all_journals",
+            lambda: _build_all_journals(db, currentUser),
         )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        decrypted_journals = []
 
-        for journal in all_journals:
+def _build_all_journals(db: ReadSession, user: UserId) -> bytes:
+    ensure_read_version(db, user.id, user.journals_version)
+    return serialize(load_journal_views(db, user.id), journal_list_adapter)
 
-            journal.title = decrypt_data(journal.title)
-            journal.content = decrypt_data(journal.content)
 
-            for affirmation in journal.affirmations:
+EXPORT_FORMATS = {
+    "ndjson": (stream_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (stream_csv, "text/csv; charset=utf-8", "csv"),
+    "zip": (stream_zip, "application/zip", "zip"),
+}
 
-                if affirmation.input_summary:
-                    affirmation.input_summary = decrypt_data(affirmation.input_summary)
 
-                if affirmation.affirmations:
-                    decrypted_affirmations = decrypt_data(affirmation.affirmations)
-                    try:
-                        affirmation.affirmations = json.loads(decrypted_affirmations)
-                    except json.JSONDecodeError:
-                        affirmation.affirmations = []
+@router.get("/export_journals")
+@limiter.limit("5/minute")
+def export_journals(
+    format: Literal["ndjson", "csv", "zip"] = "ndjson",
+    currentUser: UserId = Depends(get_current_userId),
+    request: Request = None,
+):
+    stream, media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream(currentUser.id),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="feellog-export.{extension}"'
+        },
+    )
 
-            decrypted_journals.append(journal)
 
-        return decrypted_journals
+@router.get(
+    "/search_journals",
+    response_model=List[AllJournalsAndAffirmations],
+    response_class=FastJSONResponse,
+)
+@limiter.limit("30/minute")
+def search_journals(
+    q: str = Query(..., min_length=1, max_length=200),
+    currentUser: UserId = Depends(get_current_userId),
+    db: Session = Depends(get_session),
+    request: Request = None,
+):
+    try:
+        journal_ids = search_journal_ids(db, currentUser.id, q)
+        if not journal_ids:
+            return FastJSONResponse([])
+        # Only the matching rows are decrypted
+        return FastJSONResponse(
+            load_journal_views(
+                db, currentUser.id, journals_schema.Journal.id.in_(journal_ids)
+            )
+        )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -178,12 +478,46 @@ def delete_journal(
             )
             .delete()
         )
+        if result:
+            bump_journal_version(db, currentUser.id)
         db.commit()
         return {"message": "Journal deleted successfully", "deleted": result}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/delete_journals", response_model=JournalBatchResponse)
+@limiter.limit("10/minute")
+def delete_journals_batch(
+    payload: JournalBatchDeleteRequest,
+    currentUser: UserId = Depends(get_current_userId),
+    db: Session = Depends(get_session),
+    request: Request = None,
+):
+    try:
+        return JournalBatchResponse(
+            results=delete_journals(db, currentUser.id, payload.journal_ids)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.put("/update_journals", response_model=JournalBatchResponse)
+@limiter.limit("10/minute")
+def update_journals_batch(
+    payload: JournalBatchUpdateRequest,
+    currentUser: UserId = Depends(get_current_userId),
+    db: Session = Depends(get_session),
+    request: Request = None,
+):
+    try:
+        return JournalBatchResponse(
+            results=update_journals(db, currentUser.id, payload.items)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.put("/update_journal", response_model=JournalReponse)
 def update_journal(
     request: JournalUpdateRequest,
@@ -201,24 +535,6 @@ def update_journal(
                 detail="Journal content cannot be empty",
             )
 
-        sentiment = analyze_sentiments(journal_content)
-        try:
-            if (
-                not isinstance(sentiment, dict)
-                or "label" not in sentiment
-                or "probability" not in sentiment
-            ):
-                raise ValueError("Invalid sentiment analysis response")
-            label = sentiment["label"]
-            probability = float(sentiment["probability"])
-        except (json.JSONDecodeError, ValueError):
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Invalid sentiment analysis format from Gemini.",
-            )
-
-        affirmations_json = None
-
         journal = (
             db.query(journals_schema.Journal)
             .filter(
@@ -233,58 +549,128 @@ def update_journal(
                 detail="Journal not found or not owned by user",
             )
 
-        # Encrypt updated data
-        journal.title = encrypt_data(journal_title)
-        journal.content = encrypt_data(journal_content)
-        journal.sentiment_label = label
-        journal.sentiment_score = round(probability, 2)
-        journal.created_at=journal_time
+        # Diff against what is stored so only changed columns are
+        # re-encrypted and the LLM only sees material content changes
+        old_content = None
+        fingerprint = content_fingerprint(journal_content, currentUser.id)
+        stored_fingerprint = journal.content_fingerprint
+        if stored_fingerprint is None:
+            old_content = decrypt_data(journal.content, currentUser.id)
+            stored_fingerprint = content_fingerprint(old_content, currentUser.id)
+        content_changed = fingerprint != stored_fingerprint
+        if not content_changed and old_content is None:
+            # Same normalized text; only spacing may differ
+            old_content = decrypt_data(journal.content, currentUser.id)
+        text_changed = content_changed or old_content != journal_content
+        title_changed = decrypt_data(journal.title, currentUser.id) != journal_title
+
+        reanalyze = content_changed
+        if content_changed and SENTIMENT_REUSE_SIMILARITY > 0:
+            if old_content is None:
+                old_content = decrypt_data(journal.content, currentUser.id)
+            similarity = SequenceMatcher(
+                None, old_content.split(), journal_content.split()
+            ).ratio()
+            reanalyze = similarity < SENTIMENT_REUSE_SIMILARITY
+
+        if title_changed:
+            journal.title = encrypt_data(journal_title, currentUser.id)
+        if text_changed:
+            journal.content = encrypt_data(journal_content, currentUser.id)
+        if journal.content_fingerprint != fingerprint:
+            journal.content_fingerprint = fingerprint
+        if journal_time is not None:
+            journal.created_at = journal_time
+        if title_changed or content_changed:
+            reindex_journal(db, currentUser.id, journal.id, journal_title, journal_content)
 
-        if label.lower() in ["negative", "neg"]:
-            affirmations = generate_affirmations(journal_content)
+        affirmations_json = None
+        if reanalyze:
+            increment("update_journal.reanalyzed")
             try:
-                affirmations_json = json.dumps(affirmations["affirmations"], indent=2)
-                input_summary = affirmations["input_summary"]
-
-                # Encrypt affirmation data
-                encrypted_input_summary = encrypt_data(input_summary)
-                encrypted_affirmations = encrypt_data(affirmations_json)
-
-                affirmation_entry = (
-                    db.query(affirmations_schema.Affirmation)
-                    .filter(
-                        affirmations_schema.Affirmation.journal_id == request.journal_id
-                    )
-                    .first()
-                )
-                if affirmation_entry:
-                    affirmation_entry.input_summary = encrypted_input_summary
-                    affirmation_entry.affirmations = encrypted_affirmations
-                else:
-                    new_affirmation = affirmations_schema.Affirmation(
-                        input_summary=encrypted_input_summary,
-                        affirmations=encrypted_affirmations,
-                        journal_id=request.journal_id,
-                    )
-                    db.add(new_affirmation)
-                db.commit()
-            except (json.JSONDecodeError, KeyError):
+                sentiment, use_llm = _analyze_for_user(journal_content, currentUser.id)
+                label = sentiment.label
+                probability = sentiment.probability
+            except ValueError:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Invalid affirmation response format from Gemini.",
+                    detail="Invalid sentiment analysis format from Gemini.",
                 )
+            journal.sentiment_label = label
+            journal.sentiment_score = round(probability, 2)
+
+            if use_llm and label.lower() in ["negative", "neg"]:
+                try:
+                    affirmations = generate_affirmations(
+                        journal_content, user_id=currentUser.id
+                    )
+                    affirmations_json = json.dumps(affirmations.affirmations, indent=2)
+                    input_summary = affirmations.input_summary
+
+                    # Encrypt affirmation data
+                    encrypted_input_summary = encrypt_data(input_summary, currentUser.id)
+                    encrypted_affirmations = encrypt_data(affirmations_json, currentUser.id)
+
+                    affirmation_entry = (
+                        db.query(affirmations_schema.Affirmation)
+                        .filter(
+                            affirmations_schema.Affirmation.journal_id == request.journal_id,
+                            affirmations_schema.Affirmation.user_id == currentUser.id,
+                        )
+                        .first()
+                    )
+                    if affirmation_entry:
+                        affirmation_entry.input_summary = encrypted_input_summary
+                        affirmation_entry.affirmations = encrypted_affirmations
+                    else:
+                        new_affirmation = affirmations_schema.Affirmation(
+                            input_summary=encrypted_input_summary,
+                            affirmations=encrypted_affirmations,
+                            journal_id=request.journal_id,
+                            user_id=currentUser.id,
+                        )
+                        db.add(new_affirmation)
+                except ValueError:
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="Invalid affirmation response format from Gemini.",
+                    )
+            elif label.lower() not in ["negative", "neg"]:
+                # Delete affirmations if sentiment is not negative
+                db.query(affirmations_schema.Affirmation).filter(
+                    affirmations_schema.Affirmation.journal_id == request.journal_id,
+                    affirmations_schema.Affirmation.user_id == currentUser.id,
+                ).delete()
+            # Over the LLM quota and still negative: keep the existing affirmations
         else:
-            # Delete affirmations if sentiment is not negative
-            db.query(affirmations_schema.Affirmation).filter(
-                affirmations_schema.Affirmation.journal_id == request.journal_id
-            ).delete()
+            increment("update_journal.reanalysis_skipped")
+
+        if reanalyze or db.is_modified(journal):
+            bump_journal_version(db, currentUser.id)
             db.commit()
 
+        if affirmations_json:
+            current_affirmations = json.loads(affirmations_json)
+        else:
+            stored = (
+                db.query(affirmations_schema.Affirmation.affirmations)
+                .filter(
+                    affirmations_schema.Affirmation.journal_id == request.journal_id,
+                    affirmations_schema.Affirmation.user_id == currentUser.id,
+                )
+                .first()
+            )
+            current_affirmations = (
+                decrypt_affirmation_list(stored.affirmations, currentUser.id)
+                if stored
+                else []
+            )
+
         return JournalReponse(
             title=journal_title,
             content=journal_content,
-            created_at=journal_time,
-            affirmations=json.loads(affirmations_json) if affirmations_json else [],
+            created_at=journal.created_at,
+            affirmations=current_affirmations,
         )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -294,7 +680,7 @@ def update_journal(
 @limiter.limit("8/minute")
 def get_sentiment_overview(
     currentUser: UserId = Depends(get_current_userId),
-    db: Session = Depends(get_session),
+    db: ReadSession = Depends(get_user_read_session),
     request: Request = None,
 ):
     try:
@@ -302,30 +688,57 @@ def get_sentiment_overview(
         if not currentUser:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-        journal_entries = (
-            db.query(journals_schema.Journal)
-            .filter(journals_schema.Journal.user_id == currentUser.id)
-            .order_by(journals_schema.Journal.created_at.asc())
-            .all()
+        return _cached_json_response(
+            request,
+            currentUser,
+            "get_sentiment_overview",
+            lambda: _build_sentiment_overview(db, currentUser),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Error in processing request",
         )
 
-        if not journal_entries:
-            return SentimentDataResponse(data=[])
 
-        response_data = [
-            SentimentDataRequest(
-                entry_id=entry.id,
-                title=decrypt_data(entry.title),  # Decrypt title
-                timestamp=entry.created_at,
-                sentiment_label=entry.sentiment_label,
-                sentiment_score=entry.sentiment_score,
-            )
-            for entry in journal_entries
-        ]
+def _build_sentiment_overview(db: ReadSession, user: UserId) -> bytes:
+    ensure_read_version(db, user.id, user.journals_version)
+    return serialize(
+        {"data": load_sentiment_points(db, user.id)}, sentiment_overview_adapter
+    )
 
-        return SentimentDataResponse(data=response_data)
-    except Exception as e:
+
+@router.get("/mood_trends", response_model=MoodTrendsResponse)
+@limiter.limit("20/minute")
+def get_mood_trends(
+    start: Optional[date] = Query(None, description="First local date, inclusive"),
+    end: Optional[date] = Query(None, description="Last local date, inclusive"),
+    utc_offset: int = Query(
+        0, ge=-840, le=840, description="Minutes east of UTC, for local dates and hours"
+    ),
+    currentUser: UserId = Depends(get_current_userId),
+    db: ReadSession = Depends(get_user_read_session),
+    request: Request = None,
+):
+    if start is not None and end is not None and start > end:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error in processing request",
+            detail="start must not be after end",
+        )
+    try:
+        return _cached_json_response(
+            request,
+            currentUser,
+            f"mood_trends:{start}:{end}:{utc_offset}",
+            lambda: _build_mood_trends(db, currentUser, start, end, utc_offset),
         )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _build_mood_trends(
+    db: ReadSession, user: UserId, start: Optional[date], end: Optional[date], utc_offset: int
+) -> bytes:
+    ensure_read_version(db, user.id, user.journals_version)
+    series = load_mood_series(db, user.id, start, end, utc_offset)
+    return serialize(compute_mood_trends(series, start, end), mood_trends_adapter)
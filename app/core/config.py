@@ -7,14 +7,127 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 REFRESH_TOKEN_EXPIRE_MINUTES = int(eval(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES")))
+# Asymmetric token signing (ALGORITHM=EdDSA or ES256): PEM keys, "\n" escapes
+# allowed. The public key is derived from the private one when unset and is
+# published at /api/auth/jwks.json, so other services can verify tokens
+# without SECRET_KEY. JWT_KEY_ID is sent as the "kid" header
+JWT_PRIVATE_KEY = os.getenv("JWT_PRIVATE_KEY")
+JWT_PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY")
+JWT_KEY_ID = os.getenv("JWT_KEY_ID")
+# Verified tokens remembered per worker, so repeat requests skip the
+# signature check
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+# Refresh tokens rotate on every use. Reusing an old one revokes its whole
+# session, unless it was rotated less than this many seconds ago (two tabs
+# refreshing at once); that request is only refused
+REFRESH_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "10"))
+# Each worker reloads revoked sessions from the DB this often, into a bloom
+# filter sized for TOKEN_REVOCATION_CAPACITY of them
+TOKEN_REVOCATION_SYNC_SECONDS = int(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "30"))
+TOKEN_REVOCATION_CAPACITY = int(os.getenv("TOKEN_REVOCATION_CAPACITY", "10000"))
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Comma-separated read replica URLs for read-only endpoints; empty sends
+# every read to DATABASE_URL
+READ_REPLICA_URLS = [
+    url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()
+]
+# Seconds between health probes of a replica, and how long a failed one
+# is skipped
+READ_REPLICA_HEALTH_INTERVAL = float(os.getenv("READ_REPLICA_HEALTH_INTERVAL", "10"))
+# After a journal write, the user's reads go to the primary for this long
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Connections per worker process: DB_POOL_SIZE kept open, up to
+# DB_MAX_OVERFLOW more under load
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Threads per worker for sync endpoints. Defaults to the pool's capacity, so
+# requests queue for a thread instead of timing out waiting for a connection
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+# Server launched with `python server.py`; 0 workers means one per available CPU
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# Keep idle connections open longer than the load balancer does
+SERVER_KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Seconds shutdown waits for in-flight requests, then again for Gemini calls
+# and email sends still running
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 FERNET_KEY = os.getenv("FERNET_KEY")
+# Master keys that wrap per-user data keys, as "id:fernet_key" pairs separated
+# by commas; the first one wraps new keys. Defaults to FERNET_KEY.
+MASTER_KEYS = os.getenv("MASTER_KEYS")
+DATA_KEY_CACHE_SIZE = int(os.getenv("DATA_KEY_CACHE_SIZE", "1024"))
+DATA_KEY_CACHE_TTL = int(os.getenv("DATA_KEY_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+# HTTP response compression: bodies smaller than the minimum size are sent
+# as-is; encodings are tried in order (br and zstd need their packages)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+RESPONSE_COMPRESSION_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+RESPONSE_ZSTD_LEVEL = int(os.getenv("RESPONSE_ZSTD_LEVEL", "3"))
+RESPONSE_COMPRESSION_ENCODINGS = os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "br,zstd,gzip")
+# Encode journal list, overview, search and stats responses straight from
+# DB rows without validating them against the response model
+SKIP_RESPONSE_VALIDATION = os.getenv("SKIP_RESPONSE_VALIDATION", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Plaintext at least this many bytes long is compressed before encryption
+COMPRESS_THRESHOLD = int(os.getenv("COMPRESS_THRESHOLD", "512"))
+# Key for keyed hashes of plaintext (search tokens); derived from
+# FERNET_KEY when not set
+BLIND_INDEX_KEY = os.getenv("BLIND_INDEX_KEY")
 EMAIL = os.getenv("EMAIL")
 PORT = os.getenv("PORT")
 APP_PASSWORD = os.getenv("APP_PASSWORD")
+# Approximate token budget for journal text embedded in a single LLM prompt
+LLM_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "2000"))
+# Daily Gemini token budget per user (0 disables the quota)
+LLM_DAILY_TOKEN_BUDGET = int(os.getenv("LLM_DAILY_TOKEN_BUDGET", "200000"))
+# Usage counters are flushed to the DB after this many users or seconds
+LLM_USAGE_FLUSH_BATCH = int(os.getenv("LLM_USAGE_FLUSH_BATCH", "50"))
+LLM_USAGE_FLUSH_INTERVAL = int(os.getenv("LLM_USAGE_FLUSH_INTERVAL", "30"))
+# Rows per transaction for bulk imports, and entries per LLM enrichment call
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+ENRICHMENT_BATCH_SIZE = int(os.getenv("ENRICHMENT_BATCH_SIZE", "20"))
+# Content edits at least this similar (0-1, by words) to the previous text
+# keep the previous sentiment and affirmations; 0 disables the reuse
+SENTIMENT_REUSE_SIMILARITY = float(os.getenv("SENTIMENT_REUSE_SIMILARITY", "0"))
+# Mood trend analytics: EWMA span in days with entries, and a change point
+# is flagged when the mean of MOOD_CHANGE_WINDOW such days moves from the
+# mean of the previous window by at least MOOD_CHANGE_THRESHOLD standard
+# errors
+MOOD_EWMA_SPAN = int(os.getenv("MOOD_EWMA_SPAN", "7"))
+MOOD_CHANGE_WINDOW = int(os.getenv("MOOD_CHANGE_WINDOW", "7"))
+MOOD_CHANGE_THRESHOLD = float(os.getenv("MOOD_CHANGE_THRESHOLD", "3"))
+# Most journals a single batch delete or update request may touch
+JOURNAL_BATCH_MAX_ITEMS = int(os.getenv("JOURNAL_BATCH_MAX_ITEMS", "50"))
+# Rows fetched and decrypted per round-trip when streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "200"))
+# Operations stats: accounts allowed to read /api/admin/stats (comma-separated
+# emails), rows read per aggregation batch, and how far behind now() the job
+# stops, so rows from transactions still open are not skipped
+ADMIN_EMAILS = [
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+]
+AGGREGATION_BATCH_SIZE = int(os.getenv("AGGREGATION_BATCH_SIZE", "5000"))
+AGGREGATION_LAG_SECONDS = int(os.getenv("AGGREGATION_LAG_SECONDS", "300"))
+# Password reset codes: lifetime, failed checks allowed per code, failed
+# checks allowed per account across codes within the failure window (codes
+# can be neither issued nor checked past it), minimum seconds between codes
+# for one account, and rows deleted per purge batch
+OTP_TTL_MINUTES = int(os.getenv("OTP_TTL_MINUTES", "15"))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+OTP_MAX_FAILURES = int(os.getenv("OTP_MAX_FAILURES", "10"))
+OTP_FAILURE_WINDOW_MINUTES = int(os.getenv("OTP_FAILURE_WINDOW_MINUTES", "60"))
+OTP_RESEND_SECONDS = int(os.getenv("OTP_RESEND_SECONDS", "60"))
+OTP_PURGE_BATCH_SIZE = int(os.getenv("OTP_PURGE_BATCH_SIZE", "1000"))
 # Check if the environment variables are set
-if not SECRET_KEY or not ALGORITHM:
+if not (SECRET_KEY or JWT_PRIVATE_KEY) or not ALGORITHM:
     raise ValueError(
-        "SECRET_KEY and ALGORITHM must be set in the environment variables."
+        "SECRET_KEY (or JWT_PRIVATE_KEY) and ALGORITHM must be set in the environment variables."
     )
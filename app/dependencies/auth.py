@@ -1,17 +1,18 @@
 from app.models.auth import UserId
-from app.services.db import get_session
+from app.services.db import ReadSession, get_read_session, get_session, release_connection
 from app.utils.tokens_utils import decode_access_token
 from sqlalchemy.orm import Session
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
 from app.schemas import user_schema
 from app.models.auth import UserProfile
+from app.core.config import ADMIN_EMAILS
 
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def get_user_profile(
-    token: str = Depends(oauth2_schema), db: Session = Depends(get_session)
+    token: str = Depends(oauth2_schema), db: ReadSession = Depends(get_read_session)
 ) -> UserProfile:
     try:
         token_data = decode_access_token(token)
@@ -21,14 +22,20 @@ def get_user_profile(
                 detail="Invalid Token type",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        user = (
-            db.query(user_schema.User)
-            .filter(
-                user_schema.User.id == token_data.user_id,
-                user_schema.User.is_active == True,
-            )
-            .first()
+        db.info["user_id"] = token_data.user_id
+        query = db.query(
+            user_schema.User.email,
+            user_schema.User.full_name,
+            user_schema.User.profile_photo,
+        ).filter(
+            user_schema.User.id == token_data.user_id,
+            user_schema.User.is_active == True,
         )
+        user = query.first()
+        if user is None and db.uses_replica():
+            # A user who just registered may not have reached the replica yet
+            db.use_primary()
+            user = query.first()
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,8 +63,9 @@ def get_current_userId(
                 detail="Invalid Token Type",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        # Column-only select: the user row is not added to the session
         user = (
-            db.query(user_schema.User)
+            db.query(user_schema.User.id, user_schema.User.journals_version)
             .filter(
                 user_schema.User.id == token_data.user_id,
                 user_schema.User.is_active == True,
@@ -78,3 +86,36 @@ def get_current_userId(
             detail=f"Invalid or expired token: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+def get_user_read_session(
+    current_user: UserId = Depends(get_current_userId),
+    db: ReadSession = Depends(get_read_session),
+    primary: Session = Depends(get_session),
+) -> ReadSession:
+    """
+    Read-only session for the current user's data, routed to a replica
+    unless the user wrote recently. The primary session used for
+    authentication is the same one (dependencies are cached per request),
+    so its connection is returned to the pool here.
+    """
+    release_connection(primary)
+    db.info["user_id"] = current_user.id
+    return db
+
+
+def get_admin_user(
+    current_user: UserId = Depends(get_current_userId), db: Session = Depends(get_session)
+) -> UserId:
+    """
+    The current user, if their email is listed in ADMIN_EMAILS.
+    """
+    email = (
+        db.query(user_schema.User.email).filter(user_schema.User.id == current_user.id).scalar()
+    )
+    if email is None or email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
@@ -0,0 +1,272 @@
+import gzip
+import zlib
+from typing import Callable, Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.metrics_utils import increment
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Only text-like bodies are worth compressing; zip exports and images are
+# already compressed. Server-sent events are never compressed because the
+# encoder would hold back events until it has enough input to emit.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "text/",
+)
+NEVER_COMPRESS_TYPES = ("text/event-stream",)
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """
+    Mark a route so its responses are never compressed, e.g. responses that
+    carry secrets next to request-controlled data (BREACH). Apply it directly
+    above the function, below the route and rate-limit decorators.
+    """
+    endpoint.__no_compression__ = True
+    return endpoint
+
+
+class _Encoder:
+    """
+    One content-coding: a one-shot compressor for complete bodies and a
+    factory for incremental compressors used by streaming responses.
+    """
+
+    def __init__(self, name: str, compress: Callable[[bytes], bytes], stream: Callable):
+        self.name = name
+        self.compress = compress
+        self.stream = stream
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def build_encoders(
+    names: List[str], gzip_level: int, brotli_quality: int, zstd_level: int
+) -> Dict[str, _Encoder]:
+    """
+    Return the usable encoders among `names`, in preference order. brotli and
+    zstd are skipped when their packages are not installed.
+    """
+    encoders = {}
+    for name in names:
+        if name == "gzip":
+            encoders[name] = _Encoder(
+                name,
+                lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0),
+                lambda: _GzipStream(gzip_level),
+            )
+        elif name == "br" and brotli is not None:
+            encoders[name] = _Encoder(
+                name,
+                lambda data: brotli.compress(data, quality=brotli_quality),
+                lambda: _BrotliStream(brotli_quality),
+            )
+        elif name == "zstd" and zstandard is not None:
+            compressor = zstandard.ZstdCompressor(level=zstd_level)
+            encoders[name] = _Encoder(
+                name, compressor.compress, lambda: _ZstdStream(zstd_level)
+            )
+    return encoders
+
+
+def negotiate(accept_encoding: str, encoders: Dict[str, _Encoder]) -> Optional[_Encoder]:
+    """
+    Pick the first server-preferred encoder the client accepts (q > 0).
+    """
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    for name, encoder in encoders.items():
+        if name in accepted or "*" in accepted:
+            return encoder
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with the best encoding the client accepts.
+
+    Complete bodies below `minimum_size` are sent as-is. Streaming responses
+    (exports) are compressed incrementally, except server-sent events.
+    Compressed responses get `Vary: Accept-Encoding`, lose their
+    Content-Length, and have their ETag weakened since the bytes on the wire
+    differ from the representation the tag was computed for.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        encodings: str = "br,zstd,gzip",
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = build_encoders(
+            [name.strip() for name in encodings.split(",") if name.strip()],
+            gzip_level,
+            brotli_quality,
+            zstd_level,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoder = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encoders)
+        responder = _CompressionResponder(scope, send, encoder, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self, scope: Scope, send: Send, encoder: Optional[_Encoder], minimum_size: int
+    ):
+        self.scope = scope
+        self.downstream = send
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.buffered: List[bytes] = []
+        self.buffered_size = 0
+        self.passthrough = False
+        self.stream = None
+
+    def _eligible(self, message: Message) -> bool:
+        if message["status"] in (204, 304) or self.scope.get("method") == "HEAD":
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        if content_type.startswith(NEVER_COMPRESS_TYPES):
+            return False
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        endpoint = self.scope.get("endpoint")
+        return not getattr(endpoint, "__no_compression__", False)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            if not self._eligible(message):
+                self.passthrough = True
+                await self.downstream(message)
+                return
+            MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            if self.encoder is None:
+                self.passthrough = True
+                await self.downstream(message)
+                return
+            # Hold the headers until the body size is known
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            # Buffer until the body is known to be big enough to be worth
+            # compressing. Responses passed through BaseHTTPMiddleware arrive
+            # in several chunks even when the route returned one body.
+            self.buffered.append(body)
+            self.buffered_size += len(body)
+            if more_body and self.buffered_size < self.minimum_size:
+                return
+            start, self.start = self.start, None
+            body, self.buffered = b"".join(self.buffered), []
+
+            if not more_body:
+                if len(body) < self.minimum_size:
+                    self.passthrough = True
+                    await self.downstream(start)
+                    await self.downstream({"type": "http.response.body", "body": body})
+                    return
+                compressed = self.encoder.compress(body)
+                self._count(len(body), len(compressed))
+                headers = self._encoded_headers(start)
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream(start)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            # A streaming response; compress it incrementally
+            del self._encoded_headers(start)["Content-Length"]
+            self.stream = self.encoder.stream()
+            await self.downstream(start)
+
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        self._count(len(body), len(chunk))
+        if chunk or not more_body:
+            await self.downstream(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+
+    def _encoded_headers(self, start: Message) -> MutableHeaders:
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoder.name
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        return headers
+
+    def _count(self, raw: int, encoded: int) -> None:
+        increment(f"compression.{self.encoder.name}.bytes_in", raw)
+        increment(f"compression.{self.encoder.name}.bytes_out", encoded)
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+# Mood is the sentiment score signed by its label: -100 (certainly
+# negative) to 100 (certainly positive), 0 for neutral entries.
+
+
+class MoodDay(BaseModel):
+    date: date
+    entries: int
+    mood: Optional[float] = Field(None, description="Mean mood of the day's entries")
+    moving_average_7: Optional[float] = None
+    moving_average_30: Optional[float] = None
+    ewma: Optional[float] = None
+
+
+class MoodStreak(BaseModel):
+    start: date
+    end: date
+    days: int
+
+
+class MoodSeasonality(BaseModel):
+    weekday: List[Optional[float]] = Field(..., description="Mean mood, Monday first")
+    weekday_entries: List[int]
+    hour: List[Optional[float]] = Field(..., description="Mean mood by hour of day")
+    hour_entries: List[int]
+
+
+class MoodChangePoint(BaseModel):
+    date: date
+    before: float
+    after: float
+    score: float
+
+
+class MoodTrendsResponse(BaseModel):
+    start: Optional[date] = None
+    end: Optional[date] = None
+    entries: int
+    mood: Optional[float] = None
+    days: List[MoodDay]
+    current_negative_streak: int
+    longest_negative_streak: Optional[MoodStreak] = None
+    seasonality: MoodSeasonality
+    change_points: List[MoodChangePoint]
+
+
+class SentimentCounts(BaseModel):
+    positive: int
+    negative: int
+    neutral: int
+    pending: int = Field(..., description="Imported entries not analyzed when counted")
+
+
+class ServiceStatsDay(BaseModel):
+    date: date
+    entries: int
+    active_users: int
+    sentiment: SentimentCounts
+    mood: Optional[float] = Field(None, description="Mean mood of the analyzed entries")
+    affirmations: int
+    affirmation_rate: Optional[float] = Field(None, description="Affirmations per entry")
+
+
+class ServiceStatsResponse(BaseModel):
+    start: date
+    end: date
+    entries: int
+    active_users: int = Field(..., description="Distinct users with entries in the range")
+    sentiment: SentimentCounts
+    mood: Optional[float] = None
+    affirmations: int
+    affirmation_rate: Optional[float] = None
+    as_of: Dict[str, Optional[datetime]] = Field(
+        ..., description="Rows written up to this time are counted, per source table"
+    )
+    days: List[ServiceStatsDay]
@@ -68,10 +68,17 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     user_id: Optional[UUID] = None
     type: Optional[str] = None
+    jti: Optional[str] = None
+    # Session (refresh-token family) the token belongs to, the refresh
+    # token's generation within it, and the expiry as a Unix timestamp
+    family: Optional[str] = None
+    generation: Optional[int] = None
+    exp: Optional[int] = None
 
 
 class UserId(BaseModel):
     id: UUID
+    journals_version: int = 0
     model_config = ConfigDict(from_attributes=True)
 
 
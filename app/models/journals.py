@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Any, List
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from typing import Optional, Any, List, Literal
 from uuid import UUID
 from datetime import datetime
+from app.core.config import JOURNAL_BATCH_MAX_ITEMS
 
 
 class JournalBase(BaseModel):
@@ -48,6 +49,27 @@ class JournalUpdateRequest(BaseModel):
     created_at: Optional[datetime] = Field(None, description="Journal creation date")
 
 
+class JournalBatchDeleteRequest(BaseModel):
+    journal_ids: List[UUID] = Field(..., min_length=1, max_length=JOURNAL_BATCH_MAX_ITEMS)
+
+
+class JournalBatchUpdateRequest(BaseModel):
+    items: List[JournalUpdateRequest] = Field(
+        ..., min_length=1, max_length=JOURNAL_BATCH_MAX_ITEMS
+    )
+
+
+class JournalBatchItemResult(BaseModel):
+    journal_id: UUID
+    status: Literal["deleted", "updated", "not_found", "invalid"]
+    detail: Optional[str] = None
+    sentiment_label: Optional[str] = None
+
+
+class JournalBatchResponse(BaseModel):
+    results: List[JournalBatchItemResult]
+
+
 
 class SentimentDataRequest(BaseModel):
     entry_id: UUID
@@ -59,3 +81,51 @@ class SentimentDataRequest(BaseModel):
 
 class SentimentDataResponse(BaseModel):
     data: List[SentimentDataRequest]
+
+
+class SentimentResult(BaseModel):
+    label: str = Field(..., description="positive, negative or neutral")
+    probability: float = Field(..., ge=0, le=100)
+
+    @field_validator("label")
+    def normalize_label(cls, label: str) -> str:
+        label = label.strip().lower()
+        if label not in ("positive", "negative", "neutral", "neg", "pos"):
+            raise ValueError(f"Unknown sentiment label: {label}")
+        return label
+
+
+class AffirmationsResult(BaseModel):
+    input_summary: str
+    affirmations: List[str] = Field(..., min_length=1)
+
+
+class SentimentBatchItem(SentimentResult):
+    index: int
+
+
+class SentimentBatchResult(BaseModel):
+    results: List[SentimentBatchItem]
+
+
+class AffirmationsBatchItem(AffirmationsResult):
+    index: int
+
+
+class AffirmationsBatchResult(BaseModel):
+    results: List[AffirmationsBatchItem]
+
+
+class ImportJobStatus(BaseModel):
+    id: UUID
+    format: str
+    status: str
+    rows_received: int
+    rows_imported: int
+    rows_failed: int
+    rows_enriched: int
+    rows_pending: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
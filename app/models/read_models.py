@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+# Plain, slotted read models for GET paths. They are filled from column-only
+# selects, so the session never builds or tracks ORM instances for reads,
+# and they are encoded directly by orjson. Field order is the JSON key order
+# of the matching response models in app/models/journals.py.
+
+
+@dataclass(slots=True)
+class AffirmationView:
+    id: UUID
+    affirmations: List[str]
+
+
+@dataclass(slots=True)
+class JournalView:
+    content: str
+    sentiment_label: str
+    created_at: datetime
+    title: str
+    id: UUID
+    sentiment_score: float
+    affirmations: List[AffirmationView]
+
+
+@dataclass(slots=True)
+class SentimentPoint:
+    entry_id: UUID
+    title: str
+    timestamp: datetime
+    sentiment_label: str
+    sentiment_score: float
@@ -2,3 +2,9 @@ from .user_schema import User
 from .token_schema import RefreshToken
 from .affirmations_schema import Affirmation
 from .journals_schema import Journal
+from .llm_usage_schema import LLMUsage
+from .import_job_schema import ImportJob
+from .search_token_schema import JournalSearchToken
+from .data_key_schema import UserDataKey
+from .password_reset_otp_schema import PasswordResetOtp, PasswordResetFailure
+from .aggregate_stats_schema import AggregationWatermark, DailyJournalStats, DailyActiveJournaler
@@ -1,18 +1,27 @@
-from sqlalchemy import Column, String, ForeignKey, JSON
+from sqlalchemy import Column, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.services.db import Base
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+from sqlalchemy.sql import func
 
 
 class Affirmation(Base):
     __tablename__ = "affirmations"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    input_summary = Column(String, nullable=True)
-    affirmations = Column(JSON, nullable=False)
+    # Fernet ciphertext as raw bytes, see encrypt_data
+    input_summary = Column(LargeBinary, nullable=True)
+    affirmations = Column(LargeBinary, nullable=False)
     journal_id = Column(
         UUID(as_uuid=True),
         ForeignKey("journals.id", ondelete="CASCADE"),
         nullable=False,
     )
+    # Copy of the journal's owner, so affirmations can be filtered and
+    # partitioned by user without joining journals
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # When the row was written, read by the stats aggregation
+    ingested_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     journal = relationship("Journal", back_populates="affirmations")
+
+    __table_args__ = (Index("ix_affirmations_ingested_at", "ingested_at", "id"),)
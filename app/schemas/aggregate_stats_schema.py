@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.services.db import Base
+
+
+class AggregationWatermark(Base):
+    """
+    How far the stats aggregation has read a source table: the
+    (ingested_at, id) of the last row it counted.
+    """
+
+    __tablename__ = "aggregation_watermarks"
+
+    source = Column(String, primary_key=True)
+    ingested_at = Column(DateTime(timezone=True), nullable=True)
+    last_id = Column(UUID(as_uuid=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class DailyJournalStats(Base):
+    """
+    Cross-user totals per UTC day of the journals' created_at. Entries are
+    counted as first written; later edits and deletions are not reflected.
+    """
+
+    __tablename__ = "journal_stats_daily"
+
+    day = Column(Date, primary_key=True)
+    entries = Column(Integer, nullable=False, default=0)
+    active_users = Column(Integer, nullable=False, default=0)
+    positive = Column(Integer, nullable=False, default=0)
+    negative = Column(Integer, nullable=False, default=0)
+    neutral = Column(Integer, nullable=False, default=0)
+    # Imported entries whose sentiment was not analyzed yet when counted
+    pending = Column(Integer, nullable=False, default=0)
+    # Sum of sentiment scores signed by label, for the mean mood
+    mood_sum = Column(Float, nullable=False, default=0.0)
+    affirmations = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class DailyActiveJournaler(Base):
+    """Users who wrote at least one entry on a day, to count each once."""
+
+    __tablename__ = "journal_active_users_daily"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
@@ -0,0 +1,39 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.services.db import Base
+
+
+class UserDataKey(Base):
+    """
+    A per-user data key, stored wrapped (encrypted) by a master key. The
+    user's one key without `retired_at` encrypts new data; all of their
+    keys can decrypt.
+    """
+
+    __tablename__ = "user_data_keys"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    wrapped_key = Column(String, nullable=False)
+    master_key_id = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    retired_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # At most one active key per user, so concurrent first loads cannot
+        # each create one and cache a cipher missing the other's key
+        Index(
+            "ux_user_data_keys_active",
+            "user_id",
+            unique=True,
+            postgresql_where=retired_at.is_(None),
+            sqlite_where=retired_at.is_(None),
+        ),
+    )
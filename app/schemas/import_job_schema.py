@@ -0,0 +1,30 @@
+import uuid
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.services.db import Base
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    format = Column(String, nullable=False)
+    # receiving -> enriching -> completed, or partial (entries still pending
+    # LLM sentiment, retried later) or failed
+    status = Column(String, nullable=False, default="receiving")
+    rows_received = Column(Integer, nullable=False, default=0)
+    rows_imported = Column(Integer, nullable=False, default=0)
+    rows_failed = Column(Integer, nullable=False, default=0)
+    rows_enriched = Column(Integer, nullable=False, default=0)
+    # Entries of the user still pending when enrichment last stopped
+    rows_pending = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,21 +1,40 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.services.db import Base
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, false
 
 
 class Journal(Base):
     __tablename__ = "journals"
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
-    title = Column(String, nullable=False)
-    content = Column(String, nullable=False)
+    # Fernet ciphertext as raw bytes, see encrypt_data
+    title = Column(LargeBinary, nullable=False)
+    content = Column(LargeBinary, nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     sentiment_label = Column(String, nullable=False)
     sentiment_score = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Set for imported entries whose sentiment still needs an LLM pass
+    sentiment_pending = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Keyed hash of the normalized content; updates compare against it to
+    # skip re-encryption and LLM calls when the content did not change.
+    # NULL for rows written before it existed.
+    content_fingerprint = Column(LargeBinary(16), nullable=True)
+    # When the row was written; unlike created_at it is never backdated (by
+    # imports), so the stats aggregation can read new rows by it
+    ingested_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     user = relationship("User", back_populates="journals")
     affirmations = relationship(
         "Affirmation", back_populates="journal", cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        Index(
+            "ix_journals_sentiment_pending",
+            "user_id",
+            postgresql_where=sentiment_pending,
+        ),
+        Index("ix_journals_ingested_at", "ingested_at", "id"),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, BigInteger, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.services.db import Base
+
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = Column(Date, primary_key=True)
+    input_tokens = Column(BigInteger, nullable=False, default=0)
+    output_tokens = Column(BigInteger, nullable=False, default=0)
+    calls = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,46 @@
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.services.db import Base
+
+
+class PasswordResetOtp(Base):
+    """
+    An outstanding password reset code. Only a keyed hash of the code is
+    stored; a new request replaces the user's previous row, and expired rows
+    are purged in batches.
+    """
+
+    __tablename__ = "password_reset_otps"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    code_hash = Column(LargeBinary(32), nullable=False)
+    # Failed verifications so far; the row is deleted at OTP_MAX_ATTEMPTS
+    attempts = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class PasswordResetFailure(Base):
+    """
+    Failed reset code checks for an account across all its codes, counted
+    from `window_started_at` for OTP_FAILURE_WINDOW_MINUTES. Issuing a new
+    code does not reset it.
+    """
+
+    __tablename__ = "password_reset_failures"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    failures = Column(Integer, nullable=False, default=0)
+    window_started_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, LargeBinary, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.services.db import Base
+
+
+class JournalSearchToken(Base):
+    """
+    Blind search index: one row per (keyed hash of a normalized word, journal).
+    The plaintext word is never stored.
+    """
+
+    __tablename__ = "journal_search_tokens"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    token = Column(LargeBinary(16), primary_key=True)
+    journal_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("journals.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    __table_args__ = (Index("ix_journal_search_tokens_journal_id", "journal_id"),)
@@ -1,11 +1,18 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.services.db import Base
 
 
 class RefreshToken(Base):
+    """
+    A login session, which is also a refresh-token family: each refresh
+    rotates the token and bumps `generation`, and presenting an older
+    generation again revokes the session. `refresh_token` is only set for
+    sessions started before rotation, whose tokens carry no generation.
+    """
+
     __tablename__ = "refresh_tokens"
 
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
@@ -15,4 +22,7 @@ class RefreshToken(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     refresh_token = Column(String, nullable=True)
     expires_at = Column(DateTime(timezone=True), nullable=True)
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
+    rotated_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True, index=True)
     user = relationship("User", back_populates="refresh_tokens")
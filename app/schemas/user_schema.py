@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
@@ -14,12 +14,13 @@ class User(Base):
     full_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
-    otp_codes = Column(String, nullable=True)
-    opt_expires = Column(DateTime, nullable=True)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     profile_photo = Column(String, nullable=True)
+    # Bumped in the same transaction as every write to the user's journals;
+    # the ETag of the journal list and overview endpoints is derived from it
+    journals_version = Column(Integer, nullable=False, default=0, server_default="0")
     journals = relationship(
         "Journal", back_populates="user", cascade="all, delete-orphan"
     )
@@ -0,0 +1,251 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import distinct, func, literal, select, true, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import AGGREGATION_BATCH_SIZE, AGGREGATION_LAG_SECONDS
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.aggregate_stats_schema import (
+    AggregationWatermark,
+    DailyActiveJournaler,
+    DailyJournalStats,
+)
+from app.schemas.journals_schema import Journal
+from app.services.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = (
+    "entries", "active_users", "positive", "negative", "neutral", "pending", "mood_sum",
+    "affirmations",
+)
+_BUCKETS = {"pos": "positive", "neg": "negative"}
+_SIGNS = {"pos": 1.0, "neg": -1.0}
+
+
+def _utc_day(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _new_counters() -> Dict[str, Any]:
+    return {name: 0 for name in COUNTERS}
+
+
+def _after(model, watermark: AggregationWatermark):
+    """Rows past the watermark, in (ingested_at, id) order."""
+    if watermark.ingested_at is None:
+        return true()
+    return tuple_(model.ingested_at, model.id) > tuple_(
+        literal(watermark.ingested_at, model.ingested_at.type),
+        literal(watermark.last_id, model.id.type),
+    )
+
+
+def _add_stats(db: Session, days: Dict[date, Dict[str, Any]]) -> None:
+    if not days:
+        return
+    stmt = insert(DailyJournalStats).values(
+        [{"day": day, **counters} for day, counters in days.items()]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyJournalStats.day],
+            set_={
+                **{
+                    name: getattr(DailyJournalStats, name) + getattr(stmt.excluded, name)
+                    for name in COUNTERS
+                },
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+def _aggregate_journals(db: Session, watermark: AggregationWatermark, upper: datetime, limit: int):
+    # Metadata columns only: title and content are never read or decrypted
+    rows = db.execute(
+        select(
+            Journal.id,
+            Journal.ingested_at,
+            Journal.created_at,
+            Journal.user_id,
+            Journal.sentiment_label,
+            Journal.sentiment_score,
+            Journal.sentiment_pending,
+        )
+        .where(_after(Journal, watermark), Journal.ingested_at <= upper)
+        .order_by(Journal.ingested_at, Journal.id)
+        .limit(limit)
+    ).all()
+    days: Dict[date, Dict[str, Any]] = {}
+    active = set()
+    for row in rows:
+        day = _utc_day(row.created_at)
+        counters = days.setdefault(day, _new_counters())
+        counters["entries"] += 1
+        if row.sentiment_pending:
+            counters["pending"] += 1
+        else:
+            label = row.sentiment_label[:3].lower()
+            counters[_BUCKETS.get(label, "neutral")] += 1
+            counters["mood_sum"] += _SIGNS.get(label, 0.0) * row.sentiment_score
+        active.add((day, row.user_id))
+    if active:
+        # Only user-days not seen in earlier batches come back
+        first_seen = db.execute(
+            insert(DailyActiveJournaler)
+            .values([{"day": day, "user_id": user_id} for day, user_id in active])
+            .on_conflict_do_nothing()
+            .returning(DailyActiveJournaler.day)
+        ).scalars()
+        for day in first_seen:
+            days[day]["active_users"] += 1
+    _add_stats(db, days)
+    return rows
+
+
+def _aggregate_affirmations(
+    db: Session, watermark: AggregationWatermark, upper: datetime, limit: int
+):
+    # Counted on their journal's day, so the rate compares like with like;
+    # the join is a primary key lookup per row
+    rows = db.execute(
+        select(Affirmation.id, Affirmation.ingested_at, Journal.created_at)
+        .join(Journal, Journal.id == Affirmation.journal_id)
+        .where(_after(Affirmation, watermark), Affirmation.ingested_at <= upper)
+        .order_by(Affirmation.ingested_at, Affirmation.id)
+        .limit(limit)
+    ).all()
+    days: Dict[date, Dict[str, Any]] = {}
+    for row in rows:
+        days.setdefault(_utc_day(row.created_at), _new_counters())["affirmations"] += 1
+    _add_stats(db, days)
+    return rows
+
+
+_SOURCES: Dict[str, Callable] = {
+    "journals": _aggregate_journals,
+    "affirmations": _aggregate_affirmations,
+}
+
+
+def _lock_watermark(db: Session, source: str) -> AggregationWatermark:
+    db.execute(insert(AggregationWatermark).values(source=source).on_conflict_do_nothing())
+    return db.execute(
+        select(AggregationWatermark).where(AggregationWatermark.source == source).with_for_update()
+    ).scalar_one()
+
+
+def _run_batch(source: str, batch_size: int) -> int:
+    db = SessionLocal()
+    try:
+        # Held until commit, so concurrent runs take turns instead of
+        # counting the same rows twice
+        watermark = _lock_watermark(db, source)
+        # ingested_at is the writing transaction's start time, so a row can
+        # commit after rows with later timestamps were counted; stopping
+        # AGGREGATION_LAG_SECONDS short of now leaves time for it to land
+        upper = datetime.now(timezone.utc) - timedelta(seconds=AGGREGATION_LAG_SECONDS)
+        rows = _SOURCES[source](db, watermark, upper, batch_size)
+        if rows:
+            watermark.ingested_at = rows[-1].ingested_at
+            watermark.last_id = rows[-1].id
+            watermark.updated_at = func.now()
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_aggregation(
+    batch_size: int = AGGREGATION_BATCH_SIZE, max_batches: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Fold journals and affirmations written since the last run into the
+    daily stats tables, reading each source in (ingested_at, id) order from
+    its watermark. Each batch commits its counts together with the new
+    watermark, so an interrupted run loses nothing and counts nothing twice.
+
+    Entries are counted as first written: later edits, deletions and
+    sentiment analysis of imported entries are not reflected.
+
+    Returns:
+        Dict[str, int]: Rows counted per source.
+    """
+    counted = {}
+    for source in _SOURCES:
+        counted[source] = batches = 0
+        while max_batches is None or batches < max_batches:
+            rows = _run_batch(source, batch_size)
+            counted[source] += rows
+            batches += 1
+            if rows < batch_size:
+                break
+        logger.info("Aggregated %d %s rows in %d batches", counted[source], source, batches)
+    return counted
+
+
+def _ratio(numerator: float, denominator: int, digits: int) -> Optional[float]:
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def _report_row(counters: Dict[str, Any], **fields) -> Dict[str, Any]:
+    analyzed = counters["positive"] + counters["negative"] + counters["neutral"]
+    return {
+        **fields,
+        "entries": counters["entries"],
+        "active_users": counters["active_users"],
+        "sentiment": {
+            "positive": counters["positive"],
+            "negative": counters["negative"],
+            "neutral": counters["neutral"],
+            "pending": counters["pending"],
+        },
+        "mood": _ratio(counters["mood_sum"], analyzed, 2),
+        "affirmations": counters["affirmations"],
+        "affirmation_rate": _ratio(counters["affirmations"], counters["entries"], 3),
+    }
+
+
+def load_stats_report(db: Session, start: date, end: date) -> Dict[str, Any]:
+    """
+    Daily and whole-range stats between `start` and `end` (UTC dates,
+    inclusive), shaped like ServiceStatsResponse. Reads only the aggregate
+    tables.
+    """
+    rows = (
+        db.execute(
+            select(DailyJournalStats)
+            .where(DailyJournalStats.day >= start, DailyJournalStats.day <= end)
+            .order_by(DailyJournalStats.day)
+        )
+        .scalars()
+        .all()
+    )
+    active_users = db.execute(
+        select(func.count(distinct(DailyActiveJournaler.user_id))).where(
+            DailyActiveJournaler.day >= start, DailyActiveJournaler.day <= end
+        )
+    ).scalar_one()
+    watermarks = dict(
+        db.execute(select(AggregationWatermark.source, AggregationWatermark.ingested_at)).all()
+    )
+
+    days: List[Dict[str, Any]] = []
+    totals = _new_counters()
+    for row in rows:
+        counters = {name: getattr(row, name) for name in COUNTERS}
+        for name in COUNTERS:
+            totals[name] += counters[name]
+        days.append(_report_row(counters, date=row.day))
+    summary = _report_row(totals, start=start, end=end)
+    summary["active_users"] = active_users
+    summary["as_of"] = {source: watermarks.get(source) for source in _SOURCES}
+    summary["days"] = days
+    return summary
@@ -0,0 +1,169 @@
+import base64
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from uuid import UUID
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import (
+    FERNET_KEY,
+    MASTER_KEYS,
+    DATA_KEY_CACHE_SIZE,
+    DATA_KEY_CACHE_TTL,
+)
+from app.schemas.data_key_schema import UserDataKey
+from app.services.db import SessionLocal
+
+if not FERNET_KEY:
+    raise ValueError("FERNET_KEY not found in .env file")
+
+# Data written before per-user keys existed is under the global FERNET_KEY
+try:
+    legacy_cipher = Fernet(FERNET_KEY.encode())
+except Exception as e:
+    raise ValueError(f"Invalid FERNET_KEY: {str(e)}")
+
+
+def _load_master_keys() -> List[Tuple[str, Fernet]]:
+    if not MASTER_KEYS:
+        return [("default", legacy_cipher)]
+    keys = []
+    for entry in MASTER_KEYS.split(","):
+        key_id, _, key = entry.strip().partition(":")
+        if not key_id or not key:
+            raise ValueError("MASTER_KEYS entries must look like id:fernet_key")
+        keys.append((key_id, Fernet(key.encode())))
+    return keys
+
+
+master_keys = _load_master_keys()
+CURRENT_MASTER_KEY_ID = master_keys[0][0]
+# Wraps with the first master key, unwraps with any of them
+master_cipher = MultiFernet([key for _, key in master_keys])
+
+
+def to_token(ciphertext: bytes) -> bytes:
+    """The Fernet token (URL-safe base64) for ciphertext stored as raw bytes."""
+    return base64.urlsafe_b64encode(ciphertext)
+
+
+def from_token(token: bytes) -> bytes:
+    """The raw bytes of a Fernet token, as stored in the database."""
+    return base64.urlsafe_b64decode(token)
+
+
+class DataKeyCache:
+    """
+    Bounded LRU of unwrapped per-user ciphers, with a TTL so a key rotated
+    by another worker is used to encrypt within DATA_KEY_CACHE_TTL seconds.
+    Data already encrypted with it is readable at once: see
+    `decrypt_for_user`. Unwrapped keys only ever live in this process's
+    memory.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: "OrderedDict[UUID, Tuple[float, MultiFernet]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[MultiFernet]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            loaded_at, cipher = entry
+            if time.monotonic() - loaded_at > self._ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return cipher
+
+    def put(self, user_id: UUID, cipher: MultiFernet) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), cipher)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+cache = DataKeyCache(DATA_KEY_CACHE_SIZE, DATA_KEY_CACHE_TTL)
+
+
+def new_data_key(user_id: UUID) -> UserDataKey:
+    """
+    Generate a data key for the user, wrapped by the current master key.
+    The caller adds it to a session and commits.
+    """
+    return UserDataKey(
+        user_id=user_id,
+        wrapped_key=master_cipher.encrypt(Fernet.generate_key()).decode(),
+        master_key_id=CURRENT_MASTER_KEY_ID,
+    )
+
+
+def _user_keys(db: Session, user_id: UUID) -> List[UserDataKey]:
+    return (
+        db.query(UserDataKey)
+        .filter(UserDataKey.user_id == user_id)
+        .order_by(UserDataKey.created_at.desc())
+        .all()
+    )
+
+
+def _load_cipher(user_id: UUID) -> MultiFernet:
+    db = SessionLocal()
+    try:
+        keys = _user_keys(db, user_id)
+        if not any(key.retired_at is None for key in keys):
+            db.add(new_data_key(user_id))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker created the user's active key first (the
+                # partial unique index allows one); use theirs
+                db.rollback()
+            keys = _user_keys(db, user_id)
+        # Active keys first; the first one encrypts
+        keys.sort(key=lambda key: key.retired_at is not None)
+        fernets = [
+            Fernet(master_cipher.decrypt(key.wrapped_key.encode())) for key in keys
+        ]
+    finally:
+        db.close()
+    return MultiFernet(fernets + [legacy_cipher])
+
+
+def get_user_cipher(user_id: UUID) -> MultiFernet:
+    """
+    Return the user's cipher: encrypts with their active data key and
+    decrypts with any of their keys or the legacy global key.
+
+    The first call for a user creates their data key if they have none.
+    """
+    cipher = cache.get(user_id)
+    if cipher is None:
+        cipher = _load_cipher(user_id)
+        cache.put(user_id, cipher)
+    return cipher
+
+
+def decrypt_for_user(user_id: UUID, token: bytes) -> bytes:
+    """
+    Decrypt one of the user's tokens. A cached cipher may predate a key
+    another worker added (a rotation, or the user's first key), so on
+    InvalidToken it is dropped and the keys reloaded once.
+    """
+    cipher = cache.get(user_id)
+    if cipher is not None:
+        try:
+            return cipher.decrypt(token)
+        except InvalidToken:
+            cache.invalidate(user_id)
+    return get_user_cipher(user_id).decrypt(token)
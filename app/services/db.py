@@ -1,17 +1,80 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.orm import declarative_base
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    READ_REPLICA_URLS,
+    READ_REPLICA_HEALTH_INTERVAL,
+    READ_YOUR_WRITES_SECONDS,
+)
 from sqlalchemy.pool import QueuePool
+from app.services.read_replicas import ReplicaSet
+from app.utils.metrics_utils import increment, get_count
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set.")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    DATABASE_URL, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replicas = ReplicaSet(
+    engine,
+    [
+        create_engine(
+            url, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW
+        )
+        for url in READ_REPLICA_URLS
+    ],
+    health_interval=READ_REPLICA_HEALTH_INTERVAL,
+    read_your_writes=READ_YOUR_WRITES_SECONDS,
+)
 
 Base = declarative_base()
 
+
+# Pool occupancy: how long each checked-out connection is held before it is
+# returned, summed per worker. Divide by `db.pool.checkouts` for the mean.
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is not None:
+        increment("db.pool.checkouts")
+        increment("db.pool.held_us", int((time.perf_counter() - started) * 1_000_000))
+
+
+def pool_occupancy() -> dict:
+    """
+    Return connection pool counters: checkouts so far, total and mean time
+    held, and how many connections are checked out right now.
+    """
+    checkouts = get_count("db.pool.checkouts")
+    held_ms = get_count("db.pool.held_us") / 1000
+    return {
+        "checkouts": checkouts,
+        "held_ms": held_ms,
+        "mean_held_ms": held_ms / checkouts if checkouts else 0.0,
+        "checked_out": engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0,
+    }
+
+
+def release_connection(db: Session) -> None:
+    """
+    End the session's transaction so its pooled connection goes back to the
+    pool, e.g. before a slow LLM call. The session stays usable and checks a
+    connection out again on its next query.
+    """
+    db.commit()
+
 try:
     with engine.connect() as connection:
         print("Database connection successful.")
@@ -25,3 +88,71 @@ def get_session():
         yield db
     finally:
         db.close()
+
+
+class ReadSession(Session):
+    """
+    Session for read-only endpoints. Its first query picks the engine from
+    `replicas` (set `info["user_id"]` before that to honour the user's
+    read-your-writes window) and the session keeps it.
+
+    A replica that fails on connection checkout (in `get_bind`), or a query
+    that fails on one (`execute`, which `query()`, `get()` and lazy loads
+    go through as well), marks the replica down; the session then runs on
+    the primary, retrying the failed query once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._routed = None
+
+    def get_bind(self, mapper=None, **kwargs):
+        if self._routed is None:
+            self._routed = replicas.choose(self.info.get("user_id"))
+            if self._routed is not replicas.primary:
+                try:
+                    # Check the connection out now, so a replica that went
+                    # away since its last health probe falls back here
+                    self.connection(bind_arguments={"bind": self._routed})
+                except OperationalError:
+                    replicas.mark_down(self._routed)
+                    self.use_primary()
+        return self._routed
+
+    def uses_replica(self) -> bool:
+        return self.get_bind() is not replicas.primary
+
+    def use_primary(self) -> None:
+        """Run the rest of the session's queries on the primary."""
+        self.rollback()
+        self._routed = replicas.primary
+
+    def _with_fallback(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except OperationalError:
+            if not self.uses_replica():
+                raise
+            replicas.mark_down(self._routed)
+            self.use_primary()
+            return method(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._with_fallback(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._with_fallback(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._with_fallback(super().scalars, *args, **kwargs)
+
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+
+
+def get_read_session():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
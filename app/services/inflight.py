@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InflightWork:
+    """
+    Tracks Gemini calls and email sends in progress in this worker, so
+    shutdown can wait for them before the process exits.
+
+    Sync code (Gemini calls in threadpool threads) is counted with `track`.
+    Coroutines (email sends) go through `shielded`, which runs them in their
+    own task so a request cancelled at shutdown does not abort them halfway.
+    """
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, kind: str):
+        with self._lock:
+            self._counts[kind] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._counts[kind] -= 1
+
+    async def _run(self, kind: str, awaitable: Awaitable[T]) -> T:
+        with self.track(kind):
+            return await awaitable
+
+    async def shielded(self, kind: str, awaitable: Awaitable[T]) -> T:
+        task = asyncio.ensure_future(self._run(kind, awaitable))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(task)
+
+    def pending(self) -> Dict[str, int]:
+        with self._lock:
+            return {kind: count for kind, count in self._counts.items() if count}
+
+    async def drain(self, timeout: float) -> Dict[str, int]:
+        """
+        Wait up to `timeout` seconds for tracked work to finish.
+
+        Returns:
+            Dict[str, int]: What was still running at the deadline, by kind.
+        """
+        deadline = time.monotonic() + timeout
+        if self.pending():
+            logger.info("Waiting for in-flight work: %s", self.pending())
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+        # Gemini calls run in threadpool threads, which cannot be awaited here
+        while self.pending() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        left = self.pending()
+        if left:
+            logger.warning("Shutting down with work still in flight: %s", left)
+        return left
+
+
+inflight = InflightWork()
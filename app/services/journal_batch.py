@@ -0,0 +1,276 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.journals import (
+    AffirmationsResult,
+    JournalBatchItemResult,
+    JournalUpdateRequest,
+    SentimentResult,
+)
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.journals_schema import Journal
+from app.services.journal_version import bump_journal_version
+from app.services.llm_quota import usage as llm_usage
+from app.services.search_index import reindex_journals
+from app.utils.affirmations_utils import analyze_sentiments_batch, generate_affirmations_batch
+from app.utils.encryption_utils import encrypt_data, decrypt_data, content_fingerprint
+from app.utils.llm_parsing_utils import LLMOutputError
+from app.utils.local_sentiment_utils import analyze_sentiments_locally
+
+logger = logging.getLogger(__name__)
+
+NEGATIVE_LABELS = ("negative", "neg")
+
+
+def delete_journals(
+    db: Session, user_id: UUID, journal_ids: List[UUID]
+) -> List[JournalBatchItemResult]:
+    """
+    Delete several of the user's journals in one ownership-checked statement
+    and one commit. Affirmations and search tokens cascade.
+
+    Returns:
+        List[JournalBatchItemResult]: One result per requested id, in order.
+    """
+    unique_ids = list(dict.fromkeys(journal_ids))
+    deleted = set(
+        db.execute(
+            delete(Journal)
+            .where(Journal.id.in_(unique_ids), Journal.user_id == user_id)
+            .returning(Journal.id)
+        ).scalars()
+    )
+    if deleted:
+        bump_journal_version(db, user_id)
+    db.commit()
+    return [
+        JournalBatchItemResult(
+            journal_id=journal_id,
+            status="deleted" if journal_id in deleted else "not_found",
+        )
+        for journal_id in journal_ids
+    ]
+
+
+def _analyze(contents: List[str], user_id: UUID) -> Tuple[List[SentimentResult], bool]:
+    """
+    Analyze all entries with one LLM batch call, falling back to the local
+    analyzer for entries the model skipped, or for all of them when the user
+    is over quota or the response is unusable.
+
+    Returns:
+        (List[SentimentResult], bool): The results and whether the LLM may
+        be used for affirmations.
+    """
+    if not llm_usage.within_budget(user_id):
+        return [analyze_sentiments_locally(content) for content in contents], False
+    try:
+        results = analyze_sentiments_batch(contents, user_id=user_id)
+    except LLMOutputError as e:
+        logger.warning("Batch sentiment analysis failed, using local fallback: %s", e)
+        results = [None] * len(contents)
+    return [
+        result if result is not None else analyze_sentiments_locally(content)
+        for content, result in zip(contents, results)
+    ], True
+
+
+def update_journals(
+    db: Session, user_id: UUID, items: List[JournalUpdateRequest]
+) -> List[JournalBatchItemResult]:
+    """
+    Update several of the user's journals in one transaction.
+
+    All LLM work (one batch sentiment call, then one batch affirmations call
+    for the negative entries while the user is within quota) happens before
+    any write, so no DB transaction is held open while waiting on Gemini.
+    As in the single update, entries are diffed against what is stored:
+    only changed columns are re-encrypted and written, only entries whose
+    title or content changed are reindexed, and entries whose content
+    fingerprint is unchanged skip the LLM entirely. When no row changes,
+    nothing is written and the journals version is not bumped, so ETags
+    and cached responses stay valid. Entries that keep a negative label but
+    can't get new affirmations keep their old ones.
+
+    Returns:
+        List[JournalBatchItemResult]: One result per item, in order.
+    """
+    results: List[Optional[JournalBatchItemResult]] = [None] * len(items)
+    seen = set()
+    for i, item in enumerate(items):
+        if item.journal_id in seen:
+            results[i] = JournalBatchItemResult(
+                journal_id=item.journal_id, status="invalid", detail="Duplicate journal_id"
+            )
+        elif not item.content.strip():
+            results[i] = JournalBatchItemResult(
+                journal_id=item.journal_id,
+                status="invalid",
+                detail="Journal content cannot be empty",
+            )
+        seen.add(item.journal_id)
+
+    candidates = [i for i, result in enumerate(results) if result is None]
+    owned = {
+        row.id: row
+        for row in db.execute(
+            select(
+                Journal.id,
+                Journal.title,
+                Journal.content,
+                Journal.content_fingerprint,
+                Journal.created_at,
+                Journal.sentiment_label,
+                Journal.sentiment_score,
+            ).where(
+                Journal.id.in_([items[i].journal_id for i in candidates]),
+                Journal.user_id == user_id,
+            )
+        )
+    }
+    # Close the read transaction before calling the LLM
+    db.commit()
+    pending = []
+    for i in candidates:
+        if items[i].journal_id in owned:
+            pending.append(i)
+        else:
+            results[i] = JournalBatchItemResult(
+                journal_id=items[i].journal_id,
+                status="not_found",
+                detail="Journal not found or not owned by user",
+            )
+    if not pending:
+        return results
+
+    # Entries whose normalized content is unchanged keep their sentiment and
+    # affirmations; only the others are sent to the LLM
+    fingerprints = {i: content_fingerprint(items[i].content, user_id) for i in pending}
+    changed = []
+    text_changed = set()
+    title_changed = set()
+    sentiments_by_item: Dict[int, SentimentResult] = {}
+    for i in pending:
+        stored = owned[items[i].journal_id]
+        old_content = None
+        stored_fingerprint = stored.content_fingerprint
+        if stored_fingerprint is None:
+            old_content = decrypt_data(stored.content, user_id)
+            stored_fingerprint = content_fingerprint(old_content, user_id)
+        if stored_fingerprint == fingerprints[i]:
+            sentiments_by_item[i] = SentimentResult(
+                label=stored.sentiment_label, probability=stored.sentiment_score
+            )
+            # Same normalized text; only spacing may differ
+            if old_content is None:
+                old_content = decrypt_data(stored.content, user_id)
+            if old_content != items[i].content:
+                text_changed.add(i)
+        else:
+            changed.append(i)
+            text_changed.add(i)
+        if decrypt_data(stored.title, user_id) != items[i].title:
+            title_changed.add(i)
+    use_llm = False
+    if changed:
+        results_for_changed, use_llm = _analyze([items[i].content for i in changed], user_id)
+        sentiments_by_item.update(zip(changed, results_for_changed))
+    sentiments = [sentiments_by_item[i] for i in pending]
+
+    # One batch call for every changed negative entry
+    affirmations: Dict[UUID, AffirmationsResult] = {}
+    negative = [i for i in changed if sentiments_by_item[i].label in NEGATIVE_LABELS]
+    if negative and use_llm and llm_usage.within_budget(user_id):
+        try:
+            generated = generate_affirmations_batch(
+                [items[i].content for i in negative], user_id=user_id
+            )
+        except ValueError as e:
+            logger.warning("Affirmations for a batch update failed: %s", e)
+            generated = []
+        for i, result in zip(negative, generated):
+            if result is not None:
+                affirmations[items[i].journal_id] = result
+
+    rows = []
+    for i in pending:
+        item = items[i]
+        stored = owned[item.journal_id]
+        row = {}
+        if i in title_changed:
+            row["title"] = encrypt_data(item.title, user_id)
+        if i in text_changed:
+            row["content"] = encrypt_data(item.content, user_id)
+        if stored.content_fingerprint != fingerprints[i]:
+            row["content_fingerprint"] = fingerprints[i]
+        if i in changed:
+            sentiment = sentiments_by_item[i]
+            row["sentiment_label"] = sentiment.label
+            row["sentiment_score"] = round(sentiment.probability, 2)
+        if item.created_at is not None and item.created_at != stored.created_at:
+            row["created_at"] = item.created_at
+        if row:
+            rows.append({"id": item.journal_id, **row})
+
+    # Affirmations are dropped for entries that are no longer negative and
+    # replaced for entries that got new ones
+    replaced = [
+        items[i].journal_id
+        for i in changed
+        if sentiments_by_item[i].label not in NEGATIVE_LABELS
+        or items[i].journal_id in affirmations
+    ]
+    reindexed = [
+        (items[i].journal_id, items[i].title, items[i].content)
+        for i in pending
+        if i in title_changed or i in changed
+    ]
+    # When no row changed, skip the transaction and the version bump
+    if rows or replaced or affirmations:
+        try:
+            # Bulk UPDATE by primary key, grouped by the set of columns present
+            groups: Dict[frozenset, List[dict]] = {}
+            for row in rows:
+                groups.setdefault(frozenset(row), []).append(row)
+            for group in groups.values():
+                db.execute(
+                    update(Journal).where(Journal.user_id == user_id),
+                    group,
+                    execution_options={"synchronize_session": None},
+                )
+            if replaced:
+                db.execute(delete(Affirmation).where(
+                        Affirmation.journal_id.in_(replaced), Affirmation.user_id == user_id
+                    ))
+            if affirmations:
+                db.execute(
+                    insert(Affirmation),
+                    [
+                        {
+                            "journal_id": journal_id,
+                            "user_id": user_id,
+                            "input_summary": encrypt_data(result.input_summary, user_id),
+                            "affirmations": encrypt_data(
+                                json.dumps(result.affirmations, indent=2), user_id
+                            ),
+                        }
+                        for journal_id, result in affirmations.items()
+                    ],
+                )
+            reindex_journals(db, user_id, reindexed)
+            bump_journal_version(db, user_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    for i, sentiment in zip(pending, sentiments):
+        results[i] = JournalBatchItemResult(
+            journal_id=items[i].journal_id,
+            status="updated",
+            sentiment_label=sentiment.label,
+        )
+    return results
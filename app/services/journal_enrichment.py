@@ -0,0 +1,156 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+from uuid import UUID
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import ENRICHMENT_BATCH_SIZE
+from app.schemas.journals_schema import Journal
+from app.schemas.import_job_schema import ImportJob
+from app.services.db import SessionLocal
+from app.services.llm_quota import usage as llm_usage
+from app.services.journal_version import bump_journal_version
+from app.utils.affirmations_utils import analyze_sentiments_batch
+from app.utils.encryption_utils import decrypt_data
+from app.utils.llm_parsing_utils import LLMOutputError
+
+logger = logging.getLogger(__name__)
+
+# Users being enriched in this process, so a retry never runs alongside an
+# import's enrichment and pays for the same LLM calls twice
+_running: Set[UUID] = set()
+_running_lock = threading.Lock()
+
+
+def has_pending_journals(db: Session, user_id: UUID) -> bool:
+    """Whether the user has entries still waiting for LLM sentiment."""
+    return db.execute(
+        select(
+            exists().where(Journal.user_id == user_id, Journal.sentiment_pending.is_(True))
+        )
+    ).scalar()
+
+
+def users_with_pending_journals(db: Session) -> List[UUID]:
+    """Users with entries waiting for LLM sentiment (served by the partial index)."""
+    return (
+        db.execute(select(Journal.user_id).where(Journal.sentiment_pending.is_(True)).distinct())
+        .scalars()
+        .all()
+    )
+
+
+def _finish_jobs(db: Session, user_id: UUID, error: Optional[str]) -> None:
+    """
+    Record the outcome on the user's import jobs still waiting on
+    enrichment (a run covers every pending entry of the user, whichever
+    import added it):
+    completed when no entry is left pending, otherwise partial (or failed
+    after an error) with the count.
+    """
+    pending = db.execute(
+        select(func.count()).where(Journal.user_id == user_id, Journal.sentiment_pending.is_(True))
+    ).scalar()
+    if pending == 0:
+        status = "completed"
+    else:
+        status = "failed" if error else "partial"
+    # Jobs that failed while receiving have no rows_pending and are left alone
+    unfinished = ImportJob.status.in_(("enriching", "partial")) | (
+        (ImportJob.status == "failed") & (ImportJob.rows_pending > 0)
+    )
+    db.query(ImportJob).filter(ImportJob.user_id == user_id, unfinished).update(
+        {
+            ImportJob.status: status,
+            ImportJob.rows_pending: pending,
+            ImportJob.error: error,
+            ImportJob.finished_at: datetime.now(timezone.utc),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def enrich_pending_journals(user_id: UUID, job_id: Optional[UUID] = None) -> int:
+    """
+    Replace the local sentiment estimate on a user's pending journals with an
+    LLM result, ENRICHMENT_BATCH_SIZE entries per Gemini call.
+
+    Runs as a background task. The DB transaction is closed before every
+    LLM call, so no pooled connection is held while waiting on Gemini.
+    Stops early (leaving rows pending) once the user is over quota, and
+    skips batches the LLM answered badly; the job is then marked partial
+    with the number still pending, and the entries are retried on the
+    user's next journal write or by `python -m scripts.enrich_pending`.
+
+    Returns:
+        int: The number of journals enriched.
+    """
+    with _running_lock:
+        if user_id in _running:
+            return 0
+        _running.add(user_id)
+    enriched = 0
+    last_id = None
+    error = None
+    db = SessionLocal()
+    try:
+        while llm_usage.within_budget(user_id):
+            query = db.query(Journal.id, Journal.content).filter(
+                Journal.user_id == user_id, Journal.sentiment_pending.is_(True)
+            )
+            if last_id is not None:
+                query = query.filter(Journal.id > last_id)
+            rows = query.order_by(Journal.id).limit(ENRICHMENT_BATCH_SIZE).all()
+            db.commit()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            try:
+                results = analyze_sentiments_batch(
+                    [decrypt_data(row.content, user_id) for row in rows], user_id=user_id
+                )
+            except LLMOutputError:
+                # Leave this batch pending for the next retry and move on
+                continue
+
+            updates = [
+                {
+                    "id": row.id,
+                    "sentiment_label": result.label,
+                    "sentiment_score": round(result.probability, 2),
+                    "sentiment_pending": False,
+                }
+                for row, result in zip(rows, results)
+                if result is not None
+            ]
+            if updates:
+                db.execute(
+                    update(Journal).where(Journal.user_id == user_id),
+                    updates,
+                    execution_options={"synchronize_session": None},
+                )
+                bump_journal_version(db, user_id)
+            if job_id is not None:
+                db.query(ImportJob).filter(ImportJob.id == job_id).update(
+                    {ImportJob.rows_enriched: ImportJob.rows_enriched + len(updates)}
+                )
+            db.commit()
+            enriched += len(updates)
+    except Exception as e:
+        db.rollback()
+        error = f"Sentiment enrichment stopped: {e}"
+        logger.warning("Sentiment enrichment for user %s stopped: %s", user_id, e)
+    finally:
+        try:
+            _finish_jobs(db, user_id, error)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Failed to record enrichment for user %s: %s", user_id, e)
+        finally:
+            db.close()
+            with _running_lock:
+                _running.discard(user_id)
+    return enriched
@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime
+from typing import Iterator, List
+from uuid import UUID
+from sqlalchemy import and_, select
+from app.core.config import EXPORT_BATCH_SIZE
+from app.schemas.journals_schema import Journal
+from app.schemas.affirmations_schema import Affirmation
+from app.services.db import SessionLocal
+from app.utils.encryption_utils import decrypt_data
+
+CSV_FIELDS = [
+    "id",
+    "title",
+    "content",
+    "created_at",
+    "sentiment_label",
+    "sentiment_score",
+    "input_summary",
+    "affirmations",
+]
+
+
+def _decrypt_batch(rows, user_id: UUID) -> List[dict]:
+    """
+    Decrypt one batch of (journal, affirmation) column rows into export
+    records. A journal with several affirmation rows arrives as consecutive
+    rows and is merged into one record.
+    """
+    records = []
+    for row in rows:
+        affirmations = []
+        if row.affirmations:
+            try:
+                affirmations = json.loads(decrypt_data(row.affirmations, user_id))
+            except json.JSONDecodeError:
+                affirmations = []
+        if records and records[-1]["id"] == str(row.id):
+            records[-1]["affirmations"].extend(affirmations)
+            continue
+        records.append(
+            {
+                "id": str(row.id),
+                "title": decrypt_data(row.title, user_id),
+                "content": decrypt_data(row.content, user_id),
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "sentiment_label": row.sentiment_label,
+                "sentiment_score": row.sentiment_score,
+                "input_summary": (
+                    decrypt_data(row.input_summary, user_id) if row.input_summary else None
+                ),
+                "affirmations": affirmations,
+            }
+        )
+    return records
+
+
+def iter_export_batches(user_id: UUID) -> Iterator[List[dict]]:
+    """
+    Yield a user's decrypted journals EXPORT_BATCH_SIZE rows at a time.
+
+    The query runs on a server-side cursor (`yield_per` turns on
+    `stream_results`), so peak memory is one batch no matter how long the
+    history is. The session is opened here rather than taken from a
+    dependency because the generator outlives the request handler.
+    """
+    stmt = (
+        select(
+            Journal.id,
+            Journal.title,
+            Journal.content,
+            Journal.created_at,
+            Journal.sentiment_label,
+            Journal.sentiment_score,
+            Affirmation.input_summary,
+            Affirmation.affirmations,
+        )
+        .outerjoin(
+            Affirmation,
+            and_(Affirmation.journal_id == Journal.id, Affirmation.user_id == Journal.user_id),
+        )
+        .where(Journal.user_id == user_id)
+        .order_by(Journal.created_at.desc(), Journal.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    db = SessionLocal()
+    try:
+        carry = []
+        for partition in db.execute(stmt).partitions():
+            rows = carry + list(partition)
+            records = _decrypt_batch(rows, user_id)
+            # The last journal may have more affirmation rows in the next partition
+            carry = [row for row in rows if str(row.id) == records[-1]["id"]]
+            if len(records) > 1:
+                yield records[:-1]
+        if carry:
+            yield _decrypt_batch(carry, user_id)
+    finally:
+        db.close()
+
+
+def _ndjson_lines(records: List[dict]) -> str:
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+def stream_ndjson(user_id: UUID) -> Iterator[bytes]:
+    for records in iter_export_batches(user_id):
+        yield _ndjson_lines(records).encode()
+
+
+def stream_csv(user_id: UUID) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for records in iter_export_batches(user_id):
+        for record in records:
+            writer.writerow(
+                {**record, "affirmations": json.dumps(record["affirmations"])}
+            )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ZipSink:
+    """
+    Write-only file object for zipfile. It has no tell()/seek(), so zipfile
+    writes data descriptors and never needs to go back over earlier output.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(user_id: UUID) -> Iterator[bytes]:
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        info = zipfile.ZipInfo("journals.ndjson", date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, mode="w", force_zip64=True) as entry:
+            for records in iter_export_batches(user_id):
+                entry.write(_ndjson_lines(records).encode())
+                yield sink.drain()
+    yield sink.drain()
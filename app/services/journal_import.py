@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from typing import List
+from uuid import UUID, uuid4
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.schemas.journals_schema import Journal
+from app.schemas.import_job_schema import ImportJob
+from app.schemas.search_token_schema import JournalSearchToken
+from app.services.journal_version import bump_journal_version
+from app.services.search_index import token_rows
+from app.utils.encryption_utils import encrypt_data, content_fingerprint
+from app.utils.import_utils import ImportRecord, parse_import_record
+from app.utils.local_sentiment_utils import analyze_sentiments_locally
+
+
+def import_batch(
+    db: Session, job: ImportJob, user_id: UUID, records: List[ImportRecord]
+) -> None:
+    """
+    Validate, encrypt and insert one batch of imported entries in a single
+    transaction, and update the job counters in the same commit.
+
+    Rows get a local sentiment estimate and are flagged `sentiment_pending`
+    so the enrichment job can replace it with an LLM result later.
+    """
+    rows = []
+    tokens = []
+    failed = 0
+    error = None
+    now = datetime.now(timezone.utc)
+    for index, record in enumerate(records, start=job.rows_received + 1):
+        try:
+            entry = parse_import_record(record)
+        except ValidationError as e:
+            failed += 1
+            # Only field names and reasons; the input values are plaintext
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first["loc"]) or "row"
+            error = f"Row {index}: {field}: {first['msg']}"
+            continue
+        except ValueError:
+            failed += 1
+            error = f"Row {index}: invalid record"
+            continue
+        if not entry.content.strip():
+            failed += 1
+            error = f"Row {index}: Journal content cannot be empty"
+            continue
+        sentiment = analyze_sentiments_locally(entry.content)
+        journal_id = uuid4()
+        tokens.extend(token_rows(user_id, journal_id, entry.title, entry.content))
+        rows.append(
+            {
+                "id": journal_id,
+                "title": encrypt_data(entry.title, user_id),
+                "content": encrypt_data(entry.content, user_id),
+                "user_id": user_id,
+                "sentiment_label": sentiment.label,
+                "sentiment_score": sentiment.probability,
+                "created_at": entry.created_at or now,
+                "sentiment_pending": True,
+                "content_fingerprint": content_fingerprint(entry.content, user_id),
+            }
+        )
+    try:
+        if rows:
+            # executemany; batched into multi-row INSERTs by the driver
+            db.execute(insert(Journal), rows)
+            if tokens:
+                db.execute(insert(JournalSearchToken), tokens)
+        job.rows_received += len(records)
+        job.rows_imported += len(rows)
+        job.rows_failed += failed
+        if error:
+            job.error = error
+        if rows:
+            bump_journal_version(db, user_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,103 @@
+import json
+from collections import defaultdict
+from typing import List
+from uuid import UUID
+from sqlalchemy import and_, desc, select
+from sqlalchemy.orm import Session
+from app.models.read_models import AffirmationView, JournalView, SentimentPoint
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.journals_schema import Journal
+from app.utils.encryption_utils import decrypt_data
+
+
+def decrypt_affirmation_list(encrypted: str, user_id: UUID) -> List[str]:
+    try:
+        return json.loads(decrypt_data(encrypted, user_id))
+    except json.JSONDecodeError:
+        return []
+
+
+def load_journal_views(db: Session, user_id: UUID, *criteria) -> List[JournalView]:
+    """
+    Load and decrypt the user's journals matching `criteria`, newest first.
+
+    Only the columns the response needs are selected and input summaries
+    are never decrypted.
+
+    Args:
+        db (Session): The DB session.
+        user_id (UUID): The owner of the journals.
+        *criteria: Extra filters on Journal columns, e.g. `Journal.id.in_(ids)`.
+
+    Returns:
+        List[JournalView]: The decrypted journals with their affirmations.
+    """
+    rows = db.execute(
+        select(
+            Journal.id,
+            Journal.title,
+            Journal.content,
+            Journal.sentiment_label,
+            Journal.sentiment_score,
+            Journal.created_at,
+        )
+        .where(Journal.user_id == user_id, *criteria)
+        .order_by(desc(Journal.created_at))
+    ).all()
+    affirmations = defaultdict(list)
+    affirmation_rows = db.execute(
+        select(Affirmation.journal_id, Affirmation.id, Affirmation.affirmations)
+        .join(
+            Journal,
+            and_(Journal.id == Affirmation.journal_id, Journal.user_id == Affirmation.user_id),
+        )
+        .where(
+            Affirmation.user_id == user_id,
+            Journal.user_id == user_id,
+            Affirmation.affirmations.isnot(None),
+            *criteria,
+        )
+    )
+    for journal_id, affirmation_id, encrypted in affirmation_rows:
+        affirmations[journal_id].append(
+            AffirmationView(affirmation_id, decrypt_affirmation_list(encrypted, user_id))
+        )
+    return [
+        JournalView(
+            content=decrypt_data(content, user_id),
+            sentiment_label=sentiment_label,
+            created_at=created_at,
+            title=decrypt_data(title, user_id),
+            id=journal_id,
+            sentiment_score=sentiment_score,
+            affirmations=affirmations.get(journal_id, []),
+        )
+        for journal_id, title, content, sentiment_label, sentiment_score, created_at in rows
+    ]
+
+
+def load_sentiment_points(db: Session, user_id: UUID) -> List[SentimentPoint]:
+    """
+    Load the user's sentiment series, oldest first, with decrypted titles.
+    """
+    rows = db.execute(
+        select(
+            Journal.id,
+            Journal.title,
+            Journal.created_at,
+            Journal.sentiment_label,
+            Journal.sentiment_score,
+        )
+        .where(Journal.user_id == user_id)
+        .order_by(Journal.created_at.asc())
+    )
+    return [
+        SentimentPoint(
+            entry_id=journal_id,
+            title=decrypt_data(title, user_id),
+            timestamp=created_at,
+            sentiment_label=sentiment_label,
+            sentiment_score=sentiment_score,
+        )
+        for journal_id, title, created_at, sentiment_label, sentiment_score in rows
+    ]
@@ -0,0 +1,39 @@
+from uuid import UUID
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.schemas.user_schema import User
+from app.services.db import ReadSession, replicas
+from app.utils.metrics_utils import increment
+
+
+def bump_journal_version(db: Session, user_id: UUID) -> None:
+    """
+    Increment the user's journals_version. Call inside the transaction that
+    writes their journals or affirmations, before committing, so the new
+    version becomes visible together with the data.
+
+    The row lock taken here also orders concurrent writers for the same
+    user, so every committed change gets a distinct version. Their reads
+    go to the primary for the read-your-writes window.
+    """
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(journals_version=User.journals_version + 1)
+    )
+    replicas.note_write(user_id)
+
+
+def ensure_read_version(db: ReadSession, user_id: UUID, version: int) -> None:
+    """
+    Move a replica-backed read session to the primary if the replica has not
+    replayed the user's writes up to `version` yet. Without this, a lagging
+    replica could answer (and fill the response cache) with stale journals
+    under the current ETag, e.g. when the write went through another worker.
+    """
+    if not db.uses_replica():
+        return
+    seen = db.scalar(select(User.journals_version).where(User.id == user_id))
+    if seen is None or seen < version:
+        increment("db.read.replica_behind")
+        db.use_primary()
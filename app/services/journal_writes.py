@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.journals import AffirmationsResult, SentimentResult
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.journals_schema import Journal
+from app.services.journal_version import bump_journal_version
+from app.services.search_index import index_journal
+from app.utils.encryption_utils import encrypt_data, content_fingerprint
+
+
+def insert_journal(
+    db: Session,
+    user_id: UUID,
+    title: str,
+    content: str,
+    sentiment: SentimentResult,
+    affirmations: Optional[AffirmationsResult] = None,
+    created_at: Optional[datetime] = None,
+) -> Tuple[UUID, datetime]:
+    """
+    Encrypt and insert a new journal with its affirmations and search tokens,
+    in the caller's transaction; the caller commits.
+
+    Ids are generated here, so nothing has to be flushed or refreshed to
+    learn them, and the server-side created_at comes back via RETURNING.
+    All LLM work should already be done, so the connection is only held for
+    these few statements.
+
+    Returns:
+        (UUID, datetime): The new journal's id and created_at.
+    """
+    journal_id = uuid4()
+    values = {
+        "id": journal_id,
+        "title": encrypt_data(title, user_id),
+        "content": encrypt_data(content, user_id),
+        "user_id": user_id,
+        "sentiment_label": sentiment.label,
+        "sentiment_score": round(sentiment.probability, 2),
+        "content_fingerprint": content_fingerprint(content, user_id),
+    }
+    if created_at is not None:
+        values["created_at"] = created_at
+    stored_created_at = db.execute(
+        insert(Journal).values(**values).returning(Journal.created_at)
+    ).scalar_one()
+    if affirmations:
+        db.execute(
+            insert(Affirmation).values(
+                id=uuid4(),
+                journal_id=journal_id,
+                user_id=user_id,
+                input_summary=encrypt_data(affirmations.input_summary, user_id),
+                affirmations=encrypt_data(
+                    json.dumps(affirmations.affirmations, indent=2), user_id
+                ),
+            )
+        )
+    index_journal(db, user_id, journal_id, title, content)
+    bump_journal_version(db, user_id)
+    return journal_id, stored_created_at
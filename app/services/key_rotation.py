@@ -0,0 +1,181 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.data_key_schema import UserDataKey
+from app.schemas.journals_schema import Journal
+from app.services import data_keys
+
+
+class _Throttle:
+    """Sleeps between batches so the job never exceeds `rows_per_second`."""
+
+    def __init__(self, rows_per_second: float):
+        self._rows_per_second = rows_per_second
+        self._started = time.monotonic()
+        self._rows = 0
+
+    def wait(self, rows: int) -> None:
+        if self._rows_per_second <= 0:
+            return
+        self._rows += rows
+        ahead = self._rows / self._rows_per_second - (time.monotonic() - self._started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def rotate_user_key(db: Session, user_id: UUID) -> None:
+    """
+    Give the user a new active data key. Older keys are retired (no longer
+    used to encrypt) but kept for decryption until their rows are rotated.
+    """
+    db.query(UserDataKey).filter(
+        UserDataKey.user_id == user_id, UserDataKey.retired_at.is_(None)
+    ).update({UserDataKey.retired_at: datetime.now(timezone.utc)})
+    db.add(data_keys.new_data_key(user_id))
+    db.commit()
+    data_keys.cache.invalidate(user_id)
+
+
+def _rotate_token(cipher, ciphertext: Optional[bytes]) -> Optional[bytes]:
+    if not ciphertext:
+        return ciphertext
+    return data_keys.from_token(cipher.rotate(data_keys.to_token(ciphertext)))
+
+
+def reencrypt_user_rows(
+    db: Session,
+    user_id: UUID,
+    batch_size: int = 200,
+    rows_per_second: float = 500,
+) -> int:
+    """
+    Re-encrypt a user's journals and affirmations under their active data key.
+
+    Rows are read in keyset-ordered batches (`id > last_id`), and each batch
+    is written in its own short transaction, then the job sleeps to stay
+    under `rows_per_second`. No table locks are taken.
+
+    Each UPDATE is guarded by the old ciphertext, so if the user edits a row
+    mid-rotation, the new write wins and is not overwritten.
+
+    Returns:
+        int: The number of rows re-encrypted.
+    """
+    cipher = data_keys.get_user_cipher(user_id)
+    throttle = _Throttle(rows_per_second)
+    rotated = 0
+
+    journals = Journal.__table__
+    journal_update = (
+        update(journals)
+        .where(
+            journals.c.id == bindparam("b_id"),
+            journals.c.user_id == user_id,
+            journals.c.title == bindparam("b_old_title"),
+            journals.c.content == bindparam("b_old_content"),
+        )
+        .values(title=bindparam("b_title"), content=bindparam("b_content"))
+    )
+    last_id = None
+    while True:
+        stmt = select(Journal.id, Journal.title, Journal.content).where(
+            Journal.user_id == user_id
+        )
+        if last_id is not None:
+            stmt = stmt.where(Journal.id > last_id)
+        rows = db.execute(stmt.order_by(Journal.id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        db.execute(
+            journal_update,
+            [
+                {
+                    "b_id": row.id,
+                    "b_old_title": row.title,
+                    "b_old_content": row.content,
+                    "b_title": _rotate_token(cipher, row.title),
+                    "b_content": _rotate_token(cipher, row.content),
+                }
+                for row in rows
+            ],
+        )
+        db.commit()
+        rotated += len(rows)
+        throttle.wait(len(rows))
+
+    affirmations = Affirmation.__table__
+    affirmation_update = (
+        update(affirmations)
+        .where(
+            affirmations.c.id == bindparam("b_id"),
+            affirmations.c.user_id == user_id,
+            affirmations.c.affirmations == bindparam("b_old_affirmations"),
+        )
+        .values(
+            input_summary=bindparam("b_input_summary"),
+            affirmations=bindparam("b_affirmations"),
+        )
+    )
+    last_id = None
+    while True:
+        stmt = (
+            select(Affirmation.id, Affirmation.input_summary, Affirmation.affirmations)
+            .where(Affirmation.user_id == user_id)
+        )
+        if last_id is not None:
+            stmt = stmt.where(Affirmation.id > last_id)
+        rows = db.execute(stmt.order_by(Affirmation.id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        db.execute(
+            affirmation_update,
+            [
+                {
+                    "b_id": row.id,
+                    "b_old_affirmations": row.affirmations,
+                    "b_input_summary": _rotate_token(cipher, row.input_summary),
+                    "b_affirmations": _rotate_token(cipher, row.affirmations),
+                }
+                for row in rows
+            ],
+        )
+        db.commit()
+        rotated += len(rows)
+        throttle.wait(len(rows))
+    return rotated
+
+
+def rewrap_data_keys(db: Session, batch_size: int = 500) -> int:
+    """
+    Re-wrap every data key under the current master key (after adding a new
+    master key to MASTER_KEYS). Only the small key table is touched.
+
+    Returns:
+        int: The number of keys re-wrapped.
+    """
+    rewrapped = 0
+    last_id = None
+    while True:
+        query = db.query(UserDataKey).filter(
+            UserDataKey.master_key_id != data_keys.CURRENT_MASTER_KEY_ID
+        )
+        if last_id is not None:
+            query = query.filter(UserDataKey.id > last_id)
+        keys = query.order_by(UserDataKey.id).limit(batch_size).all()
+        if not keys:
+            break
+        last_id = keys[-1].id
+        for key in keys:
+            key.wrapped_key = data_keys.master_cipher.rotate(
+                key.wrapped_key.encode()
+            ).decode()
+            key.master_key_id = data_keys.CURRENT_MASTER_KEY_ID
+        db.commit()
+        rewrapped += len(keys)
+    return rewrapped
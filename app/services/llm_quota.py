@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, Tuple
+from uuid import UUID
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import (
+    LLM_DAILY_TOKEN_BUDGET,
+    LLM_USAGE_FLUSH_BATCH,
+    LLM_USAGE_FLUSH_INTERVAL,
+)
+from app.schemas.llm_usage_schema import LLMUsage
+from app.services.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+UsageKey = Tuple[UUID, date]
+
+
+class UsageAccumulator:
+    """
+    Per-user daily LLM usage, counted in memory and written to `llm_usage` in
+    batches.
+
+    `_pending` holds deltas that have not been flushed yet; `_totals` holds the
+    best known total for each (user, day) so quota checks never need a query
+    after the first one of the day.
+    """
+
+    def __init__(self, flush_batch: int, flush_interval: int):
+        self._flush_batch = flush_batch
+        self._flush_interval = flush_interval
+        self._pending: Dict[UsageKey, List[int]] = {}
+        self._totals: Dict[UsageKey, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(timezone.utc).date()
+
+    def record(self, user_id: UUID, input_tokens: int, output_tokens: int) -> None:
+        """
+        Add one provider call to the user's counters for today.
+        """
+        key = (user_id, self._today())
+        with self._lock:
+            pending = self._pending.setdefault(key, [0, 0, 0])
+            pending[0] += input_tokens
+            pending[1] += output_tokens
+            pending[2] += 1
+            if key in self._totals:
+                self._totals[key] += input_tokens + output_tokens
+            due = (
+                len(self._pending) >= self._flush_batch
+                or time.monotonic() - self._last_flush >= self._flush_interval
+            )
+        if due and not self._flush_lock.locked():
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def tokens_used_today(self, user_id: UUID) -> int:
+        """
+        Return the user's total tokens for today, loading the flushed value
+        from the DB the first time the user is seen today.
+        """
+        key = (user_id, self._today())
+        with self._lock:
+            if key in self._totals:
+                return self._totals[key]
+        db = SessionLocal()
+        try:
+            row = db.get(LLMUsage, {"user_id": user_id, "day": key[1]})
+            stored = (row.input_tokens + row.output_tokens) if row else 0
+        finally:
+            db.close()
+        with self._lock:
+            if key not in self._totals:
+                pending = self._pending.get(key, [0, 0, 0])
+                self._totals[key] = stored + pending[0] + pending[1]
+            return self._totals[key]
+
+    def within_budget(self, user_id: UUID) -> bool:
+        """
+        Return True if the user may make another provider call today.
+        """
+        if LLM_DAILY_TOKEN_BUDGET <= 0:
+            return True
+        return self.tokens_used_today(user_id) < LLM_DAILY_TOKEN_BUDGET
+
+    def flush(self) -> None:
+        """
+        Write all pending counters in one upsert and drop totals for past days.
+        Failed flushes are merged back so no usage is lost.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+                today = self._today()
+                self._totals = {k: v for k, v in self._totals.items() if k[1] == today}
+            if not pending:
+                return
+            rows = [
+                {
+                    "user_id": user_id,
+                    "day": day,
+                    "input_tokens": counts[0],
+                    "output_tokens": counts[1],
+                    "calls": counts[2],
+                }
+                for (user_id, day), counts in pending.items()
+            ]
+            stmt = insert(LLMUsage).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LLMUsage.user_id, LLMUsage.day],
+                set_={
+                    "input_tokens": LLMUsage.input_tokens + stmt.excluded.input_tokens,
+                    "output_tokens": LLMUsage.output_tokens + stmt.excluded.output_tokens,
+                    "calls": LLMUsage.calls + stmt.excluded.calls,
+                },
+            )
+            db = SessionLocal()
+            try:
+                db.execute(stmt)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning("Failed to flush LLM usage counters: %s", e)
+                with self._lock:
+                    for key, counts in pending.items():
+                        merged = self._pending.setdefault(key, [0, 0, 0])
+                        for i in range(3):
+                            merged[i] += counts[i]
+            finally:
+                db.close()
+
+
+usage = UsageAccumulator(LLM_USAGE_FLUSH_BATCH, LLM_USAGE_FLUSH_INTERVAL)
@@ -0,0 +1,248 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import MOOD_CHANGE_THRESHOLD, MOOD_CHANGE_WINDOW, MOOD_EWMA_SPAN
+from app.schemas.journals_schema import Journal
+
+DAY_SECONDS = 86_400
+# 1970-01-01 was a Thursday
+EPOCH_WEEKDAY = 3
+# Floor on the standard deviation used to score change points, so a shift
+# between two near-constant stretches needs to be a real shift in mood
+MIN_CHANGE_STD = 10.0
+_SIGNS = {"pos": 1.0, "neg": -1.0}
+
+
+class MoodSeries(NamedTuple):
+    seconds: np.ndarray  # int64 local time, seconds since the epoch
+    mood: np.ndarray  # float64 sentiment score signed by label, -100..100
+
+
+def _epoch_seconds(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def load_mood_series(
+    db: Session,
+    user_id: UUID,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    utc_offset: int = 0,
+) -> MoodSeries:
+    """
+    Load the user's analyzed entries between the local dates `start` and
+    `end` (inclusive) as NumPy arrays, oldest first. Only timestamps,
+    labels and scores are read, so nothing is decrypted.
+
+    Args:
+        utc_offset (int): Minutes east of UTC of the user's local time.
+    """
+    offset = timedelta(minutes=utc_offset)
+    query = select(Journal.created_at, Journal.sentiment_label, Journal.sentiment_score).where(
+        Journal.user_id == user_id, Journal.sentiment_pending == False
+    )
+    if start is not None:
+        query = query.where(
+            Journal.created_at >= datetime.combine(start, time.min, timezone.utc) - offset
+        )
+    if end is not None:
+        query = query.where(
+            Journal.created_at
+            < datetime.combine(end + timedelta(days=1), time.min, timezone.utc) - offset
+        )
+    rows = db.execute(query.order_by(Journal.created_at.asc())).all()
+    count = len(rows)
+    seconds = np.fromiter((_epoch_seconds(row[0]) for row in rows), np.int64, count)
+    signs = np.fromiter((_SIGNS.get(row[1][:3].lower(), 0.0) for row in rows), np.float64, count)
+    scores = np.fromiter((row[2] for row in rows), np.float64, count)
+    return MoodSeries(seconds + utc_offset * 60, signs * scores)
+
+
+def _rounded(values: np.ndarray) -> List[Optional[float]]:
+    """Round to 2 decimals for JSON, with NaN as None."""
+    return [None if v != v else v for v in np.round(values, 2).tolist()]
+
+
+def _group_mean(groups: np.ndarray, values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    counts = np.bincount(groups, minlength=size)
+    sums = np.bincount(groups, weights=values, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan), counts
+
+
+def _trailing_mean(values: np.ndarray, present: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the present values among each day and the `window - 1` before it."""
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    n = counts[upper] - counts[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (sums[upper] - sums[lower]) / n, np.nan)
+
+
+def _ewma(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    y[0] = x[0], y[t] = (1 - alpha) * y[t-1] + alpha * x[t], in closed form:
+    within a block, y[s+k] = d^k * (d * y[s-1] + alpha * sum_j<=k x[s+j] / d^j)
+    with d = 1 - alpha. Blocks are short enough that d^-k stays far from
+    overflow.
+    """
+    out = np.empty_like(values)
+    if not len(values):
+        return out
+    decay = 1.0 - alpha
+    block = max(1, int(50 / -np.log(decay))) if decay > 0 else 1
+    powers = decay ** np.arange(min(block, len(values)))
+    previous = values[0]
+    for start in range(0, len(values), block):
+        segment = values[start : start + block]
+        p = powers[: len(segment)]
+        out[start : start + block] = p * (decay * previous + alpha * np.cumsum(segment / p))
+        previous = out[start + len(segment) - 1]
+    return out
+
+
+def _runs(flags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indexes of each run of True."""
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _change_points(
+    values: np.ndarray, window: int, threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score every split of `values` by how far the mean of the next `window`
+    values is from the mean of the previous `window`, in standard errors of
+    the difference. Returns (index, before, after, score) of the splits
+    scoring at least `threshold` that are also the best within `window`.
+    """
+    n = len(values)
+    if window < 1 or n < 2 * window:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty, empty
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    squares = np.concatenate(([0.0], np.cumsum(values * values)))
+    split = np.arange(window, n - window + 1)
+    before = (sums[split] - sums[split - window]) / window
+    after = (sums[split + window] - sums[split]) / window
+    variance = (
+        (squares[split + window] - squares[split - window]) / (2 * window)
+        - (before * before + after * after) / 2
+    )
+    error = np.sqrt(np.maximum(variance, MIN_CHANGE_STD**2) * 2 / window)
+    score = np.abs(after - before) / error
+    padded = np.pad(score, window - 1, constant_values=-np.inf)
+    best_nearby = sliding_window_view(padded, 2 * window - 1).max(axis=1)
+    keep = (score >= threshold) & (score == best_nearby)
+    return split[keep], before[keep], after[keep], score[keep]
+
+
+def _seasonality(seconds: np.ndarray, mood: np.ndarray) -> Dict[str, Any]:
+    weekday = (seconds // DAY_SECONDS + EPOCH_WEEKDAY) % 7
+    hour = seconds // 3600 % 24
+    weekday_mean, weekday_counts = _group_mean(weekday, mood, 7)
+    hour_mean, hour_counts = _group_mean(hour, mood, 24)
+    return {
+        "weekday": _rounded(weekday_mean),
+        "weekday_entries": weekday_counts.tolist(),
+        "hour": _rounded(hour_mean),
+        "hour_entries": hour_counts.tolist(),
+    }
+
+
+def compute_mood_trends(
+    series: MoodSeries,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    ewma_span: int = MOOD_EWMA_SPAN,
+    change_window: int = MOOD_CHANGE_WINDOW,
+    change_threshold: float = MOOD_CHANGE_THRESHOLD,
+) -> Dict[str, Any]:
+    """
+    Daily mood with 7- and 30-day moving averages and an EWMA, streaks of
+    consecutive days whose mean mood is negative, mood by weekday and hour,
+    and change points in the daily series. Shaped like MoodTrendsResponse.
+
+    Days run from the first to the last day with entries; days without
+    entries have no mood and end a streak. Change points and the EWMA are
+    computed over days with entries only.
+    """
+    seconds, mood = series
+    result = {
+        "start": start,
+        "end": end,
+        "entries": len(mood),
+        "mood": round(float(mood.mean()), 2) if len(mood) else None,
+        "days": [],
+        "current_negative_streak": 0,
+        "longest_negative_streak": None,
+        "seasonality": _seasonality(seconds, mood),
+        "change_points": [],
+    }
+    if not len(mood):
+        return result
+
+    day = seconds // DAY_SECONDS
+    first_day = int(day.min())
+    day_index = day - first_day
+    day_count = int(day_index.max()) + 1
+    dates = (
+        np.datetime64(first_day, "D") + np.arange(day_count).astype("timedelta64[D]")
+    ).tolist()
+    daily, entries = _group_mean(day_index, mood, day_count)
+    present = entries > 0
+
+    ewma = np.full(day_count, np.nan)
+    ewma[present] = _ewma(daily[present], 2.0 / (ewma_span + 1))
+    columns = zip(
+        dates,
+        entries.tolist(),
+        _rounded(daily),
+        _rounded(_trailing_mean(daily, present, 7)),
+        _rounded(_trailing_mean(daily, present, 30)),
+        _rounded(ewma),
+    )
+    result["days"] = [
+        {
+            "date": day_date,
+            "entries": count,
+            "mood": day_mood,
+            "moving_average_7": average_7,
+            "moving_average_30": average_30,
+            "ewma": day_ewma,
+        }
+        for day_date, count, day_mood, average_7, average_30, day_ewma in columns
+    ]
+
+    starts, ends = _runs(present & (np.where(present, daily, 0.0) < 0))
+    if len(starts):
+        lengths = ends - starts
+        longest = int(np.argmax(lengths))
+        result["longest_negative_streak"] = {
+            "start": dates[starts[longest]],
+            "end": dates[ends[longest] - 1],
+            "days": int(lengths[longest]),
+        }
+        if ends[-1] == day_count:
+            result["current_negative_streak"] = int(lengths[-1])
+
+    present_days = np.flatnonzero(present)
+    split, before, after, score = _change_points(daily[present], change_window, change_threshold)
+    result["change_points"] = [
+        {"date": dates[present_days[i]], "before": b, "after": a, "score": s}
+        for i, b, a, s in zip(
+            split.tolist(),
+            np.round(before, 2).tolist(),
+            np.round(after, 2).tolist(),
+            np.round(score, 2).tolist(),
+        )
+    ]
+    return result
@@ -0,0 +1,269 @@
+import hmac
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import (
+    OTP_FAILURE_WINDOW_MINUTES,
+    OTP_MAX_ATTEMPTS,
+    OTP_MAX_FAILURES,
+    OTP_PURGE_BATCH_SIZE,
+    OTP_RESEND_SECONDS,
+    OTP_TTL_MINUTES,
+)
+from app.schemas.password_reset_otp_schema import PasswordResetFailure, PasswordResetOtp
+from app.services.db import SessionLocal
+from app.utils.encryption_utils import keyed_hash
+from app.utils.metrics_utils import increment
+
+
+class _Counters:
+    """
+    Per-user counters in this worker's memory that reset `ttl` seconds
+    after the first increment. Lets repeated requests be refused without a
+    DB round trip; the DB row stays authoritative across workers.
+    """
+
+    def __init__(self, ttl: float):
+        self._ttl = ttl
+        self._entries: Dict[UUID, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: UUID) -> int:
+        count, expires = self._entries.get(key, (0, 0.0))
+        return count if expires > time.monotonic() else 0
+
+    def add(self, key: UUID) -> None:
+        now = time.monotonic()
+        with self._lock:
+            count, expires = self._entries.get(key, (0, 0.0))
+            if expires <= now:
+                count, expires = 0, now + self._ttl
+            self._entries[key] = (count + 1, expires)
+            if len(self._entries) > 10_000:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+
+    def clear(self, key: UUID) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# INSERT ... ON CONFLICT per backend: PostgreSQL in production, SQLite in
+# the tests
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+_recent_codes = _Counters(OTP_RESEND_SECONDS)
+# Per account, across codes: a new code does not reset it
+_failures = _Counters(OTP_FAILURE_WINDOW_MINUTES * 60)
+FAILURE_WINDOW = timedelta(minutes=OTP_FAILURE_WINDOW_MINUTES)
+
+
+def _hash_code(code: str, user_id: UUID) -> bytes:
+    # Keyed, so a leaked table can't be brute-forced over the 10^6 codes
+    return keyed_hash(code.strip(), f"otp:{user_id}", length=32)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _locked_out(db: Session, user_id: UUID, now: datetime) -> bool:
+    """
+    Whether the account has OTP_MAX_FAILURES failed checks in its current
+    failure window, in this worker's memory or in the DB.
+    """
+    if _failures.get(user_id) >= OTP_MAX_FAILURES:
+        return True
+    failures = db.execute(
+        select(PasswordResetFailure.failures).where(
+            PasswordResetFailure.user_id == user_id,
+            PasswordResetFailure.window_started_at > now - FAILURE_WINDOW,
+        )
+    ).scalar()
+    return failures is not None and failures >= OTP_MAX_FAILURES
+
+
+def _record_failure(db: Session, user_id: UUID, now: datetime) -> None:
+    """
+    Count a failed check in the account's window, starting a new one if it
+    ended. A single upsert, so concurrent failures are all counted; it needs
+    INSERT ... ON CONFLICT, which only the PostgreSQL and SQLite dialects
+    are wired up for.
+    """
+    _failures.add(user_id)
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"Password reset throttling does not support {dialect}")
+    expired = PasswordResetFailure.window_started_at <= now - FAILURE_WINDOW
+    stmt = _UPSERT_INSERTS[dialect](PasswordResetFailure).values(
+        user_id=user_id, failures=1, window_started_at=now
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[PasswordResetFailure.user_id],
+            set_={
+                "failures": case((expired, 1), else_=PasswordResetFailure.failures + 1),
+                "window_started_at": case(
+                    (expired, now), else_=PasswordResetFailure.window_started_at
+                ),
+            },
+        )
+    )
+
+
+def issue_otp(db: Session, user_id: UUID) -> Optional[str]:
+    """
+    Create a 6-digit reset code for the user, replacing any previous one,
+    and commit.
+
+    Returns:
+        Optional[str]: The code to send, or None if the user got a code less
+        than OTP_RESEND_SECONDS ago or has too many failed checks in the
+        failure window.
+    """
+    now = datetime.now(timezone.utc)
+    if _locked_out(db, user_id, now):
+        increment("password_reset.locked_out")
+        return None
+    if _recent_codes.get(user_id):
+        increment("password_reset.resend_throttled")
+        return None
+    last_issued = db.execute(
+        select(PasswordResetOtp.created_at)
+        .where(PasswordResetOtp.user_id == user_id)
+        .order_by(PasswordResetOtp.created_at.desc())
+        .limit(1)
+    ).scalar()
+    if last_issued is not None and now - _as_utc(last_issued) < timedelta(
+        seconds=OTP_RESEND_SECONDS
+    ):
+        increment("password_reset.resend_throttled")
+        return None
+
+    code = f"{secrets.randbelow(1_000_000):06d}"
+    db.execute(delete(PasswordResetOtp).where(PasswordResetOtp.user_id == user_id))
+    db.execute(
+        insert(PasswordResetOtp).values(
+            id=uuid4(),
+            user_id=user_id,
+            code_hash=_hash_code(code, user_id),
+            created_at=now,
+            expires_at=now + timedelta(minutes=OTP_TTL_MINUTES),
+        )
+    )
+    db.commit()
+    _recent_codes.add(user_id)
+    return code
+
+
+def consume_otp(db: Session, user_id: UUID, code: str) -> bool:
+    """
+    Check a reset code in constant time.
+
+    A match deletes the code and the account's failure count in the
+    caller's transaction, so they are used up together with the password
+    change the caller commits. A miss counts an attempt against the code
+    and the account and commits; the code is deleted after OTP_MAX_ATTEMPTS
+    misses, and no code is checked after OTP_MAX_FAILURES misses in the
+    account's failure window.
+
+    Returns:
+        bool: Whether the code was valid.
+    """
+    now = datetime.now(timezone.utc)
+    if _locked_out(db, user_id, now):
+        increment("password_reset.attempts_throttled")
+        return False
+    row = db.execute(
+        select(PasswordResetOtp.id, PasswordResetOtp.code_hash)
+        .where(
+            PasswordResetOtp.user_id == user_id,
+            PasswordResetOtp.expires_at > now,
+            PasswordResetOtp.attempts < OTP_MAX_ATTEMPTS,
+        )
+        .order_by(PasswordResetOtp.created_at.desc())
+        .limit(1)
+    ).first()
+    if row is None:
+        return False
+
+    if hmac.compare_digest(row.code_hash, _hash_code(code, user_id)):
+        # Guarded, so two concurrent requests can't both use the same code
+        consumed = db.execute(
+            delete(PasswordResetOtp)
+            .where(
+                PasswordResetOtp.id == row.id,
+                PasswordResetOtp.attempts < OTP_MAX_ATTEMPTS,
+            )
+            .returning(PasswordResetOtp.id)
+        ).first()
+        if consumed is not None:
+            db.execute(
+                delete(PasswordResetFailure).where(PasswordResetFailure.user_id == user_id)
+            )
+            _failures.clear(user_id)
+            return True
+        return False
+
+    _record_failure(db, user_id, now)
+    increment("password_reset.failed_attempt")
+    attempts = db.execute(
+        update(PasswordResetOtp)
+        .where(PasswordResetOtp.id == row.id)
+        .values(attempts=PasswordResetOtp.attempts + 1)
+        .returning(PasswordResetOtp.attempts)
+    ).scalar()
+    if attempts is not None and attempts >= OTP_MAX_ATTEMPTS:
+        db.execute(delete(PasswordResetOtp).where(PasswordResetOtp.id == row.id))
+    db.commit()
+    return False
+
+
+def purge_expired_otps(
+    batch_size: int = OTP_PURGE_BATCH_SIZE, max_batches: Optional[int] = None
+) -> int:
+    """
+    Delete expired reset codes, `batch_size` rows per transaction, so the
+    purge never holds many row locks at once, then failure counts whose
+    window has ended.
+
+    Returns:
+        int: The number of codes deleted.
+    """
+    purged = 0
+    batches = 0
+    db = SessionLocal()
+    try:
+        while max_batches is None or batches < max_batches:
+            now = datetime.now(timezone.utc)
+            ids = list(
+                db.execute(
+                    select(PasswordResetOtp.id)
+                    .where(PasswordResetOtp.expires_at <= now)
+                    .limit(batch_size)
+                ).scalars()
+            )
+            if ids:
+                db.execute(delete(PasswordResetOtp).where(PasswordResetOtp.id.in_(ids)))
+            db.commit()
+            purged += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+        # One row per account that recently failed a check, so small
+        db.execute(
+            delete(PasswordResetFailure).where(
+                PasswordResetFailure.window_started_at
+                <= datetime.now(timezone.utc) - FAILURE_WINDOW
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+    return purged
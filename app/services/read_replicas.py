@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.utils.metrics_utils import increment
+
+
+class _Replica:
+    __slots__ = ("engine", "down_until", "checked_at")
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.down_until = 0.0
+        self.checked_at = 0.0
+
+
+class ReplicaSet:
+    """
+    Picks the engine for a read-only session: the next healthy replica in
+    round-robin order, or the primary when there are no replicas, none is
+    healthy, or the user wrote within the read-your-writes window.
+
+    Health is checked lazily: a replica is probed with `SELECT 1` when it
+    is picked and its last probe is older than `health_interval`. A replica
+    that fails a probe or a query is skipped for `health_interval` seconds.
+    Write times are only known to this process; journal reads also compare
+    journals_version (see `app.services.journal_version.ensure_read_version`),
+    which holds across workers.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Engine],
+        health_interval: float,
+        read_your_writes: float,
+    ):
+        self.primary = primary
+        self._replicas = [_Replica(engine) for engine in replicas]
+        self._health_interval = health_interval
+        self._read_your_writes = read_your_writes
+        self._next = 0
+        self._recent_writes: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def note_write(self, user_id: UUID) -> None:
+        """Send the user's reads to the primary for the read-your-writes window."""
+        if not self._replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[user_id] = now + self._read_your_writes
+            if len(self._recent_writes) > 10_000:
+                self._recent_writes = {
+                    user: until for user, until in self._recent_writes.items() if until > now
+                }
+
+    def _recently_wrote(self, user_id: UUID) -> bool:
+        until = self._recent_writes.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def choose(self, user_id: Optional[UUID] = None) -> Engine:
+        if not self._replicas:
+            return self.primary
+        if user_id is not None and self._recently_wrote(user_id):
+            increment("db.read.recent_write")
+            return self.primary
+        for _ in range(len(self._replicas)):
+            with self._lock:
+                replica = self._replicas[self._next]
+                self._next = (self._next + 1) % len(self._replicas)
+            if self._healthy(replica):
+                increment("db.read.replica")
+                return replica.engine
+        increment("db.read.no_replica")
+        return self.primary
+
+    def _healthy(self, replica: _Replica) -> bool:
+        now = time.monotonic()
+        if replica.down_until > now:
+            return False
+        if now - replica.checked_at < self._health_interval:
+            return True
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception:
+            self.mark_down(replica.engine)
+            return False
+        return True
+
+    def mark_down(self, engine: Engine) -> None:
+        """Skip a replica that failed until its next health probe is due."""
+        for replica in self._replicas:
+            if replica.engine is engine:
+                increment("db.read.replica_failure")
+                replica.down_until = time.monotonic() + self._health_interval
+                replica.checked_at = 0.0
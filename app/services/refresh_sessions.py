@@ -0,0 +1,190 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, NamedTuple, Optional
+from uuid import UUID, uuid4
+from sqlalchemy import delete, exists, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_REUSE_GRACE_SECONDS,
+    REFRESH_TOKEN_EXPIRE_MINUTES,
+)
+from app.models.auth import TokenData
+from app.schemas.token_schema import RefreshToken
+from app.schemas.user_schema import User
+from app.services.token_revocation import revoked_sessions
+from app.utils.metrics_utils import increment
+from app.utils.tokens_utils import create_access_token, create_refresh_token
+
+MAX_SESSIONS = 5
+
+
+class SessionTokens(NamedTuple):
+    session_id: str
+    access_token: str
+    refresh_token: str
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _tokens(user_id: UUID, session_id: str, generation: int, expires_in: timedelta) -> SessionTokens:
+    claims = {"sub": str(user_id), "fam": session_id}
+    return SessionTokens(
+        session_id,
+        create_access_token(data=claims),
+        create_refresh_token(data={**claims, "gen": generation}, expire_delta=expires_in),
+    )
+
+
+def revoke_sessions(db: Session, session_ids: Iterable[str]) -> None:
+    """
+    Revoke sessions and commit. Their refresh tokens stop working at once,
+    their access tokens within TOKEN_REVOCATION_SYNC_SECONDS in every worker.
+    """
+    session_ids = list(session_ids)
+    if not session_ids:
+        return
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.session_id.in_(session_ids), RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc), refresh_token=None)
+    )
+    db.commit()
+    revoked_sessions.add(session_ids)
+
+
+def start_session(db: Session, user_id: UUID) -> SessionTokens:
+    """
+    Open a session for the user and commit. Past MAX_SESSIONS live sessions,
+    the oldest are revoked.
+    """
+    now = datetime.now(timezone.utc)
+    # Rows no access token can still refer to
+    db.execute(
+        delete(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            or_(
+                RefreshToken.expires_at <= now,
+                RefreshToken.revoked_at <= now - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+            ),
+        )
+    )
+    live = (
+        db.execute(
+            select(RefreshToken.session_id)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .order_by(RefreshToken.expires_at.asc())
+        )
+        .scalars()
+        .all()
+    )
+    revoke_sessions(db, live[: max(0, len(live) - MAX_SESSIONS + 1)])
+
+    session_id = str(uuid4())
+    expires_in = timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            session_id=session_id,
+            generation=0,
+            expires_at=now + expires_in,
+        )
+    )
+    db.commit()
+    return _tokens(user_id, session_id, 0, expires_in)
+
+
+def rotate_session(
+    db: Session, session_id: str, refresh_token: str, token: TokenData
+) -> Optional[SessionTokens]:
+    """
+    Exchange a verified refresh token for a new access and refresh token
+    pair, with a single UPDATE that checks the session is live, the token
+    is its current generation and the user is active. The session keeps its
+    original expiry.
+
+    A token from an earlier generation means it was copied: the session is
+    revoked, unless the token was rotated in the last
+    REFRESH_REUSE_GRACE_SECONDS (two tabs refreshing at once), in which
+    case only this request is refused.
+
+    Returns:
+        Optional[SessionTokens]: The new tokens, or None if refused.
+    """
+    # Tokens from before rotation carry no family; the header names it
+    family = token.family or session_id
+    if family != session_id:
+        return None
+    now = datetime.now(timezone.utc)
+    generation = token.generation or 0
+    conditions = [
+        RefreshToken.session_id == family,
+        RefreshToken.user_id == token.user_id,
+        RefreshToken.generation == generation,
+        RefreshToken.revoked_at.is_(None),
+        RefreshToken.expires_at > now,
+        exists().where(User.id == token.user_id, User.is_active == True),
+    ]
+    if token.generation is None:
+        conditions.append(RefreshToken.refresh_token == refresh_token)
+    rotated = db.execute(
+        update(RefreshToken)
+        .where(*conditions)
+        .values(generation=generation + 1, rotated_at=now, refresh_token=None)
+        .returning(RefreshToken.generation)
+    ).scalar()
+    db.commit()
+    if rotated is not None:
+        increment("auth.refresh.rotated")
+        return _tokens(
+            token.user_id, family, rotated, timedelta(seconds=token.exp - time.time())
+        )
+
+    row = db.execute(
+        select(RefreshToken.generation, RefreshToken.rotated_at).where(
+            RefreshToken.session_id == family,
+            RefreshToken.user_id == token.user_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+    ).first()
+    db.rollback()
+    if row is None or row.generation <= generation:
+        return None
+    if row.generation == generation + 1 and now - _as_utc(row.rotated_at) < timedelta(
+        seconds=REFRESH_REUSE_GRACE_SECONDS
+    ):
+        increment("auth.refresh.concurrent")
+        return None
+    increment("auth.refresh.reuse_detected")
+    revoke_sessions(db, [family])
+    return None
+
+
+def end_session(db: Session, session_id: str, token: TokenData) -> bool:
+    """
+    Revoke the session a refresh token belongs to (logout) and commit. Any
+    generation of the token is accepted.
+
+    Returns:
+        bool: Whether a live session was found.
+    """
+    family = token.family or session_id
+    if family != session_id:
+        return False
+    ended = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.session_id == family,
+            RefreshToken.user_id == token.user_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(revoked_at=datetime.now(timezone.utc), refresh_token=None)
+        .returning(RefreshToken.id)
+    ).first()
+    db.commit()
+    if ended is None:
+        return False
+    revoked_sessions.add([family])
+    return True
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from uuid import UUID
+from app.core.config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL
+from app.utils.metrics_utils import increment
+
+CacheKey = Tuple[UUID, str]
+
+
+class CachedResponse(NamedTuple):
+    version: int
+    stored_at: float
+    body: bytes
+
+
+def make_etag(user_id: UUID, query: str, version: int) -> str:
+    """
+    Return a strong ETag for a per-user response at a given journals_version.
+    Hashed so the tag does not reveal how many writes the user has made.
+    """
+    raw = f"{user_id}:{query}:{version}".encode()
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Return True if an If-None-Match header value covers `etag`. Uses the weak
+    comparison RFC 9110 prescribes for If-None-Match, so tags weakened by the
+    compression middleware still match.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class ResponseCache:
+    """
+    Bounded LRU of serialized, decrypted response bodies, keyed by
+    (user_id, query) and tagged with the user's journals_version at the time
+    the body was built.
+
+    Every journal write bumps journals_version in the DB, so an entry is only
+    served while its version still matches the one loaded with the request;
+    this holds across workers. Bodies only ever live in this process's
+    memory, and the TTL bounds how long an idle user's pages are kept.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID, query: str, version: int) -> Optional[bytes]:
+        key = (user_id, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                increment("response_cache.miss")
+                return None
+            if (
+                entry.version != version
+                or time.monotonic() - entry.stored_at > self._ttl
+            ):
+                self._remove(key)
+                increment("response_cache.miss")
+                return None
+            self._entries.move_to_end(key)
+            increment("response_cache.hit")
+            return entry.body
+
+    def put(self, user_id: UUID, query: str, version: int, body: bytes) -> None:
+        """
+        Cache a body built at `version`. Bodies larger than the whole cache
+        are not stored.
+        """
+        if len(body) > self._max_bytes:
+            return
+        key = (user_id, query)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current.version > version:
+                # A newer page was cached while this one was being built
+                return
+            self._remove(key)
+            self._entries[key] = CachedResponse(version, time.monotonic(), body)
+            self._size += len(body)
+            while self._size > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                increment("response_cache.evicted")
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.body)
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
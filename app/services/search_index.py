@@ -0,0 +1,133 @@
+from typing import Iterable, List, Optional, Set
+from uuid import UUID
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from app.schemas.journals_schema import Journal
+from app.schemas.search_token_schema import JournalSearchToken
+from app.utils.encryption_utils import keyed_hash, decrypt_data
+from app.utils.search_utils import extract_terms
+
+
+def search_tokens(user_id: UUID, text: str) -> Set[bytes]:
+    """
+    Return the blind tokens for the terms in `text`, scoped to the user.
+    """
+    return {keyed_hash(term, context=str(user_id)) for term in extract_terms(text)}
+
+
+def token_rows(user_id: UUID, journal_id: UUID, title: str, content: str) -> List[dict]:
+    """
+    Build the index rows for one journal from its plaintext.
+    """
+    return [
+        {"user_id": user_id, "token": token, "journal_id": journal_id}
+        for token in search_tokens(user_id, f"{title}\n{content}")
+    ]
+
+
+def index_journal(
+    db: Session, user_id: UUID, journal_id: UUID, title: str, content: str
+) -> None:
+    """
+    Add a new journal to the search index. Runs in the caller's transaction.
+    """
+    rows = token_rows(user_id, journal_id, title, content)
+    if rows:
+        db.execute(insert(JournalSearchToken), rows)
+
+
+def reindex_journal(
+    db: Session, user_id: UUID, journal_id: UUID, title: str, content: str
+) -> None:
+    """
+    Replace a journal's index rows after an update. Runs in the caller's
+    transaction. Deletes need no call: the rows cascade with the journal.
+    """
+    db.query(JournalSearchToken).filter(
+        JournalSearchToken.journal_id == journal_id
+    ).delete(synchronize_session=False)
+    index_journal(db, user_id, journal_id, title, content)
+
+
+def reindex_journals(db: Session, user_id: UUID, entries: List[tuple]) -> None:
+    """
+    Replace the index rows of several journals at once, given
+    (journal_id, title, content) tuples. Runs in the caller's transaction.
+    """
+    if not entries:
+        return
+    db.query(JournalSearchToken).filter(
+        JournalSearchToken.journal_id.in_([journal_id for journal_id, _, _ in entries])
+    ).delete(synchronize_session=False)
+    rows = [
+        row
+        for journal_id, title, content in entries
+        for row in token_rows(user_id, journal_id, title, content)
+    ]
+    if rows:
+        db.execute(insert(JournalSearchToken), rows)
+
+
+def search_journal_ids(db: Session, user_id: UUID, query: str) -> List[UUID]:
+    """
+    Return the ids of the user's journals that contain every term in `query`.
+
+    A single indexed lookup on (user_id, token) followed by an intersection
+    via GROUP BY/HAVING; nothing is decrypted.
+    """
+    tokens = search_tokens(user_id, query)
+    if not tokens:
+        return []
+    stmt = (
+        select(JournalSearchToken.journal_id)
+        .where(
+            JournalSearchToken.user_id == user_id,
+            JournalSearchToken.token.in_(tokens),
+        )
+        .group_by(JournalSearchToken.journal_id)
+        .having(func.count() == len(tokens))
+    )
+    return list(db.execute(stmt).scalars())
+
+
+def rebuild_index(
+    db: Session, user_id: Optional[UUID] = None, batch_size: int = 500
+) -> int:
+    """
+    Rebuild index rows for existing journals (all users, or one user), in
+    keyset-ordered batches with one commit per batch.
+
+    Returns:
+        int: The number of journals indexed.
+    """
+    indexed = 0
+    last_id = None
+    while True:
+        stmt = select(Journal.id, Journal.user_id, Journal.title, Journal.content)
+        if user_id is not None:
+            stmt = stmt.where(Journal.user_id == user_id)
+        if last_id is not None:
+            stmt = stmt.where(Journal.id > last_id)
+        rows = db.execute(stmt.order_by(Journal.id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        ids = [row.id for row in rows]
+        db.query(JournalSearchToken).filter(
+            JournalSearchToken.journal_id.in_(ids)
+        ).delete(synchronize_session=False)
+        new_rows = []
+        for row in rows:
+            new_rows.extend(
+                token_rows(
+                    row.user_id,
+                    row.id,
+                    decrypt_data(row.title, row.user_id),
+                    decrypt_data(row.content, row.user_id),
+                )
+            )
+        if new_rows:
+            db.execute(insert(JournalSearchToken), new_rows)
+        db.commit()
+        indexed += len(rows)
+    return indexed
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+from sqlalchemy import select
+from app.core.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    TOKEN_REVOCATION_CAPACITY,
+    TOKEN_REVOCATION_SYNC_SECONDS,
+)
+from app.schemas.token_schema import RefreshToken
+from app.services.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bit array that answers "maybe added" or "certainly not added" for
+    strings, sized for `capacity` items at about `error_rate` false
+    positives. Bit positions come from one blake2b digest (double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self._size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevokedSessions:
+    """
+    Sessions (refresh-token families) revoked recently enough that access
+    tokens issued to them may not have expired yet.
+
+    Checked on every token decode, so it lives in memory: the bloom filter
+    rules out almost every live session with a few bit tests and the exact
+    set settles the rest. The DB is authoritative. Revocations made in this
+    worker are added at once; other workers' arrive with the next sync,
+    which runs in a background thread at most every `sync_interval` seconds.
+    """
+
+    def __init__(self, capacity: int, sync_interval: float, window: float):
+        self._capacity = capacity
+        self._sync_interval = sync_interval
+        self._window = window
+        self._bloom = BloomFilter(capacity)
+        self._exact: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = float("-inf")
+
+    def contains(self, session_id: str) -> bool:
+        now = time.monotonic()
+        if now - self._synced_at >= self._sync_interval:
+            with self._lock:
+                due = now - self._synced_at >= self._sync_interval
+                if due:
+                    self._synced_at = now
+            if due:
+                threading.Thread(target=self.sync, daemon=True).start()
+        if session_id not in self._bloom:
+            return False
+        return session_id in self._exact
+
+    def add(self, session_ids: Iterable[str]) -> None:
+        now = time.time()
+        with self._lock:
+            for session_id in session_ids:
+                self._exact[session_id] = now
+                self._bloom.add(session_id)
+
+    def sync(self) -> None:
+        """
+        Reload sessions revoked within the access token lifetime and rebuild
+        the filter, which also drops older ones.
+        """
+        with self._sync_lock:
+            self._synced_at = time.monotonic()
+            cutoff = time.time() - self._window
+            db = SessionLocal()
+            try:
+                rows = db.execute(
+                    select(RefreshToken.session_id, RefreshToken.revoked_at).where(
+                        RefreshToken.revoked_at > datetime.fromtimestamp(cutoff, timezone.utc)
+                    )
+                ).all()
+            except Exception as e:
+                logger.warning("Failed to sync revoked sessions: %s", e)
+                return
+            finally:
+                db.close()
+            with self._lock:
+                # Keep this worker's own revocations until the DB returns them
+                exact = {s: at for s, at in self._exact.items() if at > cutoff}
+                for session_id, revoked_at in rows:
+                    if revoked_at.tzinfo is None:
+                        revoked_at = revoked_at.replace(tzinfo=timezone.utc)
+                    exact[session_id] = revoked_at.timestamp()
+                bloom = BloomFilter(max(self._capacity, 2 * len(exact)))
+                for session_id in exact:
+                    bloom.add(session_id)
+                self._exact, self._bloom = exact, bloom
+
+
+revoked_sessions = RevokedSessions(
+    TOKEN_REVOCATION_CAPACITY,
+    TOKEN_REVOCATION_SYNC_SECONDS,
+    # Access tokens issued just before a revocation stay valid this long
+    ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
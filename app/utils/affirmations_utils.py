@@ -1,15 +1,75 @@
-import json
+import logging
+from typing import Any, Iterator, List, Optional, Tuple
+from uuid import UUID
 from google import genai
 from google.genai import types
-from app.core.config import GEMINI_API_KEY
-import re
+from app.core.config import GEMINI_API_KEY, LLM_INPUT_TOKEN_BUDGET
+from app.models.journals import (
+    SentimentResult,
+    AffirmationsResult,
+    SentimentBatchResult,
+    AffirmationsBatchResult,
+)
+from app.utils.llm_parsing_utils import (
+    parse_model_output,
+    LLMOutputError,
+    JsonArrayItemStream,
+)
+from app.utils import metrics_utils
+from app.services.llm_quota import usage as llm_usage
+from app.services.inflight import inflight
+from app.utils.prompt_utils import build_user_prompt, fit_to_budget
 
 client = genai.Client(api_key=GEMINI_API_KEY)
 # genai_model = genai.GenerativeModel("gemini-2.0-flash")
+logger = logging.getLogger(__name__)
 
 
-def analyze_sentiments(content: str) -> dict:
-    prompt_to_analyze_journal_sentiment = f"""You are a compassionate and emotionally intelligent sentiment analyst. Your role is to read a person's short journal entry or reflection and determine the underlying emotional tone. Your analysis should reflect nuance and empathy, capturing the complexity of human emotions.
+def _log_usage(response, metric: str, user_id: Optional[UUID] = None) -> Tuple[int, int]:
+    """
+    Log the token usage Gemini reports for a call, add it to the
+    `llm.<metric>.*_tokens` counters and charge it to the user's daily quota.
+
+    Returns:
+        Tuple[int, int]: (input tokens, output tokens).
+    """
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = (getattr(usage, "prompt_token_count", None) or 0) if usage else 0
+    output_tokens = (getattr(usage, "candidates_token_count", None) or 0) if usage else 0
+    cached_tokens = (getattr(usage, "cached_content_token_count", None) or 0) if usage else 0
+    metrics_utils.increment(f"llm.{metric}.input_tokens", input_tokens)
+    metrics_utils.increment(f"llm.{metric}.output_tokens", output_tokens)
+    logger.info(
+        "Gemini %s usage: input=%d output=%d cached=%d",
+        metric,
+        input_tokens,
+        output_tokens,
+        cached_tokens,
+    )
+    if user_id is not None:
+        llm_usage.record(user_id, input_tokens, output_tokens)
+    return input_tokens, output_tokens
+
+
+def _parse_response(text: str, model, metric: str):
+    """
+    Parse a model response into `model`, counting calls and malformed
+    responses under `llm.<metric>.*` so the failure rate can be tracked.
+    """
+    metrics_utils.increment(f"llm.{metric}.calls")
+    try:
+        return parse_model_output(text or "", model)
+    except LLMOutputError:
+        metrics_utils.increment(f"llm.{metric}.malformed")
+        logger.warning(
+            "Malformed %s output from Gemini (malformed rate %.2f%%)",
+            metric,
+            100 * metrics_utils.ratio(f"llm.{metric}.malformed", f"llm.{metric}.calls"),
+        )
+        raise
+
+
+SENTIMENT_INSTRUCTION = """You are a compassionate and emotionally intelligent sentiment analyst. Your role is to read a person's short journal entry or reflection and determine the underlying emotional tone. Your analysis should reflect nuance and empathy, capturing the complexity of human emotions.
 
                 Your output should:
                 - Identify whether the sentiment is positive, negative, or neutral.
@@ -20,38 +80,19 @@ def analyze_sentiments(content: str) -> dict:
                 "I’m grateful for my family, but lately I’ve been feeling disconnected and tired all the time."
 
                 Example Output:
-                {{
+                {
                 "label": "negative",
                 "probability": 78.25
-                }}
-
-                Instructions:
-                Now analyze the following input:
-                "{content}"
+                }
 
                 Respond only in the following JSON format:
 
-                {{
+                {
                 "label": "positive/negative/neutral",
                 "probability": XX.XX
-                }}"""
-
-    response = client.models.generate_content(
-        model='gemini-2.5-flash',
-        contents=prompt_to_analyze_journal_sentiment,
-        config=types.GenerateContentConfig(
-        temperature=0.7,
-        top_p=0.95,
-        top_k=10,
-    ),
-    )
-    
-    cleaned = re.sub(r"```json|```", "", response.text).strip()
-    return json.loads(cleaned)
-
+                }"""
 
-def generate_affirmations(content: str) -> dict:
-    prompt = f"""You are a compassionate and emotionally intelligent affirmation coach. Your job is to read a person's short input text, extract their emotional and situational context, and then generate 5 personalized, uplifting affirmations that directly support their mental and emotional well-being.
+AFFIRMATIONS_INSTRUCTION = """You are a compassionate and emotionally intelligent affirmation coach. Your job is to read a person's short input text, extract their emotional and situational context, and then generate 5 personalized, uplifting affirmations that directly support their mental and emotional well-being.
 
            Your affirmations must:
             - Acknowledge and validate the person’s emotions (e.g., sadness, self-doubt, loneliness).
@@ -73,13 +114,9 @@ def generate_affirmations(content: str) -> dict:
            4. I learn and grow, even when things feel confusing or hard.  
            5. I give myself permission to rest and recharge without guilt.
 
-           Now, generate 5 affirmations based on this input:
-           "{content}"
-
            Respond ONLY in the following JSON format without explanations:
 
-           ```json
-            {{
+            {
                 "input_summary": "User is feeling overwhelmed and sad due to difficult university lectures and heavy assignments but finds relief in spending time with friends.",
                 "affirmations": [
                     "It's okay to feel overwhelmed—I'm doing my best.",
@@ -88,15 +125,203 @@ def generate_affirmations(content: str) -> dict:
                     "I learn and grow, even when it's tough.",
                     "I deserve rest and kindness toward myself."
                 ]
-            }}
+            }
 """
-    response = client.models.generate_content(
-    model='gemini-2.5-flash',
-    contents=prompt,
-    config=types.GenerateContentConfig(
-        temperature=0.7,
-        top_p=0.95,
-        top_k=10,
-    ))
-    cleaned = re.sub(r"```json|```", "", response.text).strip()
-    return json.loads(cleaned)
+
+sentiment_config = types.GenerateContentConfig(
+    system_instruction=SENTIMENT_INSTRUCTION,
+    temperature=0.7,
+    top_p=0.95,
+    top_k=10,
+    response_mime_type="application/json",
+    response_schema=SentimentResult,
+)
+
+affirmations_config = types.GenerateContentConfig(
+    system_instruction=AFFIRMATIONS_INSTRUCTION,
+    temperature=0.7,
+    top_p=0.95,
+    top_k=10,
+    response_mime_type="application/json",
+    response_schema=AffirmationsResult,
+)
+
+
+SENTIMENT_BATCH_INSTRUCTION = SENTIMENT_INSTRUCTION + """
+
+                You will receive several journal entries, each wrapped in an
+                <entry index="N"> tag. Analyze every entry independently and
+                respond with {"results": [...]} containing one object per entry,
+                with its "index", "label" and "probability"."""
+
+sentiment_batch_config = types.GenerateContentConfig(
+    system_instruction=SENTIMENT_BATCH_INSTRUCTION,
+    temperature=0.7,
+    top_p=0.95,
+    top_k=10,
+    response_mime_type="application/json",
+    response_schema=SentimentBatchResult,
+)
+
+
+AFFIRMATIONS_BATCH_INSTRUCTION = AFFIRMATIONS_INSTRUCTION + """
+
+           You will receive several journal entries, each wrapped in an
+           <entry index="N"> tag. Write affirmations for every entry
+           independently and respond with {"results": [...]} containing one
+           object per entry, with its "index", "input_summary" and
+           "affirmations"."""
+
+affirmations_batch_config = types.GenerateContentConfig(
+    system_instruction=AFFIRMATIONS_BATCH_INSTRUCTION,
+    temperature=0.7,
+    top_p=0.95,
+    top_k=10,
+    response_mime_type="application/json",
+    response_schema=AffirmationsBatchResult,
+)
+
+
+def _entries_prompt(contents: List[str]) -> str:
+    per_entry_budget = max(200, LLM_INPUT_TOKEN_BUDGET // len(contents))
+    return "\n".join(
+        f'<entry index="{i}">\n{fit_to_budget(content, per_entry_budget)}\n</entry>'
+        for i, content in enumerate(contents)
+    )
+
+
+def analyze_sentiments(content: str, user_id: Optional[UUID] = None) -> SentimentResult:
+    with inflight.track("gemini"):
+        response = client.models.generate_content(
+            model='gemini-2.5-flash',
+            contents=build_user_prompt(content, "Now analyze the following input:"),
+            config=sentiment_config,
+        )
+    _log_usage(response, "sentiment", user_id)
+    return _parse_response(response.text, SentimentResult, "sentiment")
+
+
+def analyze_sentiments_batch(
+    contents: List[str], user_id: Optional[UUID] = None
+) -> List[Optional[SentimentResult]]:
+    """
+    Analyze several journal entries with a single Gemini call.
+
+    Args:
+        contents (List[str]): The journal contents.
+        user_id (Optional[UUID]): The user to charge the tokens to.
+
+    Returns:
+        List[Optional[SentimentResult]]: One result per entry, in order.
+        Entries the model skipped are None.
+
+    Raises:
+        LLMOutputError: If the response is malformed.
+    """
+    if not contents:
+        return []
+    with inflight.track("gemini"):
+        response = client.models.generate_content(
+            model='gemini-2.5-flash',
+            contents=_entries_prompt(contents),
+            config=sentiment_batch_config,
+        )
+    _log_usage(response, "sentiment_batch", user_id)
+    batch = _parse_response(response.text, SentimentBatchResult, "sentiment_batch")
+    results: List[Optional[SentimentResult]] = [None] * len(contents)
+    for item in batch.results:
+        if 0 <= item.index < len(contents):
+            results[item.index] = SentimentResult(
+                label=item.label, probability=item.probability
+            )
+    return results
+
+
+def generate_affirmations(content: str, user_id: Optional[UUID] = None) -> AffirmationsResult:
+    with inflight.track("gemini"):
+        response = client.models.generate_content(
+            model='gemini-2.5-flash',
+            contents=build_user_prompt(content, "Now, generate 5 affirmations based on this input:"),
+            config=affirmations_config,
+        )
+    _log_usage(response, "affirmations", user_id)
+    return _parse_response(response.text, AffirmationsResult, "affirmations")
+
+
+def generate_affirmations_batch(
+    contents: List[str], user_id: Optional[UUID] = None
+) -> List[Optional[AffirmationsResult]]:
+    """
+    Generate affirmations for several journal entries with a single Gemini
+    call.
+
+    Args:
+        contents (List[str]): The journal contents.
+        user_id (Optional[UUID]): The user to charge the tokens to.
+
+    Returns:
+        List[Optional[AffirmationsResult]]: One result per entry, in order.
+        Entries the model skipped are None.
+
+    Raises:
+        LLMOutputError: If the response is malformed.
+    """
+    if not contents:
+        return []
+    with inflight.track("gemini"):
+        response = client.models.generate_content(
+            model='gemini-2.5-flash',
+            contents=_entries_prompt(contents),
+            config=affirmations_batch_config,
+        )
+    _log_usage(response, "affirmations_batch", user_id)
+    batch = _parse_response(response.text, AffirmationsBatchResult, "affirmations_batch")
+    results: List[Optional[AffirmationsResult]] = [None] * len(contents)
+    for item in batch.results:
+        if 0 <= item.index < len(contents):
+            results[item.index] = AffirmationsResult(
+                input_summary=item.input_summary, affirmations=item.affirmations
+            )
+    return results
+
+
+def stream_affirmations(
+    content: str, user_id: Optional[UUID] = None
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream affirmations from Gemini as they are generated.
+
+    Args:
+        content (str): The journal content.
+        user_id (Optional[UUID]): The user to charge the tokens to.
+
+    Yields:
+        ("affirmation", str) for each affirmation as soon as it is complete,
+        then ("result", AffirmationsResult) once the full response is validated.
+
+    Raises:
+        LLMOutputError: If the final response is malformed.
+    """
+    items = JsonArrayItemStream("affirmations")
+    chunks = []
+    last_chunk = None
+    try:
+        with inflight.track("gemini"):
+            for chunk in client.models.generate_content_stream(
+                model='gemini-2.5-flash',
+                contents=build_user_prompt(content, "Now, generate 5 affirmations based on this input:"),
+                config=affirmations_config,
+            ):
+                last_chunk = chunk
+                text = chunk.text or ""
+                chunks.append(text)
+                for item in items.feed(text):
+                    yield "affirmation", item
+    finally:
+        # Usage metadata comes with the chunks, complete on the final one.
+        # Charge it even when the client disconnects (GeneratorExit at the
+        # yield) or the stream fails midway, so dropping the connection
+        # can't get around the quota
+        if last_chunk is not None:
+            _log_usage(last_chunk, "affirmations", user_id)
+    yield "result", _parse_response("".join(chunks), AffirmationsResult, "affirmations")
@@ -1,6 +1,7 @@
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from pydantic import EmailStr
 from app.core.config import EMAIL, APP_PASSWORD, PORT
+from app.services.inflight import inflight
 
 conf = ConnectionConfig(
     MAIL_USERNAME=EMAIL,
@@ -60,7 +61,7 @@ async def send_onboard_email(to_email: EmailStr):
     )
 
     fm = FastMail(conf)
-    await fm.send_message(message)
+    await inflight.shielded("email", fm.send_message(message))
 
 async def send_otp_email(to_email: EmailStr, otp: str):
     subject = "🔐 Your OTP Code - Secure Verification"
@@ -90,4 +91,4 @@ async def send_otp_email(to_email: EmailStr, otp: str):
     )
 
     fm = FastMail(conf)
-    await fm.send_message(message)
+    await inflight.shielded("email", fm.send_message(message))
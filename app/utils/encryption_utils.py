@@ -1,25 +1,72 @@
-from cryptography.fernet import Fernet
-from app.core.config import FERNET_KEY
+import hashlib
+import hmac
+import re
+import unicodedata
+import zlib
+from typing import Optional
+from uuid import UUID
+from app.core.config import FERNET_KEY, BLIND_INDEX_KEY, COMPRESS_THRESHOLD
+from app.services.data_keys import (
+    decrypt_for_user,
+    from_token,
+    get_user_cipher,
+    legacy_cipher,
+    to_token,
+)
 
-if not FERNET_KEY:
-    raise ValueError("FERNET_KEY not found in .env file")
+# Separate key for keyed hashes so they can't be used to recover the cipher key
+blind_index_key = (
+    BLIND_INDEX_KEY.encode()
+    if BLIND_INDEX_KEY
+    else hmac.new(FERNET_KEY.encode(), b"feellog-blind-index", hashlib.sha256).digest()
+)
 
-# Initialize Fernet cipher
-try:
-    cipher = Fernet(FERNET_KEY.encode())
-except Exception as e:
-    raise ValueError(f"Invalid FERNET_KEY: {str(e)}")
 
+# Payloads starting with a NUL byte are tagged: zlib data, or plaintext that
+# itself starts with NUL. Any other payload is plaintext as is, as it was
+# before compression existed.
+COMPRESSED_PREFIX = b"\x00z"
+RAW_PREFIX = b"\x00r"
 
-def encrypt_data(data: str) -> str:
+
+def _pack(data: str) -> bytes:
+    raw = data.encode()
+    if len(raw) >= COMPRESS_THRESHOLD:
+        compressed = COMPRESSED_PREFIX + zlib.compress(raw)
+        if len(compressed) < len(raw):
+            return compressed
+    if raw.startswith(b"\x00"):
+        return RAW_PREFIX + raw
+    return raw
+
+
+def _unpack(raw: bytes) -> str:
+    if raw.startswith(COMPRESSED_PREFIX):
+        raw = zlib.decompress(raw[len(COMPRESSED_PREFIX) :])
+    elif raw.startswith(RAW_PREFIX):
+        raw = raw[len(RAW_PREFIX) :]
+    return raw.decode()
+
+
+def _cipher_for(user_id: Optional[UUID]):
+    if user_id is None:
+        return legacy_cipher
+    return get_user_cipher(user_id)
+
+
+def encrypt_data(data: str, user_id: Optional[UUID] = None) -> bytes:
     """
-    Encrypts the input string using the Fernet key.
+    Encrypts the input string with the user's data key, or the global Fernet
+    key when no user is given. Plaintext of COMPRESS_THRESHOLD bytes or more
+    is zlib-compressed first. The result is the raw bytes of the Fernet
+    token, as stored in the BYTEA columns.
 
     Args:
         data (str): The plaintext data to encrypt.
+        user_id (Optional[UUID]): The owner of the data.
 
     Returns:
-        str: The encrypted data as a base64-encoded string.
+        bytes: The encrypted data.
 
     Raises:
         ValueError: If encryption fails or input is invalid.
@@ -29,18 +76,19 @@ def encrypt_data(data: str) -> str:
     if not data:
         raise ValueError("Input data cannot be empty")
     try:
-        encrypted_data = cipher.encrypt(data.encode())
-        return encrypted_data.decode()
+        return from_token(_cipher_for(user_id).encrypt(_pack(data)))
     except Exception as e:
         raise ValueError(f"Encryption failed: {str(e)}")
 
 
-def decrypt_data(encrypted_data: str) -> str:
+def decrypt_data(encrypted_data: bytes, user_id: Optional[UUID] = None) -> str:
     """
-    Decrypts the input encrypted string using the Fernet key.
+    Decrypts the input encrypted string with any of the user's data keys
+    (or the legacy global key), or the global key when no user is given.
 
     Args:
-        encrypted_data (str): The encrypted data as a base64-encoded string.
+        encrypted_data (bytes): The encrypted data from `encrypt_data`.
+        user_id (Optional[UUID]): The owner of the data.
 
     Returns:
         str: The decrypted plaintext data.
@@ -48,12 +96,56 @@ def decrypt_data(encrypted_data: str) -> str:
     Raises:
         ValueError: If decryption fails or input is invalid.
     """
-    if not isinstance(encrypted_data, str):
-        raise ValueError("Encrypted data must be a string")
+    if not isinstance(encrypted_data, bytes):
+        raise ValueError("Encrypted data must be bytes")
     if not encrypted_data:
         raise ValueError("Encrypted data cannot be empty")
     try:
-        decrypted_data = cipher.decrypt(encrypted_data.encode())
-        return decrypted_data.decode()
+        token = to_token(encrypted_data)
+        if user_id is None:
+            decrypted_data = legacy_cipher.decrypt(token)
+        else:
+            decrypted_data = decrypt_for_user(user_id, token)
+        return _unpack(decrypted_data)
     except Exception as e:
         raise ValueError(f"Decryption failed: {str(e)}")
+
+
+def keyed_hash(data: str, context: str = "", length: int = 16) -> bytes:
+    """
+    Compute a keyed HMAC-SHA256 of the input, truncated to `length` bytes.
+
+    Equal inputs give equal hashes, so the result can be indexed and compared
+    without storing the plaintext. `context` (e.g. a user id) scopes the hash
+    so the same word hashes differently for different users.
+
+    Args:
+        data (str): The plaintext to hash.
+        context (str): A value mixed into the hash.
+        length (int): The number of bytes to keep.
+
+    Returns:
+        bytes: The truncated digest.
+    """
+    message = f"{context}\x00{data}".encode()
+    return hmac.new(blind_index_key, message, hashlib.sha256).digest()[:length]
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize journal text for comparison: Unicode NFC with runs of
+    whitespace collapsed, so re-saving an entry unchanged (or with only
+    spacing edits) compares equal.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_fingerprint(content: str, user_id: UUID) -> bytes:
+    """
+    Keyed hash of a journal's normalized content, scoped to the user so equal
+    entries from different users don't share a fingerprint.
+    """
+    return keyed_hash(normalize_text(content), f"content:{user_id}")
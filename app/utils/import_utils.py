@@ -0,0 +1,74 @@
+import codecs
+import csv
+import io
+from typing import AsyncIterator, Union
+from app.models.journals import JournalBase
+
+ImportRecord = Union[str, dict]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a streamed UTF-8 body into lines without buffering the whole body.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_import_records(
+    chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[ImportRecord]:
+    """
+    Yield one raw record per journal entry from a streamed upload.
+
+    NDJSON records are the JSON text of each line. CSV records are dicts keyed
+    by the header row; quoted fields may span lines.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body stream.
+        fmt (str): "ndjson" or "csv".
+    """
+    if fmt == "ndjson":
+        async for line in iter_lines(chunks):
+            if line.strip():
+                yield line
+        return
+
+    header = None
+    record = ""
+    async for line in iter_lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        row = next(csv.reader(io.StringIO(record)))
+        record = ""
+        if header is None:
+            header = [name.strip().lower() for name in row]
+            continue
+        yield dict(zip(header, row))
+    if record:
+        raise ValueError("Unterminated quoted field at end of CSV upload")
+
+
+def parse_import_record(record: ImportRecord) -> JournalBase:
+    """
+    Validate one import record as a journal entry.
+
+    Raises:
+        ValueError: If the record is not a valid journal entry.
+    """
+    if isinstance(record, str):
+        return JournalBase.model_validate_json(record)
+    return JournalBase.model_validate({k: v for k, v in record.items() if v})
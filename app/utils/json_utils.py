@@ -0,0 +1,61 @@
+import json
+from typing import Any, Union
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from app.core.config import SKIP_RESPONSE_VALIDATION
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode plain data (dicts, lists, dataclasses, UUIDs, datetimes) as
+    compact JSON.
+
+    Uses orjson when it is installed, else pydantic-core's encoder. Both
+    write UTC datetimes with a "Z" suffix, like Pydantic's own output.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    return to_json(data)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def serialize(data: Any, adapter: TypeAdapter) -> bytes:
+    """
+    Serialize response data built from trusted DB rows.
+
+    By default the data goes through the response model's pre-built
+    TypeAdapter. With SKIP_RESPONSE_VALIDATION set it is encoded directly
+    with `dumps`, skipping validation; the output shape is the same.
+
+    Args:
+        data (Any): Dicts, lists and read models shaped like the response model.
+        adapter (TypeAdapter): A module-level adapter for the response model.
+
+    Returns:
+        bytes: The JSON body.
+    """
+    if SKIP_RESPONSE_VALIDATION:
+        return dumps(data)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with `dumps`. The content must already be plain
+    data; Pydantic models are not encoded.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
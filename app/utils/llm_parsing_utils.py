@@ -0,0 +1,212 @@
+import json
+from functools import lru_cache
+from json.decoder import scanstring
+from typing import Iterable, List, Optional, Type, TypeVar
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class LLMOutputError(ValueError):
+    """Raised when the model response does not contain a usable JSON object."""
+
+
+class JsonObjectExtractor:
+    """
+    Incrementally pulls the first complete JSON object out of a text stream.
+
+    Text before the object (prose, markdown fences) is skipped, and so is
+    anything after it. Braces inside strings are ignored, so the scan is a
+    single pass over the input no matter how the chunks are split.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._offset = 0
+        self.result: Optional[dict] = None
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        """
+        Feed the next chunk of text.
+
+        Args:
+            chunk (str): The next piece of the model response.
+
+        Returns:
+            Optional[dict]: The decoded object once it is complete, else None.
+        """
+        if self.result is not None or not chunk:
+            return self.result
+        base = self._offset
+        self._buffer.append(chunk)
+        self._offset += len(chunk)
+        for i, char in enumerate(chunk):
+            if self._start is None:
+                if char == "{":
+                    self._start = base + i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = "".join(self._buffer)
+                    candidate = text[self._start : base + i + 1]
+                    try:
+                        decoded = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        # Not valid JSON (e.g. a brace in prose); keep scanning
+                        self._start = None
+                        continue
+                    if isinstance(decoded, dict):
+                        self.result = decoded
+                        return decoded
+                    self._start = None
+        return None
+
+    def finalize(self) -> Optional[dict]:
+        """
+        Called once the stream has ended. If the single-pass scan found
+        nothing (e.g. an unbalanced brace in leading prose), retry from every
+        "{" in the buffered text.
+        """
+        if self.result is not None:
+            return self.result
+        text = "".join(self._buffer)
+        decoder = json.JSONDecoder()
+        index = text.find("{")
+        while index != -1:
+            try:
+                decoded, _ = decoder.raw_decode(text, index)
+            except json.JSONDecodeError:
+                decoded = None
+            if isinstance(decoded, dict):
+                self.result = decoded
+                return decoded
+            index = text.find("{", index + 1)
+        return None
+
+
+class JsonArrayItemStream:
+    """
+    Yields the string items of a JSON array (`"<key>": [...]`) from a partial,
+    still-streaming JSON document as soon as each item is complete.
+    """
+
+    _WHITESPACE = " \t\r\n"
+
+    def __init__(self, key: str):
+        self._key = f'"{key}"'
+        self._text = ""
+        self._pos = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Feed the next chunk of text and return the items completed by it.
+        """
+        self._text += chunk
+        if self._done:
+            return []
+        if self._pos is None and not self._find_array():
+            return []
+        items = []
+        text = self._text
+        while True:
+            pos = self._pos
+            while pos < len(text) and (text[pos] in self._WHITESPACE or text[pos] == ","):
+                pos += 1
+            if pos >= len(text):
+                break
+            if text[pos] == "]":
+                self._done = True
+                break
+            if text[pos] != '"':
+                # Not a string array; nothing sensible to stream
+                self._done = True
+                break
+            try:
+                item, end = scanstring(text, pos + 1)
+            except json.JSONDecodeError:
+                # Item is still being streamed
+                break
+            items.append(item)
+            self._pos = end
+        return items
+
+    def _find_array(self) -> bool:
+        key_at = self._text.find(self._key)
+        if key_at == -1:
+            return False
+        pos = key_at + len(self._key)
+        rest = self._text[pos:].lstrip(self._WHITESPACE)
+        if not rest.startswith(":"):
+            return False
+        rest = rest[1:].lstrip(self._WHITESPACE)
+        if not rest.startswith("["):
+            return False
+        self._pos = len(self._text) - len(rest) + 1
+        return True
+
+
+def extract_first_json(chunks: Iterable[str]) -> dict:
+    """
+    Return the first valid JSON object found in the given text chunks.
+
+    Raises:
+        LLMOutputError: If no complete JSON object is present.
+    """
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    extractor = JsonObjectExtractor()
+    for chunk in chunks:
+        if extractor.feed(chunk) is not None:
+            return extractor.result
+    if extractor.finalize() is not None:
+        return extractor.result
+    raise LLMOutputError("No JSON object found in model response")
+
+
+@lru_cache(maxsize=None)
+def get_validator(model: Type[ModelT]) -> TypeAdapter:
+    """
+    Return a cached TypeAdapter for the given model, so the validator is only
+    built once per process.
+    """
+    return TypeAdapter(model)
+
+
+def parse_model_output(chunks: Iterable[str], model: Type[ModelT]) -> ModelT:
+    """
+    Extract the first JSON object from a model response and validate it.
+
+    Args:
+        chunks (Iterable[str]): The full response text or its streamed chunks.
+        model (Type[BaseModel]): The expected shape of the response.
+
+    Returns:
+        BaseModel: The validated model instance.
+
+    Raises:
+        LLMOutputError: If no JSON object is found or validation fails.
+    """
+    data = extract_first_json(chunks)
+    try:
+        return get_validator(model).validate_python(data)
+    except ValidationError as e:
+        raise LLMOutputError(f"Model response failed validation: {e}")
@@ -0,0 +1,60 @@
+import re
+from app.models.journals import SentimentResult
+
+# Small lexicon used when Gemini can't be called (e.g. the user is over their
+# daily quota). It is deliberately conservative: anything without a clear
+# signal is labelled neutral.
+POSITIVE_WORDS = frozenset(
+    """
+    happy glad grateful thankful calm peaceful excited proud joy joyful love
+    loved loving hopeful relaxed relieved good great amazing wonderful
+    content fun enjoyed enjoy smile smiled laugh laughed better confident
+    motivated inspired energized rested safe supported accomplished
+    """.split()
+)
+NEGATIVE_WORDS = frozenset(
+    """
+    sad angry anxious anxiety depressed depression lonely alone tired
+    exhausted overwhelmed stressed stress worried worry afraid scared fear
+    hurt upset cry cried crying hopeless worthless guilty ashamed frustrated
+    annoyed bad terrible awful miserable disappointed lost empty numb sick
+    pain panic drained burnout burned broken
+    """.split()
+)
+NEGATIONS = frozenset(["not", "no", "never", "don't", "didn't", "isn't", "wasn't", "can't"])
+
+_WORD_PATTERN = re.compile(r"[a-z']+")
+
+
+def analyze_sentiments_locally(content: str) -> SentimentResult:
+    """
+    Classify journal sentiment with a word lexicon, without calling the LLM.
+
+    Args:
+        content (str): The journal content.
+
+    Returns:
+        SentimentResult: The label and a confidence between 50 and 95.
+    """
+    positive = negative = 0
+    previous = ""
+    for word in _WORD_PATTERN.findall(content.lower()):
+        flipped = previous in NEGATIONS
+        if word in POSITIVE_WORDS:
+            if flipped:
+                negative += 1
+            else:
+                positive += 1
+        elif word in NEGATIVE_WORDS:
+            if flipped:
+                positive += 1
+            else:
+                negative += 1
+        previous = word
+
+    total = positive + negative
+    if not total or positive == negative:
+        return SentimentResult(label="neutral", probability=50.0)
+    balance = (positive - negative) / total
+    label = "positive" if balance > 0 else "negative"
+    return SentimentResult(label=label, probability=round(50 + 45 * abs(balance), 2))
@@ -0,0 +1,47 @@
+from collections import defaultdict
+from threading import Lock
+
+# In-process counters, one set per worker. Cheap enough to bump on every
+# request and read back from logs or an admin endpoint.
+_counters = defaultdict(int)
+_lock = Lock()
+
+
+def increment(name: str, value: int = 1) -> None:
+    """
+    Increment a named counter.
+
+    Args:
+        name (str): The counter name, e.g. "llm.sentiment.malformed".
+        value (int): The amount to add.
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def get_count(name: str) -> int:
+    """
+    Return the current value of a counter (0 if it was never incremented).
+    """
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def ratio(numerator: str, denominator: str) -> float:
+    """
+    Return numerator / denominator for two counters, or 0.0 if the
+    denominator is still zero.
+    """
+    with _lock:
+        total = _counters.get(denominator, 0)
+        if not total:
+            return 0.0
+        return _counters.get(numerator, 0) / total
+
+
+def snapshot() -> dict:
+    """
+    Return a copy of all counters.
+    """
+    with _lock:
+        return dict(_counters)
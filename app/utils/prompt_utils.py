@@ -0,0 +1,83 @@
+import math
+import re
+from typing import List
+from app.core.config import LLM_INPUT_TOKEN_BUDGET
+
+# Words, runs of digits and single punctuation marks. Good enough to
+# approximate Gemini's tokenizer without a network round-trip.
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_CHUNK_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+TRUNCATION_MARKER = "\n[...]\n"
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate the number of model tokens in `text`.
+
+    Long words are counted as one token per 4 characters, which is close to
+    how sentencepiece-style tokenizers split them.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def _split_chunks(text: str) -> List[str]:
+    return [chunk for chunk in _CHUNK_PATTERN.split(text) if chunk.strip()]
+
+
+def fit_to_budget(text: str, max_tokens: int = LLM_INPUT_TOKEN_BUDGET) -> str:
+    """
+    Trim `text` to roughly `max_tokens` tokens, sentence by sentence.
+
+    The start of an entry usually sets the scene and the end holds how the
+    writer feels now, so whole chunks are kept from both ends and the middle
+    is replaced with a marker.
+
+    Args:
+        text (str): The journal text.
+        max_tokens (int): The token budget for the text.
+
+    Returns:
+        str: The text unchanged if it fits, else the trimmed text.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    chunks = _split_chunks(text)
+    head, tail = [], []
+    head_budget = int(max_tokens * 0.6)
+    used = 0
+    start, end = 0, len(chunks) - 1
+    while start <= end:
+        size = count_tokens(chunks[start])
+        if used + size > head_budget:
+            break
+        head.append(chunks[start])
+        used += size
+        start += 1
+    while end >= start:
+        size = count_tokens(chunks[end])
+        if used + size > max_tokens:
+            break
+        tail.insert(0, chunks[end])
+        used += size
+        end -= 1
+
+    if not head and not tail:
+        # A single enormous chunk; fall back to a hard character cut
+        return text[: max_tokens * 4] + TRUNCATION_MARKER
+    return " ".join(head) + TRUNCATION_MARKER + " ".join(tail)
+
+
+def build_user_prompt(content: str, instruction: str) -> str:
+    """
+    Build the per-request part of a prompt. The long static instructions are
+    sent once as the system instruction, so only this part grows with the
+    entry.
+    """
+    return f'{instruction}\n"{fit_to_budget(content)}"'
@@ -0,0 +1,56 @@
+import re
+import unicodedata
+from typing import Set
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by for from had has have he her him his i
+    if in into is it its me my myself of on or our she so than that the their
+    them then there these they this to too was we were what when which who
+    will with would you your
+    """.split()
+)
+# Longest suffix first; a light stemmer so "worried"/"worrying"/"worries"
+# land on the same token without pulling in an NLP dependency.
+_SUFFIXES = (
+    "ational", "fulness", "iveness", "ization", "ations", "ments", "ness",
+    "ment", "ing", "ies", "ied", "ers", "est", "ful", "ed", "es", "er", "ly", "s",
+)
+
+
+def _strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in normalized if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """
+    Strip a common English suffix, keeping at least three characters.
+    """
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            if suffix in ("ies", "ied"):
+                word += "y"
+            break
+    return word
+
+
+def extract_terms(text: str) -> Set[str]:
+    """
+    Normalize text into the set of search terms (lowercase, accent-free,
+    stemmed words with stopwords removed).
+
+    Args:
+        text (str): The plaintext to index or the search query.
+
+    Returns:
+        Set[str]: The distinct terms.
+    """
+    words = _WORD_PATTERN.findall(_strip_accents(text.lower()))
+    return {
+        stem(word.strip("'"))
+        for word in words
+        if len(word.strip("'")) > 1 and word.strip("'") not in STOPWORDS
+    }
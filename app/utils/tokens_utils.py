@@ -1,13 +1,212 @@
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+from uuid import uuid4
 from fastapi import HTTPException, status
 import jwt
+from jwt.utils import base64url_decode, base64url_encode
 from app.models.auth import TokenData
 from app.core.config import (
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_MINUTES,
+    JWT_PRIVATE_KEY,
+    JWT_PUBLIC_KEY,
+    JWT_KEY_ID,
+    TOKEN_CACHE_SIZE,
+)
+from app.services.token_revocation import revoked_sessions
+from app.utils.json_utils import dumps, loads
+
+
+class _VerifiedTokens:
+    """
+    LRU of tokens whose signature and claims were already checked, with the
+    claims they carried. Entries are dropped once the token expires.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._entries: "OrderedDict[str, Tuple[TokenData, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[TokenData]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token: str, data: TokenData, expires: float) -> None:
+        if self._size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (data, expires)
+            self._entries.move_to_end(token)
+            if len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenService:
+    """
+    Issues and verifies the app's JWTs with keys prepared once.
+
+    HS* algorithms sign and verify with the shared secret. EdDSA and ES*
+    sign with the private key and verify with the public key, which `jwks`
+    publishes for other services.
+
+    Tokens carrying the header this service sends are verified without
+    PyJWT's generic path: the signature is checked with the prepared key and
+    only the claims the app relies on (exp, iat, sub, type) are validated.
+    Tokens with any other header go through `jwt.decode`. Either way the
+    result is cached until the token expires.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret: Optional[str] = None,
+        private_key: Optional[str] = None,
+        public_key: Optional[str] = None,
+        key_id: Optional[str] = None,
+        cache_size: int = 0,
+    ):
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self.asymmetric = not algorithm.startswith("HS")
+        self._alg = jwt.get_algorithm_by_name(algorithm)
+        if self.asymmetric:
+            if not private_key:
+                raise ValueError(f"JWT_PRIVATE_KEY must be set to sign {algorithm} tokens")
+            self._signing_key = self._alg.prepare_key(private_key.replace("\\n", "\n"))
+            self._verify_key = (
+                self._alg.prepare_key(public_key.replace("\\n", "\n"))
+                if public_key
+                else self._signing_key.public_key()
+            )
+        else:
+            self._signing_key = self._verify_key = self._alg.prepare_key(secret)
+        # Same key order and spacing as jwt.encode, so tokens issued before
+        # this service existed still take the fast path
+        header = {"alg": algorithm}
+        if key_id:
+            header["kid"] = key_id
+        header["typ"] = "JWT"
+        self._header = base64url_encode(dumps(header)).decode()
+        self._verified = _VerifiedTokens(cache_size)
+
+    def issue(self, claims: Dict[str, Any], token_type: str, expires_in: timedelta) -> str:
+        """
+        Sign `claims` plus `type`, `iat`, `exp` and a random `jti`, so no two
+        tokens are the same string even when issued in the same second.
+        """
+        now = int(time.time())
+        payload = {
+            **claims,
+            "type": token_type,
+            "iat": now,
+            "exp": now + int(expires_in.total_seconds()),
+            "jti": uuid4().hex,
+        }
+        signing_input = f"{self._header}.{base64url_encode(dumps(payload)).decode()}"
+        signature = self._alg.sign(signing_input.encode(), self._signing_key)
+        return f"{signing_input}.{base64url_encode(signature).decode()}"
+
+    def verify(self, token: str) -> TokenData:
+        """
+        Check a token's signature and claims.
+
+        Raises:
+            jwt.PyJWTError: The same errors `jwt.decode` raises.
+        """
+        data = self._verified.get(token)
+        if data is not None:
+            return data
+        header, _, rest = token.partition(".")
+        if header == self._header:
+            payload = self._verify_own(token, rest)
+        else:
+            payload = jwt.decode(
+                token,
+                self._verify_key,
+                algorithms=[self.algorithm],
+                options={"require": ["exp"]},
+            )
+        if payload.get("sub") is None or payload.get("type") is None:
+            raise jwt.InvalidTokenError("Token has no subject or type")
+        data = TokenData(
+            user_id=payload["sub"],
+            type=payload["type"],
+            jti=payload.get("jti"),
+            family=payload.get("fam"),
+            generation=payload.get("gen"),
+            exp=payload["exp"],
+        )
+        self._verified.put(token, data, payload["exp"])
+        return data
+
+    def _verify_own(self, token: str, rest: str) -> Dict[str, Any]:
+        payload_segment, _, signature_segment = rest.partition(".")
+        try:
+            signature = base64url_decode(signature_segment)
+        except ValueError as e:
+            raise jwt.DecodeError("Invalid signature padding") from e
+        signing_input = token[: len(self._header) + 1 + len(payload_segment)].encode()
+        if not self._alg.verify(signing_input, self._verify_key, signature):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+        try:
+            payload = loads(base64url_decode(payload_segment))
+        except ValueError as e:
+            raise jwt.DecodeError("Invalid payload") from e
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload")
+
+        # Only this service's keys can sign these, and it never sets nbf/aud/iss
+        now = time.time()
+        exp = payload.get("exp")
+        if exp is None:
+            raise jwt.MissingRequiredClaimError("exp")
+        if not isinstance(exp, (int, float)) or isinstance(exp, bool):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.")
+        if exp <= now:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        iat = payload.get("iat")
+        if iat is not None and (not isinstance(iat, (int, float)) or iat > now):
+            raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+        return payload
+
+    def jwks(self) -> Dict[str, Any]:
+        """The public verification key as a JWK Set (empty for HS* secrets)."""
+        if not self.asymmetric:
+            return {"keys": []}
+        jwk = self._alg.to_jwk(self._verify_key, as_dict=True)
+        jwk.update({"alg": self.algorithm, "use": "sig"})
+        if self.key_id:
+            jwk["kid"] = self.key_id
+        return {"keys": [jwk]}
+
+    def clear_cache(self) -> None:
+        self._verified.clear()
+
+
+token_service = TokenService(
+    ALGORITHM,
+    secret=SECRET_KEY,
+    private_key=JWT_PRIVATE_KEY,
+    public_key=JWT_PUBLIC_KEY,
+    key_id=JWT_KEY_ID,
+    cache_size=TOKEN_CACHE_SIZE,
 )
 
 
@@ -23,16 +222,9 @@ def create_access_token(data: dict, expire_delta: Optional[timedelta] = None) ->
     Returns:
         str: The encoded JWT access token.
     """
-    to_encode = data.copy()
-    if expire_delta:
-        expire = datetime.now(timezone.utc) + expire_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return token_service.issue(
+        data, "access", expire_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
 
 
 # JWT token refresh
@@ -47,16 +239,34 @@ def create_refresh_token(data: dict, expire_delta: Optional[timedelta] = None) -
     Returns:
         str: The encoded JWT refresh token.
     """
-    to_encode = data.copy()
-    if expire_delta:
-        expire = datetime.now(timezone.utc) + expire_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=REFRESH_TOKEN_EXPIRE_MINUTES
-        )
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return token_service.issue(
+        data, "refresh", expire_delta or timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode_token(token: str, token_type: str) -> TokenData:
+    if not token:
+        raise _unauthorized("Invalid Token")
+    try:
+        token_data = token_service.verify(token)
+    except jwt.ExpiredSignatureError:
+        raise _unauthorized("Token has expired")
+    except (jwt.PyJWTError, ValueError):
+        # ValueError: a subject that is not a UUID
+        raise _unauthorized("Invalid Token")
+    if token_data.type != token_type:
+        raise _unauthorized("Invalid Token type")
+    if token_data.family is not None and revoked_sessions.contains(token_data.family):
+        raise _unauthorized("Session has been revoked")
+    return token_data
 
 
 # Decode JWT access token
@@ -64,38 +274,10 @@ def decode_access_token(token: str) -> TokenData:
     """
     Decode a JWT access token.
 
-    Args:
-        token (str): The JWT access token to decode.
-
-    Returns:
-        TokenData: The decoded token data.
-
     Raises:
-        HTTPException: If the token is invalid or expired.
+        HTTPException: If the token is invalid, expired or not an access token.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        token_type: str = payload.get("type")
-        if user_id is None or token_type is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return TokenData(user_id=user_id, type=token_type)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid Token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    return _decode_token(token, "access")
 
 
 # Decode JWT refresh token
@@ -103,35 +285,7 @@ def decode_refresh_token(token: str) -> TokenData:
     """
     Decode a JWT refresh token.
 
-    Args:
-        token (str): The JWT refresh token to decode.
-
-    Returns:
-        TokenData: The decoded token data.
-
     Raises:
-        HTTPException: If the token is invalid or expired.
+        HTTPException: If the token is invalid, expired or not a refresh token.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        token_type: str = payload.get("type")
-        if user_id is None or token_type is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return TokenData(user_id=user_id, type=token_type)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid Token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    return _decode_token(token, "refresh")
@@ -1,13 +1,27 @@
 from http.client import HTTPException
 from fastapi import FastAPI,Request,HTTPException,Response
-from app.api.routes import auth_routes, journals_route
+from app.api.routes import admin_routes, auth_routes, journals_route
 from fastapi.middleware.cors import CORSMiddleware
 from app.services.db import engine, Base
+from app.services.llm_quota import usage as llm_usage
 from contextlib import asynccontextmanager
+from anyio import to_thread
+from app.services.inflight import inflight
+from app.services.token_revocation import revoked_sessions
 from slowapi import Limiter,_rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.core.config import (
+    RESPONSE_COMPRESSION_MIN_SIZE,
+    RESPONSE_COMPRESSION_LEVEL,
+    RESPONSE_BROTLI_QUALITY,
+    RESPONSE_ZSTD_LEVEL,
+    RESPONSE_COMPRESSION_ENCODINGS,
+    THREADPOOL_SIZE,
+    SERVER_GRACEFUL_TIMEOUT,
+)
 
 # Create a custom rate limiter that exempts OPTIONS requests
 def custom_key_func(request: Request):
@@ -28,7 +42,15 @@ async def lifespan(app: FastAPI):
         raise HTTPException(
             detail=str(e)
         )
+    # Sync endpoints run in this pool; see THREADPOOL_SIZE
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Revoked sessions are checked on every request; load them before serving
+    await to_thread.run_sync(revoked_sessions.sync)
     yield
+    # Let Gemini calls and email sends that outlived their requests finish,
+    # then write any LLM usage counters still held in memory
+    await inflight.drain(SERVER_GRACEFUL_TIMEOUT)
+    llm_usage.flush()
 
 app = FastAPI(title="FeelLog", version="1.0.0", lifespan=lifespan)
 
@@ -65,10 +87,21 @@ async def add_security_headers(request: Request, call_next):
 app.state.limiter = limiter #type: ignore
 app.add_exception_handler(RateLimitExceeded,_rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
+# Added last so it is outermost and compresses the final response, security
+# headers included
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=RESPONSE_COMPRESSION_MIN_SIZE,
+    gzip_level=RESPONSE_COMPRESSION_LEVEL,
+    brotli_quality=RESPONSE_BROTLI_QUALITY,
+    zstd_level=RESPONSE_ZSTD_LEVEL,
+    encodings=RESPONSE_COMPRESSION_ENCODINGS,
+)
 
 
 app.include_router(auth_routes.router, prefix="/api")
 app.include_router(journals_route.router, prefix="/api")
+app.include_router(admin_routes.router, prefix="/api")
 
 @app.get("/")
 @limiter.limit("30/minute")
@@ -0,0 +1,73 @@
+"""
+Update or print the cross-user daily stats behind /api/admin/stats.
+
+`run` folds journals and affirmations written since the previous run into
+the aggregate tables, reading them in (ingested_at, id) order from the
+stored watermark, so each run only touches new rows and can be scheduled
+as often as you like (e.g. every 5 minutes from cron). `report` prints
+the stats from the aggregate tables alone.
+
+Usage:
+    python -m scripts.aggregate_stats run [--batch-size 5000] [--max-batches N]
+    python -m scripts.aggregate_stats report [--days 30] [--end 2026-10-19]
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+from app.core.config import AGGREGATION_BATCH_SIZE
+from app.services.aggregate_stats import load_stats_report, run_aggregation
+from app.services.db import SessionLocal
+
+
+def _run(args):
+    start = time.perf_counter()
+    counted = run_aggregation(args.batch_size, args.max_batches)
+    rows = ", ".join(f"{count} {source}" for source, count in counted.items())
+    print(f"counted {rows} in {time.perf_counter() - start:.1f}s")
+
+
+def _format(value, suffix=""):
+    return "-" if value is None else f"{value}{suffix}"
+
+
+def _report(args):
+    end = args.end or datetime.now(timezone.utc).date()
+    db = SessionLocal()
+    try:
+        report = load_stats_report(db, end - timedelta(days=args.days - 1), end)
+    finally:
+        db.close()
+
+    print(
+        f"{'date':<10} {'active':>7} {'entries':>8} {'pos':>6} {'neg':>6} {'neu':>6} "
+        f"{'pending':>7} {'mood':>7} {'affirm':>7} {'rate':>6}"
+    )
+    for row in report["days"] + [{**report, "date": "total"}]:
+        sentiment = row["sentiment"]
+        print(
+            f"{str(row['date']):<10} {row['active_users']:>7} {row['entries']:>8} "
+            f"{sentiment['positive']:>6} {sentiment['negative']:>6} {sentiment['neutral']:>6} "
+            f"{sentiment['pending']:>7} {_format(row['mood']):>7} {row['affirmations']:>7} "
+            f"{_format(row['affirmation_rate']):>6}"
+        )
+    for source, as_of in report["as_of"].items():
+        print(f"{source} counted up to {_format(as_of)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Aggregate rows written since the last run")
+    run.add_argument("--batch-size", type=int, default=AGGREGATION_BATCH_SIZE)
+    run.add_argument("--max-batches", type=int, default=None, help="Per source; default all")
+    run.set_defaults(handler=_run)
+    report = commands.add_parser("report", help="Print daily stats")
+    report.add_argument("--days", type=int, default=30)
+    report.add_argument("--end", type=date.fromisoformat, default=None, help="Last UTC date")
+    report.set_defaults(handler=_report)
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Copy existing journals and affirmations into the partitioned shadow tables.
+
+Step 2 of the optional journal partitioning (see
+alembic/partitioning/e3b9c7a1d460_journals_partitioned_shadow.py). Safe
+to run while the app is serving traffic and to re-run after a failure:
+rows are copied in id order, one short transaction per batch, and the
+mirror triggers keep already-copied rows up to date. Each batch takes
+KEY SHARE locks on its source rows, so a concurrent delete waits for the
+batch to commit and its trigger then removes the copy.
+
+Usage:
+    python -m scripts.backfill_journal_partitions [--batch-size 2000] [--pause 0.05]
+"""
+import argparse
+import time
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from app.services.db import SessionLocal
+
+JOURNAL_COLUMNS = (
+    "id, title, content, user_id, sentiment_label, sentiment_score, "
+    "created_at, sentiment_pending, content_fingerprint, ingested_at"
+)
+AFFIRMATION_COLUMNS = "id, input_summary, affirmations, journal_id, user_id, ingested_at"
+
+NEXT_BATCH = text(
+    "SELECT id FROM journals WHERE (CAST(:last_id AS uuid) IS NULL OR id > :last_id) "
+    "ORDER BY id LIMIT :batch_size FOR KEY SHARE"
+)
+_ids = bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))
+COPY_JOURNALS = text(
+    f"INSERT INTO journals_p ({JOURNAL_COLUMNS}) "
+    f"SELECT {JOURNAL_COLUMNS} FROM journals WHERE id = ANY(:ids) "
+    "ON CONFLICT DO NOTHING"
+).bindparams(_ids)
+COPY_AFFIRMATIONS = text(
+    f"WITH source AS (SELECT {AFFIRMATION_COLUMNS} FROM affirmations "
+    "WHERE journal_id = ANY(:ids) FOR KEY SHARE) "
+    f"INSERT INTO affirmations_p ({AFFIRMATION_COLUMNS}) SELECT {AFFIRMATION_COLUMNS} FROM source "
+    "ON CONFLICT DO NOTHING"
+).bindparams(_ids)
+
+
+def _count(db, table):
+    return db.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds between batches")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.execute(text("SELECT to_regclass('journals_p')")).scalar_one() is None:
+            raise SystemExit(
+                "journals_p does not exist; run "
+                "`alembic -n journals_partitioned upgrade journals_partitioning@e3b9c7a1d460` first"
+            )
+        last_id = None
+        copied = 0
+        start = time.perf_counter()
+        while True:
+            batch = list(
+                db.execute(
+                    NEXT_BATCH, {"last_id": last_id, "batch_size": args.batch_size}
+                ).scalars()
+            )
+            if not batch:
+                db.commit()
+                break
+            db.execute(COPY_JOURNALS, {"ids": batch})
+            db.execute(COPY_AFFIRMATIONS, {"ids": batch})
+            db.commit()
+            last_id = batch[-1]
+            copied += len(batch)
+            print(f"\r{copied} journals scanned ({time.perf_counter() - start:.0f}s)", end="")
+            time.sleep(args.pause)
+        print()
+        for live, shadow in (("journals", "journals_p"), ("affirmations", "affirmations_p")):
+            print(f"{live}: {_count(db, live)} rows, {shadow}: {_count(db, shadow)} rows")
+        db.commit()
+    finally:
+        db.close()
+    print(
+        "Once the counts match, swap with "
+        "`alembic -n journals_partitioned upgrade journals_partitioning@head`."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure response compression on seeded journal payloads.
+
+Builds synthetic journal list, sentiment overview and NDJSON export bodies
+in memory, then reports the compression ratio and CPU time of every
+encoding the compression middleware can use here, at a few levels.
+
+Usage:
+    python -m scripts.bench_compression [--rows 1000] [--repeat 10]
+"""
+import argparse
+import time
+from app.middleware.compression import build_encoders
+from app.utils.json_utils import dumps
+from scripts.bench_serialization import _entries
+
+LEVELS = {
+    "gzip": [1, 6, 9],
+    "br": [1, 4, 11],
+    "zstd": [1, 3, 19],
+}
+
+
+def _payloads(rows):
+    dicts, _ = _entries(rows)
+    overview = {
+        "data": [
+            {
+                "entry_id": d["id"],
+                "title": d["title"],
+                "timestamp": d["created_at"],
+                "sentiment_label": d["sentiment_label"],
+                "sentiment_score": d["sentiment_score"],
+            }
+            for d in dicts
+        ]
+    }
+    return {
+        "journal list": dumps(dicts),
+        "overview": dumps(overview),
+        "ndjson export": b"".join(dumps(d) + b"\n" for d in dicts),
+    }
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'payload':>14} {'encoding':>9} {'level':>6} {'KiB':>8} {'ratio':>7} {'ms':>8}")
+    for name, body in _payloads(args.rows).items():
+        print(f"{name:>14} {'identity':>9} {'-':>6} {len(body) / 1024:>8.0f}")
+        for encoding, levels in LEVELS.items():
+            for level in levels:
+                encoders = build_encoders([encoding], level, level, level)
+                if encoding not in encoders:
+                    continue
+                compress = encoders[encoding].compress
+                size = len(compress(body))
+                print(
+                    f"{'':>14} {encoding:>9} {level:>6} {size / 1024:>8.0f} "
+                    f"{len(body) / size:>7.1f} {_time(lambda: compress(body), args.repeat):>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Check partition pruning for the journal route queries (PostgreSQL only).
+
+Seeds throwaway users with synthetic encrypted journals (a third with
+affirmations), runs the real list, overview, search, export and update
+lookups for one of them while capturing the SQL they send, then EXPLAIN
+ANALYZEs each statement and reports which journal/affirmation relations
+it touched, the buffers it read and its execution time. Run it before and
+after the partitioning swap to compare. The users and their rows are
+deleted afterwards.
+
+Usage:
+    python -m scripts.bench_partition_pruning [--users 200] [--journals 50]
+"""
+import argparse
+import json
+from contextlib import contextmanager
+from uuid import uuid4
+from sqlalchemy import event, insert, text
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.journals_schema import Journal
+from app.schemas.user_schema import User
+from app.services.db import SessionLocal, engine
+from app.services.journal_export import iter_export_batches
+from app.services.journal_reads import load_journal_views, load_sentiment_points
+from app.utils.encryption_utils import encrypt_data
+
+captured = []
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT"):
+        captured.append((statement, parameters))
+
+
+@contextmanager
+def _capturing():
+    captured.clear()
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def _seed(db, user_ids, per_user):
+    journals, affirmations = [], []
+    for user_id in user_ids:
+        for i in range(per_user):
+            journal_id = uuid4()
+            journals.append(
+                {
+                    "id": journal_id,
+                    "title": encrypt_data(f"Entry {i}", user_id),
+                    "content": encrypt_data("A synthetic entry about the day", user_id),
+                    "user_id": user_id,
+                    "sentiment_label": "negative" if i % 3 == 0 else "neutral",
+                    "sentiment_score": 50.0,
+                }
+            )
+            if i % 3 == 0:
+                affirmations.append(
+                    {
+                        "id": uuid4(),
+                        "journal_id": journal_id,
+                        "user_id": user_id,
+                        "input_summary": encrypt_data("Summary", user_id),
+                        "affirmations": encrypt_data(json.dumps(["You are doing well"]), user_id),
+                    }
+                )
+    db.execute(insert(Journal), journals)
+    db.execute(insert(Affirmation), affirmations)
+    db.commit()
+
+
+def _relations(plan, found):
+    name = plan.get("Relation Name", "")
+    if name.startswith(("journals", "affirmations")):
+        found.add(name)
+    for child in plan.get("Plans", []):
+        _relations(child, found)
+    return found
+
+
+def _explain(statement, parameters):
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+        result = cursor.fetchone()[0][0]
+        raw.rollback()
+    finally:
+        raw.close()
+    plan = result["Plan"]
+    buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    return sorted(_relations(plan, set())), buffers, result["Execution Time"]
+
+
+def _partition_counts(db):
+    rows = db.execute(
+        text(
+            "SELECT parent.relname, count(*) FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname IN ('journals', 'affirmations') GROUP BY parent.relname"
+        )
+    )
+    return dict(rows.all())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--journals", type=int, default=50, help="Journals per user")
+    args = parser.parse_args()
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Partition pruning can only be checked on PostgreSQL")
+
+    db = SessionLocal()
+    user_ids = []
+    for i in range(args.users):
+        user = User(
+            email=f"bench-{uuid4().hex}@example.invalid",
+            full_name="Partition Benchmark",
+            hashed_password="-",
+            is_active=False,
+        )
+        db.add(user)
+        db.flush()
+        user_ids.append(user.id)
+    db.commit()
+    try:
+        _seed(db, user_ids, args.journals)
+        db.execute(text("ANALYZE journals"))
+        db.execute(text("ANALYZE affirmations"))
+        db.commit()
+        partitions = _partition_counts(db)
+        print(
+            f"journals: {partitions.get('journals', 'not')} partitions, "
+            f"affirmations: {partitions.get('affirmations', 'not')} partitions"
+        )
+
+        user_id = user_ids[len(user_ids) // 2]
+        some_ids = [view.id for view in load_journal_views(db, user_id)[:5]]
+        db.rollback()
+        queries = {
+            "list": lambda: load_journal_views(db, user_id),
+            "overview": lambda: load_sentiment_points(db, user_id),
+            "search": lambda: load_journal_views(db, user_id, Journal.id.in_(some_ids)),
+            "export": lambda: list(iter_export_batches(user_id)),
+            "update lookup": lambda: db.query(Journal)
+            .filter(Journal.id == some_ids[0], Journal.user_id == user_id)
+            .first(),
+        }
+        print(f"{'query':>14} {'ms':>7} {'buffers':>8}  relations")
+        for name, run in queries.items():
+            with _capturing() as statements:
+                run()
+            db.rollback()
+            for statement, parameters in statements:
+                relations, buffers, ms = _explain(statement, parameters)
+                print(f"{name:>14} {ms:>7.2f} {buffers:>8}  {', '.join(relations)}")
+    finally:
+        db.rollback()
+        db.query(Affirmation).filter(Affirmation.user_id.in_(user_ids)).delete(
+            synchronize_session=False
+        )
+        db.query(Journal).filter(Journal.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure how long /add_journal holds a pooled DB connection per request.
+
+Runs add_journal through the app with Gemini replaced by a fake that
+sleeps for --llm-delay seconds per call (every entry is negative, so each
+request makes a sentiment and an affirmations call). Reports wall time,
+connection hold time and checkouts per request, with the connection
+released before the LLM calls (current) and held throughout (legacy).
+The throwaway user and its rows are deleted afterwards.
+
+Usage:
+    python -m scripts.bench_pool_occupancy [--requests 20] [--llm-delay 0.3]
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from main import app
+import app.api.routes.journals_route as journals_route
+import app.utils.affirmations_utils as affirmations_utils
+from app.schemas.journals_schema import Journal
+from app.schemas.user_schema import User
+from app.services.db import SessionLocal, pool_occupancy
+from app.utils.tokens_utils import create_access_token
+
+SENTIMENT = json.dumps({"label": "negative", "probability": 80})
+AFFIRMATIONS = json.dumps(
+    {"input_summary": "A hard day", "affirmations": [f"Affirmation {i}" for i in range(5)]}
+)
+
+
+def _fake_client(delay):
+    def generate_content(model=None, contents=None, config=None, **kwargs):
+        time.sleep(delay)
+        schema = getattr(getattr(config, "response_schema", None), "__name__", "")
+        text = AFFIRMATIONS if "Affirmations" in schema else SENTIMENT
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=100, candidates_token_count=20, total_token_count=120
+            ),
+        )
+
+    client = mock.MagicMock()
+    client.models.generate_content.side_effect = generate_content
+    return client
+
+
+def _run(client, headers, count):
+    before = pool_occupancy()
+    start = time.perf_counter()
+    for i in range(count):
+        response = client.post(
+            "/api/add_journal",
+            json={"title": f"Entry {i}", "content": "A long and tiring day"},
+            headers=headers,
+        )
+        response.raise_for_status()
+    wall_ms = (time.perf_counter() - start) * 1000 / count
+    after = pool_occupancy()
+    held_ms = (after["held_ms"] - before["held_ms"]) / count
+    checkouts = (after["checkouts"] - before["checkouts"]) / count
+    return wall_ms, held_ms, checkouts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--llm-delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    affirmations_utils.client = _fake_client(args.llm_delay)
+    journals_route.limiter.enabled = False
+    app.state.limiter.enabled = False
+
+    db = SessionLocal()
+    user = User(
+        email=f"bench-{uuid4().hex}@example.invalid",
+        full_name="Pool Benchmark",
+        hashed_password="-",
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+    try:
+        with TestClient(app) as client:
+            print(f"{'mode':>8} {'wall ms':>9} {'held ms':>9} {'checkouts':>10}")
+            wall, held, checkouts = _run(client, headers, args.requests)
+            print(f"{'current':>8} {wall:>9.1f} {held:>9.1f} {checkouts:>10.1f}")
+            with mock.patch.object(journals_route, "release_connection", lambda db: None):
+                wall, held, checkouts = _run(client, headers, args.requests)
+            print(f"{'legacy':>8} {wall:>9.1f} {held:>9.1f} {checkouts:>10.1f}")
+    finally:
+        db = SessionLocal()
+        db.query(Journal).filter(Journal.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
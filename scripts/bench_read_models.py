@@ -0,0 +1,147 @@
+"""
+Benchmark loading the journal list through ORM instances vs column-only
+selects into slotted read models.
+
+Seeds a throwaway user with synthetic encrypted journals (a third of them
+with affirmations), then reports time per 1k rows, peak memory per row
+and how many objects the session is left tracking. The user and its rows
+are deleted afterwards.
+
+Usage:
+    python -m scripts.bench_read_models [--rows 1000,5000] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from uuid import uuid4
+from sqlalchemy import desc, insert
+from sqlalchemy.orm import joinedload
+from app.schemas.affirmations_schema import Affirmation
+from app.schemas.journals_schema import Journal
+from app.schemas.user_schema import User
+from app.services.db import SessionLocal
+from app.services.journal_reads import load_journal_views
+from app.utils.encryption_utils import encrypt_data, decrypt_data
+
+WORDS = (
+    "work family friends exams sleep tired anxious calm walk park rain coffee "
+    "music gym project deadline dinner weekend trip beach grateful lonely"
+).split()
+
+
+def _seed(db, user_id, count):
+    journals, affirmations = [], []
+    for i in range(count):
+        journal_id = uuid4()
+        journals.append(
+            {
+                "id": journal_id,
+                "title": encrypt_data("Synthetic entry", user_id),
+                "content": encrypt_data(" ".join(random.choices(WORDS, k=120)), user_id),
+                "user_id": user_id,
+                "sentiment_label": "negative" if i % 3 == 0 else "neutral",
+                "sentiment_score": 50.0,
+            }
+        )
+        if i % 3 == 0:
+            affirmations.append(
+                {
+                    "id": uuid4(),
+                    "journal_id": journal_id,
+                    "user_id": user_id,
+                    "input_summary": encrypt_data("Summary", user_id),
+                    "affirmations": encrypt_data(
+                        json.dumps([" ".join(random.choices(WORDS, k=8))] * 5), user_id
+                    ),
+                }
+            )
+    db.execute(insert(Journal), journals)
+    if affirmations:
+        db.execute(insert(Affirmation), affirmations)
+    db.commit()
+
+
+def _orm_load(db, user_id):
+    # The pre-read-model path: ORM instances mutated with plaintext
+    journals = (
+        db.query(Journal)
+        .filter(Journal.user_id == user_id)
+        .options(joinedload(Journal.affirmations))
+        .order_by(desc(Journal.created_at))
+        .all()
+    )
+    for journal in journals:
+        journal.title = decrypt_data(journal.title, user_id)
+        journal.content = decrypt_data(journal.content, user_id)
+        for affirmation in journal.affirmations:
+            affirmation.input_summary = decrypt_data(affirmation.input_summary, user_id)
+            affirmation.affirmations = json.loads(
+                decrypt_data(affirmation.affirmations, user_id)
+            )
+    return journals
+
+
+def _measure(load, user_id, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        start = time.perf_counter()
+        load(db, user_id)
+        timings.append(time.perf_counter() - start)
+        db.rollback()
+        db.close()
+
+    db = SessionLocal()
+    tracemalloc.start()
+    result = load(db, user_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracked = len(db.identity_map)
+    del result
+    db.rollback()
+    db.close()
+    return min(timings) * 1000 * 1000 / rows, peak / rows, tracked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000,5000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.rows.split(",")]
+
+    db = SessionLocal()
+    user = User(
+        email=f"bench-{uuid4().hex}@example.invalid",
+        full_name="Read Model Benchmark",
+        hashed_password="-",
+        is_active=False,
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    try:
+        seeded = 0
+        print(f"{'rows':>8} {'path':>12} {'ms/1k':>8} {'bytes/row':>10} {'tracked':>8}")
+        for size in sizes:
+            _seed(db, user_id, size - seeded)
+            seeded = size
+            for name, load in (("orm", _orm_load), ("read models", load_journal_views)):
+                ms, per_row, tracked = _measure(load, user_id, size, args.repeat)
+                print(f"{size:>8} {name:>12} {ms:>8.1f} {per_row:>10.0f} {tracked:>8}")
+    finally:
+        db.rollback()
+        journal_ids = db.query(Journal.id).filter(Journal.user_id == user_id)
+        db.query(Affirmation).filter(Affirmation.journal_id.in_(journal_ids)).delete(
+            synchronize_session=False
+        )
+        db.query(Journal).filter(Journal.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
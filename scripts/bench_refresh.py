@@ -0,0 +1,120 @@
+"""
+Measure sustained /api/auth/refresh throughput in one worker.
+
+Opens --sessions sessions for throwaway users and refreshes each of them
+in its own thread for --seconds, always presenting the token the previous
+refresh returned, through the app with rate limits off. Reports refreshes
+per second, latency percentiles, and SQL statements per refresh (the
+rotation itself is one UPDATE). The users and their sessions are deleted
+afterwards.
+
+Usage:
+    python -m scripts.bench_refresh [--sessions 4] [--seconds 10]
+"""
+import argparse
+import statistics
+import threading
+import time
+from collections import Counter
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from main import app
+import app.api.routes.auth_routes as auth_routes
+from app.schemas.token_schema import RefreshToken
+from app.schemas.user_schema import User
+from app.services.db import SessionLocal, engine
+from app.services.refresh_sessions import start_session
+
+statements = Counter()
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements[statement.lstrip().split(None, 1)[0].upper()] += 1
+
+
+def _refresh_loop(client, session_id, refresh_token, deadline, latencies, errors):
+    cookie = f"refresh_token_{session_id}"
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        response = client.post(
+            "/api/auth/refresh",
+            headers={"X-Session-ID": session_id, "Cookie": f"{cookie}={refresh_token}"},
+        )
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.text)
+            return
+        refresh_token = response.cookies[cookie]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    auth_routes.limiter.enabled = False
+    app.state.limiter.enabled = False
+
+    # One user per session, since a user keeps at most MAX_SESSIONS live
+    db = SessionLocal()
+    users = [
+        User(
+            email=f"bench-{uuid4().hex}@example.invalid",
+            full_name="Refresh Benchmark",
+            hashed_password="-",
+            is_active=True,
+        )
+        for _ in range(args.sessions)
+    ]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.id for user in users]
+    sessions = [start_session(db, user_id) for user_id in user_ids]
+    db.close()
+
+    latencies, errors = [], []
+    try:
+        with TestClient(app, base_url="https://testserver") as client:
+            event.listen(engine, "before_cursor_execute", _count)
+            deadline = time.monotonic() + args.seconds
+            threads = [
+                threading.Thread(
+                    target=_refresh_loop,
+                    args=(client, s.session_id, s.refresh_token, deadline, latencies, errors),
+                )
+                for s in sessions
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            event.remove(engine, "before_cursor_execute", _count)
+    finally:
+        db = SessionLocal()
+        db.query(RefreshToken).filter(RefreshToken.user_id.in_(user_ids)).delete()
+        db.query(User).filter(User.id.in_(user_ids)).delete()
+        db.commit()
+        db.close()
+
+    if errors:
+        print(f"{len(errors)} session(s) failed, first error: {errors[0]}")
+    if not latencies:
+        return
+    ordered = sorted(latencies)
+    print(f"{len(latencies)} refreshes over {args.sessions} sessions in {elapsed:.1f}s")
+    print(f"{len(latencies) / elapsed:.0f} refreshes/s")
+    print(
+        f"latency ms: p50 {statistics.median(ordered) * 1000:.2f}, "
+        f"p95 {ordered[int(len(ordered) * 0.95) - 1] * 1000:.2f}"
+    )
+    per_refresh = ", ".join(
+        f"{kind} {count / len(latencies):.2f}" for kind, count in sorted(statements.items())
+    )
+    print(f"statements per refresh: {per_refresh}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark blind-index search latency against history size.
+
+Seeds a throwaway user with synthetic encrypted journals, then times an
+indexed search against the old approach (decrypt every row and scan) at
+each size. The user and its rows are deleted afterwards.
+
+Usage:
+    python -m scripts.bench_search [--sizes 1000,5000,20000] [--repeat 20]
+"""
+import argparse
+import random
+import time
+from uuid import uuid4
+from sqlalchemy import insert, select
+from app.schemas.journals_schema import Journal
+from app.schemas.search_token_schema import JournalSearchToken
+from app.schemas.user_schema import User
+from app.services.db import SessionLocal
+from app.services.search_index import search_journal_ids, token_rows
+from app.utils.encryption_utils import encrypt_data, decrypt_data
+
+WORDS = (
+    "work family friends exams sleep tired anxious calm walk park rain coffee "
+    "music gym project deadline dinner weekend trip beach grateful lonely "
+    "meeting boss sister brother movie book garden morning evening headache"
+).split()
+
+
+def _entry() -> str:
+    return " ".join(random.choices(WORDS, k=60))
+
+
+def _seed(db, user_id, count):
+    journals, tokens = [], []
+    for _ in range(count):
+        journal_id = uuid4()
+        title, content = "Synthetic entry", _entry()
+        journals.append(
+            {
+                "id": journal_id,
+                "title": encrypt_data(title, user_id),
+                "content": encrypt_data(content, user_id),
+                "user_id": user_id,
+                "sentiment_label": "neutral",
+                "sentiment_score": 50.0,
+            }
+        )
+        tokens.extend(token_rows(user_id, journal_id, title, content))
+    db.execute(insert(Journal), journals)
+    db.execute(insert(JournalSearchToken), tokens)
+    db.commit()
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,5000,20000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    db = SessionLocal()
+    user = User(
+        email=f"bench-{uuid4().hex}@example.invalid",
+        full_name="Search Benchmark",
+        hashed_password="-",
+        is_active=False,
+    )
+    db.add(user)
+    db.commit()
+    try:
+        seeded = 0
+        print(f"{'rows':>8} {'index ms':>10} {'scan ms':>10} {'matches':>8}")
+        for size in sizes:
+            _seed(db, user.id, size - seeded)
+            seeded = size
+            query = "exams tired"
+
+            def indexed():
+                return search_journal_ids(db, user.id, query)
+
+            def scan():
+                rows = db.execute(
+                    select(Journal.id, Journal.content).where(Journal.user_id == user.id)
+                ).all()
+                return [
+                    row.id
+                    for row in rows
+                    if all(word in decrypt_data(row.content, user.id) for word in query.split())
+                ]
+
+            matches = len(indexed())
+            print(
+                f"{size:>8} {_time(indexed, args.repeat):>10.2f} "
+                f"{_time(scan, max(1, args.repeat // 10)):>10.2f} {matches:>8}"
+            )
+    finally:
+        db.rollback()
+        db.query(Journal).filter(Journal.user_id == user.id).delete()
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
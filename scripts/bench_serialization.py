@@ -0,0 +1,108 @@
+"""
+Benchmark serialization of the journal list response.
+
+Builds synthetic, already-decrypted journals in memory (no DB needed) and
+times, per 1k entries:
+
+- orm: the old path; ORM-like objects validated with from_attributes, dumped
+  to JSON-compatible Python, then encoded by the stdlib json module, as
+  FastAPI does for a response_model
+- adapter: plain dicts through `serialize` with the pre-built TypeAdapter
+  (the default)
+- fast: plain dicts encoded by `dumps` without validation (orjson when
+  installed), as `serialize` does with SKIP_RESPONSE_VALIDATION set
+
+Usage:
+    python -m scripts.bench_serialization [--sizes 1000,10000] [--repeat 10]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+from uuid import uuid4
+from pydantic import TypeAdapter
+from app.models.journals import AllJournalsAndAffirmations
+from app.utils.json_utils import dumps, orjson, serialize
+
+WORDS = (
+    "work family friends exams sleep tired anxious calm walk park rain coffee "
+    "music gym project deadline dinner weekend trip beach grateful lonely"
+).split()
+
+adapter = TypeAdapter(List[AllJournalsAndAffirmations])
+
+
+def _entries(count):
+    now = datetime.now(timezone.utc)
+    dicts = []
+    for i in range(count):
+        affirmations = (
+            [{"id": uuid4(), "affirmations": [" ".join(random.choices(WORDS, k=8))] * 5}]
+            if i % 3 == 0
+            else []
+        )
+        dicts.append(
+            {
+                "content": " ".join(random.choices(WORDS, k=120)),
+                "sentiment_label": random.choice(["positive", "negative", "neutral"]),
+                "created_at": now - timedelta(hours=i),
+                "title": "Synthetic entry",
+                "id": uuid4(),
+                "sentiment_score": round(random.uniform(50, 99), 2),
+                "affirmations": affirmations,
+            }
+        )
+    objects = [
+        SimpleNamespace(
+            **{**d, "affirmations": [SimpleNamespace(**a) for a in d["affirmations"]]}
+        )
+        for d in dicts
+    ]
+    return dicts, objects
+
+
+def _orm_path(objects):
+    validated = adapter.validate_python(objects, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _adapter_path(dicts):
+    return serialize(dicts, adapter)
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(f"orjson: {'installed' if orjson is not None else 'not installed'}")
+    print(f"{'rows':>8} {'orm ms/1k':>10} {'adapter ms/1k':>14} {'fast ms/1k':>11} {'KiB':>8}")
+    for size in sizes:
+        dicts, objects = _entries(size)
+        per_k = 1000 / size
+        body = dumps(dicts)
+        print(
+            f"{size:>8} {_time(lambda: _orm_path(objects), args.repeat) * per_k:>10.2f} "
+            f"{_time(lambda: _adapter_path(dicts), args.repeat) * per_k:>14.2f} "
+            f"{_time(lambda: dumps(dicts), args.repeat) * per_k:>11.2f} "
+            f"{len(body) / 1024:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
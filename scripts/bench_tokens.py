@@ -0,0 +1,99 @@
+"""
+Benchmark JWT issue and verify throughput.
+
+For each algorithm, with throwaway keys, reports tokens/sec for:
+
+- pyjwt: `jwt.encode` / `jwt.decode` with the raw key on every call, as
+  tokens_utils did before TokenService
+- service: TokenService.issue, and verify with the cache disabled, so every
+  token's signature is checked
+- cached: verify of tokens already in the verified-token cache
+
+Usage:
+    python -m scripts.bench_tokens [--tokens 2000] [--algorithms HS256,ES256,EdDSA]
+"""
+import argparse
+import secrets
+import time
+from datetime import timedelta
+from uuid import uuid4
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from app.utils.tokens_utils import TokenService
+
+TTL = timedelta(minutes=15)
+
+
+def _keys(algorithm):
+    """(key for jwt.encode, key for jwt.decode, TokenService kwargs)"""
+    if algorithm.startswith("HS"):
+        secret = secrets.token_urlsafe(32)
+        return secret, secret, {"secret": secret}
+    private = (
+        ed25519.Ed25519PrivateKey.generate()
+        if algorithm == "EdDSA"
+        else ec.generate_private_key(ec.SECP256R1())
+    )
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = (
+        private.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        .decode()
+    )
+    return private_pem, public_pem, {"private_key": private_pem}
+
+
+def _rate(count, run):
+    start = time.perf_counter()
+    run()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--algorithms", default="HS256,ES256,EdDSA")
+    args = parser.parse_args()
+    subjects = [str(uuid4()) for _ in range(args.tokens)]
+
+    print(f"{'algorithm':>9} {'step':>7} {'pyjwt/s':>10} {'service/s':>10} {'cached/s':>10}")
+    for algorithm in args.algorithms.split(","):
+        signing_key, verify_key, kwargs = _keys(algorithm)
+        uncached = TokenService(algorithm, cache_size=0, **kwargs)
+        cached = TokenService(algorithm, cache_size=args.tokens, **kwargs)
+
+        def pyjwt_issue():
+            exp = int(time.time() + TTL.total_seconds())
+            return [
+                jwt.encode({"sub": s, "exp": exp, "type": "access"}, signing_key, algorithm=algorithm)
+                for s in subjects
+            ]
+
+        tokens = pyjwt_issue()
+        issue = (
+            _rate(args.tokens, pyjwt_issue),
+            _rate(args.tokens, lambda: [uncached.issue({"sub": s}, "access", TTL) for s in subjects]),
+        )
+        for token in tokens:
+            cached.verify(token)
+        verify = (
+            _rate(
+                args.tokens,
+                lambda: [jwt.decode(t, verify_key, algorithms=[algorithm]) for t in tokens],
+            ),
+            _rate(args.tokens, lambda: [uncached.verify(t) for t in tokens]),
+            _rate(args.tokens, lambda: [cached.verify(t) for t in tokens]),
+        )
+        print(f"{algorithm:>9} {'issue':>7} {issue[0]:>10.0f} {issue[1]:>10.0f} {'':>10}")
+        print(f"{algorithm:>9} {'verify':>7} {verify[0]:>10.0f} {verify[1]:>10.0f} {verify[2]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
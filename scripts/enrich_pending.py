@@ -0,0 +1,34 @@
+"""
+Retry LLM sentiment for imported entries an earlier enrichment left
+pending (the user was over quota, or the LLM answered a batch badly), and
+update their import jobs. Run from cron; a user's next journal write also
+retries their entries in the background.
+
+Usage:
+    python -m scripts.enrich_pending
+"""
+import argparse
+from app.services.db import SessionLocal
+from app.services.journal_enrichment import enrich_pending_journals, users_with_pending_journals
+from app.services.llm_quota import usage as llm_usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_ids = users_with_pending_journals(db)
+    finally:
+        db.close()
+    enriched = 0
+    for user_id in user_ids:
+        if llm_usage.within_budget(user_id):
+            enriched += enrich_pending_journals(user_id)
+    llm_usage.flush()
+    print(f"Enriched {enriched} entries for {len(user_ids)} users with pending entries.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Delete expired password reset codes in batches. Run from cron; requests
+for new codes also purge one batch in the background.
+
+Usage:
+    python -m scripts.purge_password_reset_otps [--batch-size N]
+"""
+import argparse
+from app.core.config import OTP_PURGE_BATCH_SIZE
+from app.services.password_reset import purge_expired_otps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=OTP_PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    purged = purge_expired_otps(batch_size=args.batch_size)
+    print(f"Purged {purged} expired codes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Rebuild the blind search index for existing journals.
+
+Usage:
+    python -m scripts.rebuild_search_index [--user-id UUID] [--batch-size N]
+"""
+import argparse
+from uuid import UUID
+from app.services.db import SessionLocal
+from app.services.search_index import rebuild_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", type=UUID, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        indexed = rebuild_index(db, user_id=args.user_id, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Indexed {indexed} journals.")
+
+
+if __name__ == "__main__":
+    main()
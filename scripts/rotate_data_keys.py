@@ -0,0 +1,70 @@
+"""
+Rotate per-user data keys and re-encrypt journal data online.
+
+Usage:
+    python -m scripts.rotate_data_keys [--user-id UUID] [--new-key]
+        [--batch-size N] [--rows-per-second N]
+    python -m scripts.rotate_data_keys --rewrap
+
+Without --user-id every user is processed, one at a time. The first run
+after upgrading moves rows encrypted with the global FERNET_KEY onto
+per-user keys. --new-key issues a fresh data key before re-encrypting.
+--rewrap re-wraps data keys under the first key in MASTER_KEYS.
+"""
+import argparse
+from uuid import UUID
+from app.schemas.user_schema import User
+from app.services.db import SessionLocal
+from app.services.key_rotation import (
+    rotate_user_key,
+    reencrypt_user_rows,
+    rewrap_data_keys,
+)
+
+
+def _user_ids(db, batch_size):
+    last_id = None
+    while True:
+        query = db.query(User.id)
+        if last_id is not None:
+            query = query.filter(User.id > last_id)
+        ids = [row.id for row in query.order_by(User.id).limit(batch_size).all()]
+        db.commit()
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield from ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", type=UUID, default=None)
+    parser.add_argument("--new-key", action="store_true")
+    parser.add_argument("--rewrap", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--rows-per-second", type=float, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rewrap:
+            print(f"Re-wrapped {rewrap_data_keys(db)} data keys.")
+            return
+        user_ids = [args.user_id] if args.user_id else _user_ids(db, 500)
+        total = 0
+        for user_id in user_ids:
+            if args.new_key:
+                rotate_user_key(db, user_id)
+            total += reencrypt_user_rows(
+                db,
+                user_id,
+                batch_size=args.batch_size,
+                rows_per_second=args.rows_per_second,
+            )
+        print(f"Re-encrypted {total} rows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Production entry point: runs `main:app` under uvicorn with the settings
+from app/core/config.py.
+
+    python server.py
+
+One worker process per available CPU unless WEB_CONCURRENCY is set. Each
+worker has its own DB pool (DB_POOL_SIZE + DB_MAX_OVERFLOW connections)
+and a threadpool of THREADPOOL_SIZE for sync endpoints. uvloop and
+httptools are used when installed (`pip install uvicorn[standard]`).
+On SIGTERM, workers stop accepting connections, wait up to
+SERVER_GRACEFUL_TIMEOUT seconds for in-flight requests, then as long
+again for Gemini calls and email sends (see main.lifespan).
+"""
+import logging
+import os
+from importlib.util import find_spec
+import uvicorn
+from app.core.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_KEEP_ALIVE,
+    SERVER_PORT,
+    THREADPOOL_SIZE,
+    WEB_CONCURRENCY,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: its affinity mask, further limited by a
+    cgroup v2 CPU quota when running in a container.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def main():
+    workers = WEB_CONCURRENCY or available_cpus()
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    logging.basicConfig(level=logging.INFO)
+    logger.info(
+        "Starting %d worker(s) (%s, %s), %d threads and up to %d DB connections each",
+        workers,
+        loop,
+        http,
+        THREADPOOL_SIZE,
+        DB_POOL_SIZE + DB_MAX_OVERFLOW,
+    )
+    uvicorn.run(
+        "main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
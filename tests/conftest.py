@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from cryptography.fernet import Fernet
+
+# app.core.config reads these at import time; point the app at a throwaway
+# sqlite database unless the environment already configures one
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("FERNET_KEY", Fernet.generate_key().decode())
+
+import uuid  # noqa: E402
+
+import pytest  # noqa: E402
+
+from app.schemas import User  # noqa: E402
+from app.services.db import Base, SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _tables():
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    user = User(
+        email=f"{uuid.uuid4()}@example.com", full_name="Test User", hashed_password="x"
+    )
+    db.add(user)
+    db.commit()
+    return user.id
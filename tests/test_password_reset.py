@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.schemas.password_reset_otp_schema import PasswordResetFailure, PasswordResetOtp
+from app.services import password_reset
+from app.services.password_reset import consume_otp, issue_otp
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(password_reset, "OTP_MAX_ATTEMPTS", 5)
+    monkeypatch.setattr(password_reset, "OTP_MAX_FAILURES", 10)
+    # Re-issuing codes back to back is covered by its own test
+    monkeypatch.setattr(password_reset, "OTP_RESEND_SECONDS", 0)
+    monkeypatch.setattr(password_reset, "_recent_codes", password_reset._Counters(0))
+    monkeypatch.setattr(password_reset, "_failures", password_reset._Counters(3600))
+
+
+def _wrong(code):
+    return f"{(int(code) + 1) % 1_000_000:06d}"
+
+
+def _failures(db, user):
+    return db.execute(
+        select(PasswordResetFailure.failures).where(PasswordResetFailure.user_id == user)
+    ).scalar()
+
+
+def test_correct_code_is_single_use(db, user):
+    code = issue_otp(db, user)
+
+    assert consume_otp(db, user, code)
+    db.commit()
+    assert not consume_otp(db, user, code)
+
+
+def test_resend_window(db, user, monkeypatch):
+    monkeypatch.setattr(password_reset, "OTP_RESEND_SECONDS", 60)
+
+    assert issue_otp(db, user) is not None
+    assert issue_otp(db, user) is None
+
+
+def test_code_is_deleted_after_max_attempts(db, user):
+    code = issue_otp(db, user)
+
+    for _ in range(password_reset.OTP_MAX_ATTEMPTS):
+        assert not consume_otp(db, user, _wrong(code))
+
+    assert not consume_otp(db, user, code)
+    assert db.execute(select(PasswordResetOtp.id).where(PasswordResetOtp.user_id == user)).first() is None
+
+
+def test_lockout_across_reissued_codes(db, user):
+    guesses = 0
+    # More rounds than the limit allows, so a reset on re-issue fails here
+    # instead of looping forever
+    for _ in range(password_reset.OTP_MAX_FAILURES + 1):
+        code = issue_otp(db, user)
+        if code is None:
+            break
+        for _ in range(password_reset.OTP_MAX_ATTEMPTS):
+            consume_otp(db, user, _wrong(code))
+            guesses += 1
+
+    # Re-issuing never reset the count: no more than OTP_MAX_FAILURES
+    # guesses in total, across codes
+    assert guesses == password_reset.OTP_MAX_FAILURES
+    assert _failures(db, user) == password_reset.OTP_MAX_FAILURES
+
+
+def test_lockout_is_kept_in_the_db(db, user, monkeypatch):
+    code = issue_otp(db, user)
+    for _ in range(password_reset.OTP_MAX_ATTEMPTS):
+        consume_otp(db, user, _wrong(code))
+    code = issue_otp(db, user)
+    for _ in range(password_reset.OTP_MAX_ATTEMPTS):
+        consume_otp(db, user, _wrong(code))
+
+    # Another worker, or a restart, has no count in memory
+    monkeypatch.setattr(password_reset, "_failures", password_reset._Counters(3600))
+
+    assert issue_otp(db, user) is None
+
+
+def test_correct_code_rejected_once_locked_out(db, user, monkeypatch):
+    # Keep the code alive past the account limit
+    monkeypatch.setattr(password_reset, "OTP_MAX_ATTEMPTS", 100)
+    code = issue_otp(db, user)
+    for _ in range(password_reset.OTP_MAX_FAILURES):
+        assert not consume_otp(db, user, _wrong(code))
+
+    assert not consume_otp(db, user, code)
+    monkeypatch.setattr(password_reset, "_failures", password_reset._Counters(3600))
+    assert not consume_otp(db, user, code)
+
+
+def test_lockout_ends_with_the_window(db, user, monkeypatch):
+    code = issue_otp(db, user)
+    for _ in range(password_reset.OTP_MAX_ATTEMPTS):
+        consume_otp(db, user, _wrong(code))
+    code = issue_otp(db, user)
+    for _ in range(password_reset.OTP_MAX_ATTEMPTS):
+        consume_otp(db, user, _wrong(code))
+    assert issue_otp(db, user) is None
+
+    db.execute(
+        update(PasswordResetFailure)
+        .where(PasswordResetFailure.user_id == user)
+        .values(
+            window_started_at=datetime.now(timezone.utc)
+            - password_reset.FAILURE_WINDOW
+            - timedelta(seconds=1)
+        )
+    )
+    db.commit()
+    monkeypatch.setattr(password_reset, "_failures", password_reset._Counters(3600))
+
+    code = issue_otp(db, user)
+    assert code is not None
+    consume_otp(db, user, _wrong(code))
+    assert _failures(db, user) == 1
+
+
+def test_success_clears_the_failure_count(db, user):
+    code = issue_otp(db, user)
+    consume_otp(db, user, _wrong(code))
+    assert _failures(db, user) == 1
+
+    assert consume_otp(db, user, code)
+    db.commit()
+
+    assert _failures(db, user) is None
+    assert password_reset._failures.get(user) == 0
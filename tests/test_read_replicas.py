@@ -0,0 +1,175 @@
+import sqlite3
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import Column, Integer, create_engine, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
+
+from app.services import db as db_module
+from app.services.read_replicas import ReplicaSet
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+
+
+def _engine_with_items():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO items (id) VALUES (1)"))
+    return engine
+
+
+class _Switch:
+    """A stub replica whose connection attempts fail while it is down."""
+
+    def __init__(self):
+        self.up = True
+        self.engine = create_engine(
+            "sqlite://", creator=self._connect, poolclass=NullPool
+        )
+
+    def _connect(self):
+        if not self.up:
+            raise sqlite3.OperationalError("replica unreachable")
+        return sqlite3.connect(":memory:")
+
+
+@pytest.fixture
+def primary():
+    return _engine_with_items()
+
+
+@pytest.fixture
+def route(monkeypatch):
+    def install(primary, replica_engines, read_your_writes=5.0):
+        replica_set = ReplicaSet(
+            primary, replica_engines, health_interval=60, read_your_writes=read_your_writes
+        )
+        monkeypatch.setattr(db_module, "replicas", replica_set)
+        return replica_set
+
+    return install
+
+
+def test_round_robin_over_healthy_replicas(primary):
+    first, second = create_engine("sqlite://"), create_engine("sqlite://")
+    replica_set = ReplicaSet(primary, [first, second], health_interval=60, read_your_writes=5)
+
+    assert [replica_set.choose() for _ in range(4)] == [first, second, first, second]
+
+
+def test_no_replicas_uses_primary(primary):
+    replica_set = ReplicaSet(primary, [], health_interval=60, read_your_writes=5)
+
+    assert replica_set.choose() is primary
+
+
+def test_marked_down_replica_is_skipped(primary):
+    first, second = create_engine("sqlite://"), create_engine("sqlite://")
+    replica_set = ReplicaSet(primary, [first, second], health_interval=60, read_your_writes=5)
+
+    replica_set.mark_down(first)
+
+    assert [replica_set.choose() for _ in range(3)] == [second, second, second]
+    replica_set.mark_down(second)
+    assert replica_set.choose() is primary
+
+
+def test_failed_health_probe_marks_replica_down(primary):
+    down, healthy = _Switch(), create_engine("sqlite://")
+    down.up = False
+    replica_set = ReplicaSet(
+        primary, [down.engine, healthy], health_interval=60, read_your_writes=5
+    )
+
+    assert replica_set.choose() is healthy
+    down.up = True
+    # Skipped until its next probe is due, even though it is back
+    assert [replica_set.choose() for _ in range(2)] == [healthy, healthy]
+
+
+def test_read_your_writes_window(primary, monkeypatch):
+    replica = create_engine("sqlite://")
+    replica_set = ReplicaSet(primary, [replica], health_interval=60, read_your_writes=5)
+    writer, other = uuid4(), uuid4()
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    replica_set.note_write(writer)
+
+    assert replica_set.choose(writer) is primary
+    assert replica_set.choose(other) is replica
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert replica_set.choose(writer) is replica
+
+
+def test_read_session_honours_read_your_writes(primary, route):
+    replica_set = route(primary, [_engine_with_items()])
+    user_id = uuid4()
+    replica_set.note_write(user_id)
+
+    session = db_module.ReadSessionLocal()
+    session.info["user_id"] = user_id
+    try:
+        assert session.get_bind() is primary
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize(
+    "read",
+    [
+        lambda session: session.execute(select(Item.id)).scalars().all(),
+        lambda session: session.scalars(select(Item.id)).all(),
+        lambda session: [item.id for item in session.query(Item).all()],
+        lambda session: [session.get(Item, 1).id],
+    ],
+    ids=["execute", "scalars", "query", "get"],
+)
+def test_query_failing_on_replica_falls_back_to_primary(primary, route, read):
+    # The replica is reachable but lacks the table, so the query itself fails
+    broken = create_engine("sqlite://")
+    replica_set = route(primary, [broken])
+
+    session = db_module.ReadSessionLocal()
+    try:
+        assert read(session) == [1]
+        assert session.get_bind() is primary
+    finally:
+        session.close()
+    assert replica_set.choose() is primary
+
+
+def test_connection_failure_on_checkout_falls_back_to_primary(primary, route):
+    replica = _Switch()
+    replica_set = route(primary, [replica.engine])
+    # Passes its health probe, then goes away before the session connects
+    assert replica_set.choose() is replica.engine
+    replica.up = False
+
+    session = db_module.ReadSessionLocal()
+    try:
+        assert [item.id for item in session.query(Item).all()] == [1]
+        assert not session.uses_replica()
+    finally:
+        session.close()
+    assert replica_set.choose() is primary
+
+
+def test_error_on_primary_is_not_retried(primary, route):
+    route(create_engine("sqlite://"), [])
+
+    session = db_module.ReadSessionLocal()
+    try:
+        with pytest.raises(OperationalError):
+            session.execute(select(Item.id))
+    finally:
+        session.close()
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.schemas.token_schema import RefreshToken
+from app.services import refresh_sessions
+from app.services.refresh_sessions import rotate_session, start_session
+from app.utils.tokens_utils import decode_refresh_token
+
+
+def _rotate(db, tokens):
+    return rotate_session(
+        db, tokens.session_id, tokens.refresh_token, decode_refresh_token(tokens.refresh_token)
+    )
+
+
+def _assert_dead(db, tokens, payload):
+    # Rejected on decode in every worker, and by the DB for a payload
+    # decoded before the revocation
+    with pytest.raises(HTTPException):
+        decode_refresh_token(tokens.refresh_token)
+    assert rotate_session(db, tokens.session_id, tokens.refresh_token, payload) is None
+
+
+def _revoked_at(db, session_id):
+    return db.execute(
+        select(RefreshToken.revoked_at).where(RefreshToken.session_id == session_id)
+    ).scalar()
+
+
+def test_rotation_issues_the_next_generation(db, user):
+    first = start_session(db, user)
+
+    second = _rotate(db, first)
+
+    assert second is not None
+    assert decode_refresh_token(second.refresh_token).generation == 1
+    assert _rotate(db, second) is not None
+
+
+def test_earlier_generation_revokes_the_family(db, user, monkeypatch):
+    monkeypatch.setattr(refresh_sessions, "REFRESH_REUSE_GRACE_SECONDS", 0)
+    first = start_session(db, user)
+    second = _rotate(db, first)
+    payload = decode_refresh_token(second.refresh_token)
+
+    assert _rotate(db, first) is None
+
+    assert _revoked_at(db, first.session_id) is not None
+    # The legitimate holder's newer token is dead too
+    _assert_dead(db, second, payload)
+
+
+def test_reuse_within_grace_window_is_only_refused(db, user, monkeypatch):
+    monkeypatch.setattr(refresh_sessions, "REFRESH_REUSE_GRACE_SECONDS", 60)
+    first = start_session(db, user)
+    second = _rotate(db, first)
+
+    assert _rotate(db, first) is None
+
+    assert _revoked_at(db, first.session_id) is None
+    assert _rotate(db, second) is not None
+
+
+@pytest.mark.parametrize("grace", [0, 60])
+def test_older_than_previous_generation_always_revokes(db, user, monkeypatch, grace):
+    monkeypatch.setattr(refresh_sessions, "REFRESH_REUSE_GRACE_SECONDS", grace)
+    first = start_session(db, user)
+    second = _rotate(db, first)
+    third = _rotate(db, second)
+    payload = decode_refresh_token(third.refresh_token)
+
+    assert _rotate(db, first) is None
+
+    assert _revoked_at(db, first.session_id) is not None
+    _assert_dead(db, third, payload)